@@ -0,0 +1,211 @@
+"""Module containing a streaming analyzer for bulk files of positions.
+
+Input has one position per line, as nine characters in row-major order
+(``X``, ``O`` and ``-``, as `Board.__repr__` prints them row by row, e.g.
+``XO-X-O---``). For each, one tab-separated line is written:
+
+    position  state  winner  best move  value
+
+with the state as `BoardState` values (``Invalid`` for boards no game
+reaches, such as two winners or bad characters), the winner ``X``/``O``,
+the best move for the side to move as ``row,column`` and its value as
+`engine.negamax` scores it (``-`` where there is none). Blank lines are
+answered as invalid too, so output lines match input lines one to one.
+The moves and values come from the opening book, without which the
+analyzer stops with an error.
+
+The input (a memory-mapped file, or stdin) is read in blocks of whole
+lines. Each block is parsed into an (N, 9) array of cell codes and turned
+into base-3 position indexes with one matrix product; every answer then
+comes from a table of the 3 ** 9 layouts, built once from `batch` and the
+opening book. Blocks can be spread over worker processes, with a bounded
+number in flight and results written in input order, so memory stays flat
+whatever the input size.
+
+Usage::
+
+    python analyze.py positions.txt -o results.tsv --workers 4
+    generate_positions | python analyze.py > results.tsv
+"""
+import argparse
+import mmap
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import batch
+from bitboard import CELL_COUNT, cell_coords
+from book import BOOK_PATH, TERMINAL, MISSING, get_book
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+# cell code of each input byte; anything else marks the line invalid
+CHAR_CODES = np.full(256, 0xFF, dtype=np.uint8)
+for _char, _code in ((b'-', batch.EMPTY), (b'.', batch.EMPTY),
+                     (b'X', batch.X), (b'x', batch.X), (b'O', batch.O), (b'o', batch.O)):
+    CHAR_CODES[ord(_char)] = _code
+
+INVALID_ANSWER = b'\tInvalid\t-\t-\t-'
+
+NO_BOOK_MESSAGE = (f'the opening book ({BOOK_PATH}) is missing or invalid; '
+                   'rebuild it with `python book.py`')
+
+_answers = None
+
+
+def _build_answers():
+    """ Returns the output columns (after the position) of each of the
+    3 ** 9 layouts, by base-3 index. Raises RuntimeError if the opening
+    book, which the moves and values come from, isn't available. """
+    book = get_book()
+    if book is None:
+        raise RuntimeError(NO_BOOK_MESSAGE)
+    moves, values = book.arrays()
+
+    answers = []
+    for state, winner, move, value in zip(batch.STATE_TABLE.tolist(), batch.WINNER_TABLE.tolist(),
+                                          moves.tolist(), values.tolist()):
+        if state == batch.INVALID or move == MISSING:
+            # unreachable layouts (such as with too many Xs) aren't in the
+            # book, and have no answer
+            answers.append(INVALID_ANSWER)
+            continue
+        # like `Board.get_best_move`, no move once the game is over (the book
+        # still has one for an early cat's game)
+        best = '-' if state != batch.PLAYING or move >= TERMINAL else '%d,%d' % cell_coords(move)
+        answers.append('\t{}\t{}\t{}\t{}'.format(
+            batch.STATES[state].value,
+            batch.PLAYERS[winner].value if winner != batch.EMPTY else '-',
+            best,
+            value,
+        ).encode())
+    return answers
+
+
+def analyze_block(block):
+    """ Returns the output lines (as bytes) for a block of input lines,
+    one per line (blank lines included, as invalid positions). """
+    global _answers
+    if _answers is None:
+        _answers = _build_answers()
+
+    lines = block.split(b'\n')
+    if not lines[-1]:
+        # the end of the last line, not a line of its own
+        lines.pop()
+    if not lines:
+        return b''
+    lines = [line.strip() for line in lines]
+    well_formed = [line for line in lines if len(line) == CELL_COUNT]
+    codes = CHAR_CODES[np.frombuffer(b''.join(well_formed), dtype=np.uint8)]
+    codes = codes.reshape(-1, CELL_COUNT)
+    valid = (codes <= batch.O).all(axis=1)
+    indexes = np.where(valid, codes.astype(np.int16) @ batch.POWERS, -1).tolist()
+
+    answers = _answers
+    position_answers = iter(indexes)
+    output = []
+    for line in lines:
+        index = next(position_answers) if len(line) == CELL_COUNT else -1
+        output.append(line + (answers[index] if index >= 0 else INVALID_ANSWER))
+    output.append(b'')
+    return b'\n'.join(output)
+
+
+def read_blocks(source, block_size=DEFAULT_BLOCK_SIZE):
+    """ Yields blocks of about `block_size` bytes of whole lines from
+    `source`, a binary file object or a buffer such as an `mmap`. """
+    if isinstance(source, (bytes, bytearray, mmap.mmap)):
+        start = 0
+        size = len(source)
+        while start < size:
+            end = start + block_size
+            if end < size:
+                newline = source.rfind(b'\n', start, end)
+                if newline < 0:
+                    # a line longer than a block
+                    newline = source.find(b'\n', end)
+                end = size if newline < 0 else newline + 1
+            yield source[start:min(end, size)]
+            start = end
+        return
+
+    rest = b''
+    while True:
+        data = source.read(block_size)
+        if not data:
+            break
+        data = rest + data
+        end = data.rfind(b'\n') + 1
+        if not end:
+            rest = data
+            continue
+        rest = data[end:]
+        yield data[:end]
+    if rest:
+        yield rest
+
+
+def analyze(source, output, workers=1, block_size=DEFAULT_BLOCK_SIZE):
+    """ Analyzes the positions in `source` (see `read_blocks`) and writes
+    the results to the binary file object `output`. Returns the number of
+    bytes written. """
+    written = 0
+    blocks = read_blocks(source, block_size)
+    if workers == 1:
+        for block in blocks:
+            written += output.write(analyze_block(block))
+        return written
+
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for block in blocks:
+            pending.append(executor.submit(analyze_block, block))
+            if len(pending) >= 2 * workers:
+                written += output.write(pending.popleft().result())
+        while pending:
+            written += output.write(pending.popleft().result())
+    return written
+
+
+def main(argv=None):
+    """ Command line entry point. """
+    parser = argparse.ArgumentParser(description='Analyze a file of 3x3 positions.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='file of positions, one per line (default: stdin)')
+    parser.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='worker processes (default: 1, in this process)')
+    parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE,
+                        help='bytes of input per batch (default: %(default)s)')
+    args = parser.parse_args(argv)
+    if get_book() is None:
+        parser.error(NO_BOOK_MESSAGE)
+
+    output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        if args.input == '-':
+            analyze(sys.stdin.buffer, output, args.workers, args.block_size)
+        else:
+            with open(args.input, 'rb') as f:
+                try:
+                    source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # an empty file can't be mapped
+                    source = b''
+                try:
+                    analyze(source, output, args.workers, args.block_size)
+                finally:
+                    if isinstance(source, mmap.mmap):
+                        source.close()
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        else:
+            output.flush()
+
+
+if __name__ == '__main__':
+    main()
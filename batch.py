@@ -0,0 +1,121 @@
+"""Module containing vectorized evaluation of many boards at once.
+
+Boards are rows of an (N, 9) integer array in row-major cell order, with
+`EMPTY`, `X` and `O` cell codes. At import, every one of the 3 ** 9 cell
+layouts is evaluated once, using the eight win lines as an index array
+into per-line lookup tables; `evaluate` then turns each board into its
+base-3 index and gathers the results, with no per-board Python code.
+
+Results follow `Board` semantics: a board with no clear span is a Cat's
+Game even if it isn't full, and a board with more than one complete span
+(what `Board.get_state` reports by raising `MultipleWinError`), or with
+cell codes other than 0-2, is reported as `INVALID`.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from bitboard import CELL_COUNT, WIN_MASKS, iter_cells
+# the board's cell and state codes, and the public enums by code (None
+# for EMPTY / INVALID)
+from board import EMPTY, X, O, PLAYING, FINISHED, CATS_GAME, INVALID, STATES, PLAYERS  # noqa: F401
+
+# (8, 3) cell indexes of the win lines, in `Board` span order
+LINES = np.array([list(iter_cells(mask)) for mask in WIN_MASKS], dtype=np.intp)
+
+_LINE_CODES = [(code % 3, code // 3 % 3, code // 9) for code in range(27)]
+
+# per base-3 line code: who (if anyone) owns all three cells
+LINE_OWNER = np.array(
+    [cells[0] if cells[0] == cells[1] == cells[2] else EMPTY for cells in _LINE_CODES],
+    dtype=np.int8,
+)
+# per base-3 line code: does the line hold marks of both players
+LINE_BLOCKED = np.array(
+    [X in cells and O in cells for cells in _LINE_CODES], dtype=bool
+)
+
+BatchEvaluation = namedtuple(
+    'BatchEvaluation', ['state', 'winner', 'current_player', 'legal_moves']
+)
+BatchEvaluation.__doc__ = """ Per-board results of `evaluate`.
+
+`state` holds state codes, `winner` and `current_player` cell codes (int8,
+length N) and `legal_moves` a boolean (N, 9) mask of the empty cells.
+"""
+
+# base-3 weight of each cell, for indexing the per-position tables
+POWERS = (3 ** np.arange(CELL_COUNT)).astype(np.int16)
+
+
+def evaluate_lines(boards):
+    """ Evaluates an (N, 9) array of valid cell codes line by line and
+    returns `(state, winner, current_player)` code arrays.
+    """
+    line_codes = (boards[:, LINES[:, 0]] + 3 * boards[:, LINES[:, 1]]
+                  + 9 * boards[:, LINES[:, 2]])
+    owners = LINE_OWNER[line_codes]
+    won = owners != EMPTY
+    win_count = won.sum(axis=1)
+    cats = LINE_BLOCKED[line_codes].all(axis=1)
+
+    state = np.full(len(boards), PLAYING, dtype=np.int8)
+    state[win_count == 1] = FINISHED
+    state[win_count > 1] = INVALID
+    state[cats] = CATS_GAME
+
+    # the first complete span, in span order, decides the winner
+    winner = owners[np.arange(len(boards)), won.argmax(axis=1)]
+
+    x_count = (boards == X).sum(axis=1)
+    o_count = (boards == O).sum(axis=1)
+    current_player = np.where(x_count > o_count, O, X).astype(np.int8)
+    return state, winner, current_player
+
+
+def _build_tables():
+    """ Evaluates all 3 ** 9 cell layouts once, so `evaluate` only has to
+    index into the results.
+    """
+    digits = np.arange(3 ** CELL_COUNT)[:, None] // POWERS.astype(np.intp) % 3
+    return evaluate_lines(digits.astype(np.int8))
+
+
+STATE_TABLE, WINNER_TABLE, PLAYER_TABLE = _build_tables()
+
+
+def evaluate(boards):
+    """ Evaluates an (N, 9) array of cell codes and returns a
+    `BatchEvaluation`.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim != 2 or boards.shape[1] != CELL_COUNT:
+        raise ValueError(f'Expected an (N, {CELL_COUNT}) array, got {boards.shape}')
+
+    # out-of-range codes (negative ones wrap to > 127) are cleared, and the
+    # affected rows reported as INVALID
+    bad_cells = None
+    if boards.size and boards.view(np.uint8).max() > O:
+        bad_cells = (boards.view(np.uint8) > O).any(axis=1)
+        boards = np.where(bad_cells[:, None], EMPTY, boards).astype(np.int8)
+
+    index = boards.astype(np.int16) @ POWERS
+    state = STATE_TABLE[index]
+    winner = WINNER_TABLE[index]
+    if bad_cells is not None:
+        state[bad_cells] = INVALID
+        winner[bad_cells] = EMPTY
+    return BatchEvaluation(state, winner, PLAYER_TABLE[index], boards == EMPTY)
+
+
+def from_boards(boards):
+    """ Returns the (N, 9) cell-code array for an iterable of `Board`s. """
+    rows = []
+    for board in boards:
+        row = [EMPTY] * CELL_COUNT
+        for cell in iter_cells(board.x_bits):
+            row[cell] = X
+        for cell in iter_cells(board.o_bits):
+            row[cell] = O
+        rows.append(row)
+    return np.array(rows, dtype=np.int8).reshape(-1, CELL_COUNT)
@@ -0,0 +1,76 @@
+"""Microbenchmark of the integer player and state codes against the enums.
+
+Times, per call, the `Player` / `BoardState` API against the integer code
+forms the board uses internally, on a mid-game board:
+
+- `Player.get_foe` as it was (a string comparison and a new enum lookup),
+  as it is (an identity comparison with the members held as module
+  globals, with no enum attribute lookup) and as a code (``3 - code``),
+- `get_state` against `get_state_code`,
+- `get_current_player` against `get_current_player_code`.
+
+Usage::
+
+    python benchmarks/bench_codes.py --number 200000
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from board import Board, Player, X  # noqa: E402
+
+
+def _string_get_foe(player):
+    """ `Player.get_foe` before the integer codes. """
+    foe = 'X' if player.value == 'O' else 'O'
+    return Player(foe)
+
+
+def cases():
+    """ Returns `(name, [(variant, callable)])` benchmark cases. """
+    board = Board()
+    for row, column in ((1, 1), (0, 0), (2, 2)):
+        board.select_cell(row, column)
+    player = Player.PLAYER_X
+    code = X
+    return [
+        ('get_foe', [
+            ('string enum', lambda: _string_get_foe(player)),
+            ('Player.get_foe', lambda: Player.get_foe(player)),
+            ('3 - code', lambda: 3 - code),
+        ]),
+        ('get_state', [
+            ('get_state', board.get_state),
+            ('get_state_code', board.get_state_code),
+        ]),
+        ('get_current_player', [
+            ('get_current_player', board.get_current_player),
+            ('get_current_player_code', board.get_current_player_code),
+        ]),
+    ]
+
+
+def time_call(function, number, repeat=5):
+    """ Returns the best time per call of `function`, in nanoseconds. """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1e9
+
+
+def main(argv=None):
+    """ Command line entry point. """
+    parser = argparse.ArgumentParser(description='Compare enum and integer code calls.')
+    parser.add_argument('-n', '--number', type=int, default=200000)
+    args = parser.parse_args(argv)
+    for name, variants in cases():
+        print(name)
+        baseline = None
+        for variant, function in variants:
+            nanoseconds = time_call(function, args.number)
+            baseline = baseline or nanoseconds
+            print(f'  {variant:26s} {nanoseconds:8.1f} ns  {baseline / nanoseconds:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
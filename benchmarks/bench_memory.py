@@ -0,0 +1,69 @@
+"""Benchmark of the memory held by each `Board` (and `Game`) instance.
+
+Creates many instances per case and reports the traced allocation per
+instance, including everything it owns (views, lists, move stack).
+
+Usage::
+
+    python benchmarks/bench_memory.py --count 10000
+"""
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from board import Board  # noqa: E402
+from game import Game  # noqa: E402
+
+# a mid-game position, played with `select_cell`
+MOVES = ((1, 1), (0, 0), (2, 2), (0, 2), (0, 1))
+
+
+def _played_board():
+    board = Board()
+    for row, column in MOVES:
+        board.select_cell(row, column)
+    return board
+
+
+def bytes_per_instance(factory, count):
+    """ Returns the bytes allocated per object by calling `factory`
+    `count` times (and holding on to the results). """
+    objects = [None] * count
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        for i in range(count):
+            objects[i] = factory()
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (end - start) / count
+
+
+def cases():
+    """ Returns the `(name, factory)` benchmark cases. """
+    played = _played_board()
+    result = [
+        ('Board()', Board),
+        (f'Board after {len(MOVES)} moves', _played_board),
+        ('Game()', Game),
+    ]
+    if hasattr(Board, 'copy'):
+        result.insert(2, (f'Board.copy() after {len(MOVES)} moves', played.copy))
+    return result
+
+
+def main(argv=None):
+    """ Command line entry point. """
+    parser = argparse.ArgumentParser(description='Measure bytes per Board instance.')
+    parser.add_argument('-n', '--count', type=int, default=10000)
+    args = parser.parse_args(argv)
+    for name, factory in cases():
+        print(f'{name:32s} {bytes_per_instance(factory, args.count):8.0f} bytes')
+
+
+if __name__ == '__main__':
+    main()
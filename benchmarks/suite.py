@@ -0,0 +1,248 @@
+"""Benchmark suite for the board and AI hot paths, with regression checks.
+
+Times the `Board` queries (`get_state`, `get_winner`, `get_current_player`,
+`get_available_squares`, `get_legal_moves`), `select_cell`,
+`make_best_move`, a full game of perfect play against random moves and
+`Board()` itself, once with the loggers at their production level
+(WARNING) and once at DEBUG, with the records formatted to a null stream.
+Each case is run in loops long enough to time (as `timeit` does), and the
+best of `--repeat` loops is kept.
+
+Results are written as JSON. Given a baseline (an earlier output), the
+run also compares against it and exits with status 1 if any case got
+slower by more than `--threshold` (a fraction). `BASELINE_PATH` holds
+the results recorded with the suite's defaults; timings depend on the
+machine, so rerecord it where the comparison is run::
+
+    python benchmarks/suite.py -o benchmarks/baseline.json
+    python benchmarks/suite.py -o results.json --compare benchmarks/baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from contextlib import contextmanager
+from itertools import repeat
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from board import Board, BoardState, Strategy  # noqa: E402
+from loggers import LOGGER_NAMES  # noqa: E402
+
+LEVELS = {'production': logging.WARNING, 'debug': logging.DEBUG}
+
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = 0.05
+DEFAULT_THRESHOLD = 0.25
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+# the position the queries and moves are timed on
+MOVES = ((1, 1), (0, 0), (2, 2), (0, 2))
+
+
+def _position():
+    board = Board()
+    for row, column in MOVES:
+        board.select_cell(row, column)
+    return board
+
+
+def _time_calls(function, count):
+    start = time.perf_counter()
+    for _ in repeat(None, count):
+        function()
+    return time.perf_counter() - start
+
+
+def _query(method):
+    def bench(count):
+        return _time_calls(getattr(_position(), method), count)
+    bench.__doc__ = f' Times `Board.{method}` on a mid-game board. '
+    return bench
+
+
+def bench_construction(count):
+    """ Times `Board()`. """
+    return _time_calls(Board, count)
+
+
+def bench_select_cell(count):
+    """ Times `select_cell` on the centre of an empty board. """
+    boards = [Board() for _ in range(count)]
+    start = time.perf_counter()
+    for board in boards:
+        board.select_cell(1, 1)
+    return time.perf_counter() - start
+
+
+def bench_make_best_move(count):
+    """ Times a perfect move on a mid-game board. """
+    position = _position()
+    boards = [position.copy() for _ in range(count)]
+    start = time.perf_counter()
+    for board in boards:
+        board.make_best_move(Strategy.PERFECT)
+    return time.perf_counter() - start
+
+
+def bench_full_game(count):
+    """ Times whole games of perfect play against random moves. """
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in repeat(None, count):
+        board = Board()
+        strategies = Strategy.PERFECT, Strategy.RANDOM
+        while board.get_state() is BoardState.PLAYING:
+            board.make_best_move(strategies[board.counter % 2], rng)
+    return time.perf_counter() - start
+
+
+CASES = {
+    'Board()': bench_construction,
+    'get_state': _query('get_state'),
+    'get_winner': _query('get_winner'),
+    'get_current_player': _query('get_current_player'),
+    'get_available_squares': _query('get_available_squares'),
+    'get_legal_moves': _query('get_legal_moves'),
+    'select_cell': bench_select_cell,
+    'make_best_move': bench_make_best_move,
+    'full_game': bench_full_game,
+}
+
+
+@contextmanager
+def log_level(level):
+    """ Sets the game's loggers to `level` for the duration; below WARNING,
+    records are formatted and written to the null device, so the cost of
+    producing them is measured without disk I/O. """
+    loggers = [logging.getLogger(name) for name in LOGGER_NAMES]
+    saved = [(logger.level, logger.propagate) for logger in loggers]
+    handler = None
+    if level < logging.WARNING:
+        handler = logging.StreamHandler(open(os.devnull, 'w', encoding='utf8'))
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    try:
+        for logger in loggers:
+            logger.setLevel(level)
+            if handler is not None:
+                logger.addHandler(handler)
+                logger.propagate = False
+        yield
+    finally:
+        for logger, (saved_level, propagate) in zip(loggers, saved):
+            logger.setLevel(saved_level)
+            logger.propagate = propagate
+            if handler is not None:
+                logger.removeHandler(handler)
+        if handler is not None:
+            handler.stream.close()
+
+
+def measure(bench, repeat_count=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """ Returns `(seconds per call, calls per loop)` for `bench`: the loop
+    size grows until a loop takes `min_time`, then the fastest of
+    `repeat_count` loops is kept. """
+    count = 1
+    while True:
+        for step in (1, 2, 5):
+            elapsed = bench(count * step)
+            if elapsed >= min_time:
+                count *= step
+                best = min([elapsed] + [bench(count) for _ in range(repeat_count - 1)])
+                return best / count, count
+        count *= 10
+
+
+def run(names=None, levels=LEVELS, repeat_count=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """ Runs the cases in `names` (by default all) at each of `levels`, and
+    returns the results as a JSON-able dict. """
+    results = {}
+    for level_name, level in levels.items():
+        with log_level(level):
+            for name in names or CASES:
+                seconds, count = measure(CASES[name], repeat_count, min_time)
+                results[f'{name}[{level_name}]'] = {
+                    'case': name,
+                    'level': level_name,
+                    'ns_per_op': seconds * 1e9,
+                    'loop': count,
+                }
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def load_results(path=BASELINE_PATH):
+    """ Returns the results stored as JSON in `path` (by default, the
+    shipped baseline). """
+    with open(path, encoding='utf8') as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """ Returns `(key, baseline ns, current ns, ratio)` for every case of
+    `results` also in `baseline`, and the keys of those that regressed:
+    got slower by more than `threshold` (a fraction). """
+    rows = []
+    regressions = []
+    for key, result in results['results'].items():
+        old = baseline['results'].get(key)
+        if old is None:
+            continue
+        ratio = result['ns_per_op'] / old['ns_per_op']
+        rows.append((key, old['ns_per_op'], result['ns_per_op'], ratio))
+        if ratio > 1 + threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def main(argv=None):
+    """ Command line entry point. """
+    parser = argparse.ArgumentParser(description='Benchmark the board and AI hot paths.')
+    parser.add_argument('-o', '--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='fail if slower than the results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown, as a fraction (default: %(default)s)')
+    parser.add_argument('-k', '--case', action='append', choices=list(CASES),
+                        help='run only this case (may be repeated)')
+    parser.add_argument('--level', action='append', choices=list(LEVELS),
+                        help='run only at this log level (may be repeated)')
+    parser.add_argument('-r', '--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME,
+                        help='seconds per timed loop (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    levels = {name: LEVELS[name] for name in args.level or LEVELS}
+    results = run(args.case, levels, args.repeat, args.min_time)
+    for key, result in results['results'].items():
+        print(f'{key:36s} {result["ns_per_op"]:12.0f} ns')
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        baseline = load_results(args.compare)
+        rows, regressions = compare(results, baseline, args.threshold)
+        print(f'\nAgainst {args.compare} (threshold {args.threshold:.0%}):')
+        for key, old, new, ratio in rows:
+            flag = '  REGRESSION' if key in regressions else ''
+            print(f'{key:36s} {old:12.0f} -> {new:12.0f} ns {ratio:6.2f}x{flag}')
+        if regressions:
+            print(f'{len(regressions)} regression(s)')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
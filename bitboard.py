@@ -0,0 +1,258 @@
+"""Module containing the compact (bitboard) encoding of the board.
+
+Each player's marks are held in a single integer, with bit
+``row * columns + column`` set for every cell the player occupies. The win
+lines of a board are precomputed as bitmasks (see `Geometry`), so checking
+a line is a single ``&`` and comparison.
+
+The module-level constants describe the standard 3x3 board.
+"""
+from functools import lru_cache
+
+SIZE = 3
+
+# boards with more cells than this only consider moves near existing marks
+CANDIDATE_MOVES_THRESHOLD = 16
+
+# boards with at most this many cells list the cells of any mask from a
+# table (of 2 ** cells entries)
+CELL_TABLE_THRESHOLD = 12
+
+
+def popcount(bits):
+    """ Returns the number of set cells in `bits`. """
+    return bin(bits).count('1')
+
+
+def lowest_cell(bits):
+    """ Returns the bit index of the lowest set cell in `bits`. """
+    return (bits & -bits).bit_length() - 1
+
+
+def iter_cells(bits):
+    """ Yields the bit index of every set cell in `bits`, lowest first. """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class Geometry:
+    """ The cells and win lines of a `rows` x `columns` board on which
+    `win_length` marks in a row (horizontally, vertically or diagonally)
+    win, `win_length` being at least 2. Use `get_geometry`, which shares one
+    instance per shape.
+    """
+
+    def __init__(self, rows=SIZE, columns=SIZE, win_length=SIZE):
+        if rows < 1 or columns < 1:
+            raise ValueError(f'Invalid board size {rows}x{columns}')
+        if not 2 <= win_length <= max(rows, columns):
+            raise ValueError(
+                f'Win length {win_length} does not fit a {rows}x{columns} board'
+            )
+        self.rows = rows
+        self.columns = columns
+        self.win_length = win_length
+        self.cell_count = rows * columns
+        self.full_mask = (1 << self.cell_count) - 1
+
+        self.spans = self._build_spans()
+        self.span_names = tuple(name for name, _ in self.spans)
+        self.win_masks = tuple(mask for _, mask in self.spans)
+        self.all_lines = (1 << len(self.win_masks)) - 1
+
+        # for every cell, the indexes (into `win_masks`) of the lines through it
+        self.cell_lines = tuple(
+            tuple(line for line, mask in enumerate(self.win_masks) if mask >> cell & 1)
+            for cell in range(self.cell_count)
+        )
+        # for every cell, the masks of the lines through it
+        self.cell_win_masks = tuple(
+            tuple(self.win_masks[line] for line in lines) for lines in self.cell_lines
+        )
+        # cells on the most lines first (on 3x3: center, corners, then edges)
+        self.move_order = tuple(sorted(
+            range(self.cell_count), key=lambda cell: -len(self.cell_lines[cell])
+        ))
+        # for every cell, the mask of the (up to eight) cells around it
+        self.neighbors = tuple(
+            self._area_mask(cell, 1) for cell in range(self.cell_count)
+        )
+        self.center = self.cell_index(rows // 2, columns // 2)
+        self.restrict_moves = self.cell_count > CANDIDATE_MOVES_THRESHOLD
+        # width of one move (a cell index plus one) in a packed move stack
+        self.move_bits = self.cell_count.bit_length()
+        # `mask_cells` / `mask_squares` results by mask, built on first use
+        self._cell_table = None
+        self._square_table = None
+
+    def __repr__(self):
+        return f'Geometry({self.rows}, {self.columns}, {self.win_length})'
+
+    def cell_index(self, row, column):
+        """ Returns the bit index of the cell at `row`/`column`. """
+        return row * self.columns + column
+
+    def cell_coords(self, index):
+        """ Returns the `(row, column)` of the cell at bit `index`. """
+        return divmod(index, self.columns)
+
+    def _line_mask(self, cells):
+        mask = 0
+        for row, column in cells:
+            mask |= 1 << self.cell_index(row, column)
+        return mask
+
+    def _area_mask(self, cell, distance):
+        """ Returns the mask of the cells within `distance` of `cell`, not
+        including the cell itself. """
+        row, column = self.cell_coords(cell)
+        mask = 0
+        for other_row in range(max(row - distance, 0), min(row + distance + 1, self.rows)):
+            for other_col in range(max(column - distance, 0),
+                                   min(column + distance + 1, self.columns)):
+                mask |= 1 << self.cell_index(other_row, other_col)
+        return mask & ~(1 << cell)
+
+    def _build_spans(self):
+        """ Builds the win lines, named and ordered the way `Board` has always
+        reported them: rows and columns interleaved, then the diagonals.
+
+        On the standard board each line spans a whole row, column or
+        diagonal (`'row 0'`, `'diag f'`); otherwise names carry the start of
+        the line (`'row 0:2'`, `'diag f 1,0'`).
+        """
+        rows, columns, length = self.rows, self.columns, self.win_length
+        spans = []
+
+        def add(name, cells):
+            spans.append((name, self._line_mask(cells)))
+
+        for i in range(max(rows, columns)):
+            if i < rows:
+                for start in range(columns - length + 1):
+                    name = f'row {i}' if columns == length else f'row {i}:{start}'
+                    add(name, ((i, start + j) for j in range(length)))
+            if i < columns:
+                for start in range(rows - length + 1):
+                    name = f'col {i}' if rows == length else f'col {i}:{start}'
+                    add(name, ((start + j, i) for j in range(length)))
+        whole = rows == columns == length
+        for row in range(rows - length + 1):
+            for col in range(columns - length + 1):
+                name = 'diag f' if whole else f'diag f {row},{col}'
+                add(name, ((row + j, col + j) for j in range(length)))
+        for row in range(rows - length + 1):
+            for col in range(length - 1, columns):
+                name = 'diag b' if whole else f'diag b {row},{col}'
+                add(name, ((row + j, col - j) for j in range(length)))
+        return tuple(spans)
+
+    def completes_line(self, bits, cell):
+        """ Returns True if `bits` covers a win line through `cell`. """
+        for mask in self.cell_win_masks[cell]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def _build_cell_tables(self):
+        cells = [()] * (1 << self.cell_count)
+        for bits in range(1, len(cells)):
+            low = bits & -bits
+            cells[bits] = (low.bit_length() - 1,) + cells[bits ^ low]
+        self._cell_table = cells
+        self._square_table = [tuple(map(self.cell_coords, row)) for row in cells]
+
+    def mask_cells(self, bits):
+        """ Returns a tuple of the index of every set cell in `bits`,
+        lowest first. On boards of up to `CELL_TABLE_THRESHOLD` cells, the
+        tuples are precomputed and shared, so no call allocates.
+        """
+        if self.cell_count > CELL_TABLE_THRESHOLD:
+            return tuple(iter_cells(bits))
+        if self._cell_table is None:
+            self._build_cell_tables()
+        return self._cell_table[bits]
+
+    def mask_squares(self, bits):
+        """ Returns a tuple of the `(row, column)` of every set cell in
+        `bits`, lowest first, shared as for `mask_cells`.
+        """
+        if self.cell_count > CELL_TABLE_THRESHOLD:
+            return tuple(map(self.cell_coords, iter_cells(bits)))
+        if self._square_table is None:
+            self._build_cell_tables()
+        return self._square_table[bits]
+
+    def candidate_cells(self, occupied):
+        """ Returns the mask of the empty cells worth considering as moves:
+        every empty cell on small boards, and on large ones only those next
+        to an existing mark (or the center, on an empty board).
+        """
+        empty = self.full_mask & ~occupied
+        if not self.restrict_moves:
+            return empty
+        if not occupied:
+            return 1 << self.center
+        near = 0
+        neighbors = self.neighbors
+        for cell in iter_cells(occupied):
+            near |= neighbors[cell]
+        return near & empty
+
+
+@lru_cache(maxsize=None)
+def _cached_geometry(rows, columns, win_length):
+    return Geometry(rows, columns, win_length)
+
+
+def get_geometry(rows=SIZE, columns=SIZE, win_length=SIZE):
+    """ Returns the shared `Geometry` for a board shape, so that boards of
+    the same shape can be compared with `is`. """
+    return _cached_geometry(rows, columns, win_length)
+
+
+DEFAULT_GEOMETRY = get_geometry()
+
+CELL_COUNT = DEFAULT_GEOMETRY.cell_count
+FULL_MASK = DEFAULT_GEOMETRY.full_mask
+SPANS = DEFAULT_GEOMETRY.spans
+SPAN_NAMES = DEFAULT_GEOMETRY.span_names
+WIN_MASKS = DEFAULT_GEOMETRY.win_masks
+ROW_MASKS = WIN_MASKS[0:2 * SIZE:2]
+COL_MASKS = WIN_MASKS[1:2 * SIZE:2]
+DIAG_MASKS = WIN_MASKS[2 * SIZE:]
+ALL_LINES = DEFAULT_GEOMETRY.all_lines
+CELL_LINES = DEFAULT_GEOMETRY.cell_lines
+
+# number of set bits for every possible single-player bitboard
+POPCOUNT = tuple(popcount(bits) for bits in range(FULL_MASK + 1))
+
+
+def cell_index(row, column):
+    """ Returns the bit index of the cell at `row`/`column`. """
+    return row * SIZE + column
+
+
+def cell_coords(index):
+    """ Returns the `(row, column)` of the cell at bit `index`. """
+    return divmod(index, SIZE)
+
+
+def is_win(bits):
+    """ Returns True if `bits` covers at least one win line. """
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def has_clear_span(x_bits, o_bits):
+    """ Returns True if at least one win line is not blocked (i.e. does not
+    contain marks of both players).
+    """
+    for mask in WIN_MASKS:
+        if not (x_bits & mask and o_bits & mask):
+            return True
+    return False
@@ -1,9 +1,16 @@
 """Module containing game logic"""
 import random
 from enum import Enum
-from collections import Counter, defaultdict
+from logging import DEBUG, INFO
+from collections import defaultdict
 from math import inf as infinity
 
+from bitboard import SIZE, DEFAULT_GEOMETRY, ROW_MASKS, COL_MASKS, DIAG_MASKS, POPCOUNT
+from bitboard import get_geometry, cell_index, lowest_cell, iter_cells, popcount
+from book import get_book
+from engine import best_move
+from evalcache import position_key
+from mcts import MonteCarloTree
 from loggers import board_logger, ai_logger
 
 
@@ -30,53 +37,282 @@ class Player(Enum):
     def get_foe(cls, player):
         """ Returns the opposing `Player` for the specified `player`
         """
-        foe = 'X' if player.value == 'O' else 'O'
-        return cls(foe)
+        return _PLAYER_O if player is _PLAYER_X else _PLAYER_X
+
+
+# integer codes of cells (and players) and of states, used inside the
+# board (the same codes as `batch`): the enums are only looked up from the
+# codes at the API edge. The foe of player code `p` is ``3 - p``.
+EMPTY, X, O = 0, 1, 2
+PLAYING, FINISHED, CATS_GAME, INVALID = 0, 1, 2, 3
+
+# codes -> the public enums (None for EMPTY / INVALID), and back
+PLAYERS = (None, Player.PLAYER_X, Player.PLAYER_O)
+STATES = (BoardState.PLAYING, BoardState.FINISHED, BoardState.CATS_GAME, None)
+PLAYER_CODES = {None: EMPTY, Player.PLAYER_X: X, Player.PLAYER_O: O}
+
+CELL_CHARS = '-XO'
+
+# the members as module globals: reading `Player.PLAYER_X` goes through the
+# enum class's attribute lookup on every call, so `get_foe` compares
+# identities with these (inside the board, the integer codes avoid enum
+# lookups altogether)
+_PLAYER_X, _PLAYER_O = Player.PLAYER_X, Player.PLAYER_O
+
+
+class Strategy(Enum):
+    '''
+    Move selection strategies for `Board.make_best_move`.
+
+    '''
+    PERFECT = 'Perfect'
+    HEURISTIC = 'Heuristic'
+    RANDOM = 'Random'
+    MCTS = 'MCTS'
+
+
+# strategies always picking the same move in a position, whose choices
+# can be cached (see `evalcache`)
+CACHED_STRATEGIES = frozenset((Strategy.PERFECT, Strategy.HEURISTIC))
+
+
+class _BoardRow:
+    """ A live, list-like view of a single row of a `Board`. Reads and
+    writes go straight through to the board's bitboards.
+    """
+    __slots__ = ('_board', '_row')
+
+    def __init__(self, board, row):
+        self._board = board
+        self._row = row
+
+    def __getitem__(self, column):
+        geometry = self._board.geometry
+        index = geometry.cell_index(self._row, range(geometry.columns)[column])
+        return self._board._get_cell(index)
+
+    def __setitem__(self, column, player):
+        geometry = self._board.geometry
+        index = geometry.cell_index(self._row, range(geometry.columns)[column])
+        self._board._set_cell(index, PLAYER_CODES.get(player, EMPTY))
+
+    def __len__(self):
+        return self._board.geometry.columns
+
+    def __iter__(self):
+        for column in range(len(self)):
+            yield self[column]
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class _BoardGrid:
+    """ A live, list-of-lists-like view of a `Board`, so `board.board[row][col]`
+    keeps working on top of the bitboard encoding.
+    """
+    __slots__ = ('_board',)
+
+    def __init__(self, board):
+        self._board = board
+
+    def __getitem__(self, row):
+        return _BoardRow(self._board, range(self._board.geometry.rows)[row])
+
+    def __setitem__(self, row, players):
+        board_row = self[row]
+        for column, player in enumerate(players):
+            board_row[column] = player
+
+    def __len__(self):
+        return self._board.geometry.rows
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def __eq__(self, other):
+        """ Compares the cells with a sequence of rows, as the list of
+        lists this view replaced did. """
+        try:
+            return [list(row) for row in self] == [list(row) for row in other]
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return repr([list(row) for row in self])
 
 
 class Board:
     """ A class to hold the stateful Tic-Tac-Toe board, including the
     current board layout, the state of the board, and the current
     move.
+
+    The board is `rows` x `columns` cells, and `win_length` marks in a row
+    win (the standard 3x3 game by default); see `bitboard.Geometry`.
+
+    The layout is held as two bitboards (`x_bits` and `o_bits`, one bit
+    per cell) plus a move count (`counter`). `board` is a list-like view
+    over them, indexed `board[row][column]`.
+
+    Every cell write updates the status of the win lines through that
+    cell only, and the resulting state and winner are cached, so
+    `get_state`/`get_winner`/`get_current_player` never rescan the board.
+
+    Moves played (by `push`, `select_cell` or `make_best_move`) are kept
+    on a move stack packed into a single int, so `pop` can take them back,
+    and `copy` is a constant-time copy of the encoding; searches can
+    explore positions either way without rebuilding boards.
     """
+    __slots__ = (
+        'geometry', 'x_bits', 'o_bits', 'counter', 'winning_span',
+        '_x_count', '_blocked_lines', '_won_lines', '_state', '_winner', '_moves',
+    )
 
-    def __init__(self):
+    def __init__(self, rows=SIZE, columns=SIZE, win_length=SIZE):
         """ Creates a new instance of the Board class, optionally
         accepting a current board state. """
-        board_logger.info('Game start')
-        self.board = [
-            [None]*3 for i in range(3)
-        ]
-        self.winning_span = []
+        if board_logger.isEnabledFor(INFO):
+            board_logger.info('Game start')
+        self.geometry = get_geometry(rows, columns, win_length)
+        self.x_bits = 0
+        self.o_bits = 0
         self.counter = 0
+        self.winning_span = []
+        self._x_count = 0
+        # one bit per win line (indexed as `geometry.win_masks`)
+        self._blocked_lines = 0
+        self._won_lines = 0
+        # state and winner codes
+        self._state = PLAYING
+        self._winner = EMPTY
+        # each move is its cell index plus one, `geometry.move_bits` wide,
+        # with the latest in the lowest bits
+        self._moves = 0
+
+    @property
+    def board(self):
+        """ A live, list-like view of the cells, indexed `[row][column]`. """
+        return _BoardGrid(self)
+
+    def copy(self):
+        """ Returns an independent copy of the position, in constant time.
+        The copy's move stack starts empty.
+        """
+        board = Board.__new__(Board)
+        board.geometry = self.geometry
+        board.x_bits = self.x_bits
+        board.o_bits = self.o_bits
+        board.counter = self.counter
+        board.winning_span = self.winning_span
+        board._x_count = self._x_count
+        board._blocked_lines = self._blocked_lines
+        board._won_lines = self._won_lines
+        board._state = self._state
+        board._winner = self._winner
+        board._moves = 0
+        return board
+
+    def _get_cell(self, index):
+        """ Returns the `Player` occupying the cell at bit `index`, or None. """
+        mask = 1 << index
+        if self.x_bits & mask:
+            return Player.PLAYER_X
+        if self.o_bits & mask:
+            return Player.PLAYER_O
+        return None
+
+    def _set_cell(self, index, player):
+        """ Assigns the `player` code (`X`, `O` or `EMPTY`, to clear it)
+        to the cell at bit `index`, without any validation, and updates the
+        tracked state.
+        """
+        mask = 1 << index
+        x_bits, o_bits = self.x_bits, self.o_bits
+        if x_bits & mask:
+            self.counter -= 1
+            self._x_count -= 1
+        elif o_bits & mask:
+            self.counter -= 1
+        x_bits &= ~mask
+        o_bits &= ~mask
+        if player == X:
+            x_bits |= mask
+            self._x_count += 1
+            self.counter += 1
+        elif player == O:
+            o_bits |= mask
+            self.counter += 1
+        self.x_bits, self.o_bits = x_bits, o_bits
+
+        win_masks = self.geometry.win_masks
+        blocked, won = self._blocked_lines, self._won_lines
+        for line in self.geometry.cell_lines[index]:
+            line_mask = win_masks[line]
+            line_bit = 1 << line
+            x_line = x_bits & line_mask
+            o_line = o_bits & line_mask
+            if x_line and o_line:
+                blocked |= line_bit
+            else:
+                blocked &= ~line_bit
+            if x_line == line_mask or o_line == line_mask:
+                won |= line_bit
+            else:
+                won &= ~line_bit
+        self._blocked_lines, self._won_lines = blocked, won
+        self._update_state()
+
+    def _update_state(self):
+        """ Derives the cached state and winner from the line status bits.
+
+        Mirrors the order of the original full scan: a board with no clear
+        span is a Cat's Game, otherwise exactly one complete span is a win
+        and more than one is invalid (cached as INVALID, raised on access).
+        """
+        won = self._won_lines
+        winner = EMPTY
+        if won:
+            first_mask = self.geometry.win_masks[lowest_cell(won)]
+            winner = X if self.x_bits & first_mask == first_mask else O
+        self._winner = winner
+
+        if self._blocked_lines == self.geometry.all_lines:
+            self._state = CATS_GAME
+        elif not won:
+            self._state = PLAYING
+        elif won & (won - 1):
+            self._state = INVALID
+        else:
+            self._state = FINISHED
 
     def get_winner(self):
         """ Find winner on board."""
-        spans = {}
-
-        # check each row and column
-        for i in range(3):
-            row = self.board[i]
-            spans[f'row {i}'] = row
-            col = self.board[0][i], self.board[1][i], self.board[2][i]
-            spans[f'col {i}'] = col
-
-        # check diagonal front and back
-        diag_f = self.board[0][0], self.board[1][1], self.board[2][2]
-        diag_b = self.board[0][2], self.board[1][1], self.board[2][0]
-        spans['diag f'] = diag_f
-        spans['diag b'] = diag_b
-        board_logger.debug('Checking diagonal (\\): %s', diag_f)
-        board_logger.debug('Checking diagonal (/): %s', diag_b)
-
-        for span_name, span in spans.items():
-            span_count = Counter(span)
-            board_logger.debug('Checking span: %s - %s', span_name, span)
-            if (span_count[Player.PLAYER_O] == 3 or
-               span_count[Player.PLAYER_X] == 3):
-                winner = Player.PLAYER_O if span_count[Player.PLAYER_O] > 0 else Player.PLAYER_X
-                board_logger.info('Winner: %s', winner)
-                return winner
+        winner = PLAYERS[self._winner]
+        if winner is not None and board_logger.isEnabledFor(INFO):
+            board_logger.info('Winner: %s', winner)
+        return winner
+
+    def get_winner_code(self):
+        """ Returns the code (`X`, `O`, or `EMPTY` if none) of the winner. """
+        return self._winner
+
+    def get_winning_cells(self) -> [(int, int)]:
+        """ Returns the coordinates of the cells of every complete span (the
+        `winning_span`, and any other span the winning move completed), or
+        an empty list if nobody has won.
+        """
+        geometry = self.geometry
+        cells = 0
+        for line in iter_cells(self._won_lines):
+            cells |= geometry.win_masks[line]
+        return [geometry.cell_coords(index) for index in iter_cells(cells)]
 
     def get_state(self) -> BoardState:
         """ Check board for a win condition or errors.
@@ -88,59 +324,23 @@ class Board:
         :returns:
             A BoardState with the current state of the board.
         """
-        win_count = 0
-        spans = {}
-
-        # check each row and column
-        for i in range(3):
-            row = self.board[i]
-            spans[f'row {i}'] = row
-            col = self.board[0][i], self.board[1][i], self.board[2][i]
-            spans[f'col {i}'] = col
-
-        # check diagonal front and back
-        diag_f = self.board[0][0], self.board[1][1], self.board[2][2]
-        diag_b = self.board[0][2], self.board[1][1], self.board[2][0]
-        spans['diag f'] = diag_f
-        spans['diag b'] = diag_b
-        board_logger.debug('Checking diagonal (\\): %s', diag_f)
-        board_logger.debug('Checking diagonal (/): %s', diag_b)
-
-        # do the check
-        clear_row_found = False
-        for span_name, span in spans.items():
-            span_count = Counter(span)
-            board_logger.debug('Checking span: %s - %s', span_name, span)
-
-            # check if at least one span isn't blocked
-            if (span_count[Player.PLAYER_O] == 0 or
-               span_count[Player.PLAYER_X] == 0):
-                board_logger.debug(
-                   'Found a span which is clear for win: %s', span
-                )
-                clear_row_found = True
-
-            if (span_count[Player.PLAYER_O] == 3 or
-               span_count[Player.PLAYER_X] == 3):
-                board_logger.info('Winner, winner, chicken dinner.')
-                board_logger.info(span_count)
-                self.winning_span = span_name
-                win_count += 1
-
-        if not clear_row_found:
-            board_logger.info('Cat\'s game')
-            return BoardState.CATS_GAME
-
-        # if win, ensure exactly one win
-        if win_count == 1:
-            board_logger.info('Found one win')
-            return BoardState.FINISHED
-        if win_count > 1:
+        state = self._state
+        if self._won_lines:
+            self.winning_span = self.geometry.span_names[self._won_lines.bit_length() - 1]
+        else:
+            self.winning_span = []
+
+        if state == INVALID:
             board_logger.error('Invalid board state (multiple wins)')
-            board_logger.debug(str(self))
+            board_logger.debug('%s', self)
             raise MultipleWinError()
+        return STATES[state]
 
-        return BoardState.PLAYING
+    def get_state_code(self):
+        """ Returns the code of the state (`PLAYING`, `FINISHED`,
+        `CATS_GAME`, or `INVALID` where `get_state` raises), for loops
+        that don't need the `BoardState` or `winning_span`. """
+        return self._state
 
     def select_cell(self, row, column):
         """ Plays a square (of `self.get_current_player()`) in the specified
@@ -151,164 +351,269 @@ class Board:
         to that square.
 
         """
-        current_val = self.board[row][column]
-        if current_val is not None:
+        geometry = self.geometry
+        index = geometry.cell_index(range(geometry.rows)[row], range(geometry.columns)[column])
+        if (self.x_bits | self.o_bits) >> index & 1:
             error_text = f'Attempted to select a non-empty cell {row}x{column}'
             board_logger.error(error_text)
-            board_logger.debug(str(self))
+            board_logger.debug('%s', self)
             raise InvalidMoveError(error_text)
-        self.board[row][column] = self.get_current_player()
+        self._set_cell(index, O if 2 * self._x_count > self.counter else X)
+        self._moves = self._moves << self.geometry.move_bits | index + 1
+
+    def push(self, move):
+        """ Plays `move`, a `(row, column)`, for the current player (as
+        `select_cell` does), so that `pop` can take it back.
+        """
+        self.select_cell(*move)
+
+    def pop(self):
+        """ Takes back the last move played and returns it as `(row,
+        column)`. Raises IndexError if there is no move to take back.
+        Cells written through `board` aren't moves, and aren't undone.
+        """
+        moves = self._moves
+        if not moves:
+            raise IndexError('pop from an empty move stack')
+        move_bits = self.geometry.move_bits
+        index = (moves & (1 << move_bits) - 1) - 1
+        self._moves = moves >> move_bits
+        self._set_cell(index, EMPTY)
+        return self.geometry.cell_coords(index)
+
+    def get_moves(self) -> [(int, int)]:
+        """ Returns the coordinates of the moves on the move stack, oldest
+        first. """
+        moves = self._moves
+        move_bits = self.geometry.move_bits
+        mask = (1 << move_bits) - 1
+        cells = []
+        while moves:
+            cells.append(self.geometry.cell_coords((moves & mask) - 1))
+            moves >>= move_bits
+        cells.reverse()
+        return cells
 
     def get_current_player(self):
-        """ Returns the Player whose turn it currently is. """
-        board_logger.debug('Get current player')
+        """ Returns the Player whose turn it currently is (X moves first, and
+        whenever both players have made the same number of moves). """
         ret = Player.PLAYER_X
-        square_counter = Counter()
-        [square_counter.update(row) for row in self.board]
-        board_logger.debug('Square counter:')
-        board_logger.debug(square_counter)
-        x_count = square_counter[Player.PLAYER_X]
-        o_count = square_counter[Player.PLAYER_O]
-        if x_count > o_count:
+        if 2 * self._x_count > self.counter:
             ret = Player.PLAYER_O
-        board_logger.debug('Get current player: %s', ret.value)
-        board_logger.debug(str(self))
+        if board_logger.isEnabledFor(DEBUG):
+            board_logger.debug('Get current player: %s', ret.value)
         return ret
 
+    def get_current_player_code(self):
+        """ Returns the code (`X` or `O`) of the player whose turn it is. """
+        return O if 2 * self._x_count > self.counter else X
+
+    def get_legal_moves(self) -> ((int, int), ...):
+        """ Returns a tuple of the coordinates of the empty squares, in
+        row-major order. On small boards it comes from a table shared by
+        all boards (see `bitboard.Geometry.mask_squares`), so nothing is
+        allocated.
+        """
+        geometry = self.geometry
+        return geometry.mask_squares(geometry.full_mask & ~(self.x_bits | self.o_bits))
+
+    def iter_available_squares(self):
+        """ Iterates over the coordinates of the empty squares, as
+        `get_legal_moves` lists them. """
+        return iter(self.get_legal_moves())
+
     def get_available_squares(self) -> [(int, int)]:
         """ Returns a list of coordinates for empty squares on the board.
         """
-        ret = []
-        for row_num in range(3):
-            for col_num in range(3):
-                if self.board[row_num][col_num] is None:
-                    ret.append((row_num, col_num))
-        board_logger.debug('Get available squares:')
-        board_logger.debug(self.board)
-        board_logger.debug(ret)
+        ret = list(self.get_legal_moves())
+        if board_logger.isEnabledFor(DEBUG):
+            board_logger.debug('Get available squares: %s', ret)
         return ret
 
-    def make_best_move(self):
-        ai_logger.debug('Make best move')
-        ai_logger.debug(str(self))
-        state = self.get_state()
-        if state is not BoardState.PLAYING:
+    def get_candidate_squares(self) -> [(int, int)]:
+        """ Returns the coordinates of the empty squares worth considering
+        as moves: all of them on small boards, only those next to a mark on
+        large ones (see `bitboard.Geometry.candidate_cells`).
+        """
+        geometry = self.geometry
+        return list(geometry.mask_squares(geometry.candidate_cells(self.x_bits | self.o_bits)))
+
+    def get_best_move(self, strategy=Strategy.PERFECT, rng=random, search=None, cache=None):
+        """ Returns the `(row, column)` of the move `strategy` picks for the
+        current player, without playing it, or None if the game is over.
+        Arguments are as for `make_best_move`.
+        """
+        if self._state != PLAYING:
+            self.get_state()
+            return None
+        return self.geometry.cell_coords(self._cached_cell(strategy, rng, search, cache))
+
+    def make_best_move(self, strategy=Strategy.PERFECT, rng=random, search=None, cache=None):
+        """ Plays a move for the current player, chosen by `strategy`.
+        `Strategy.RANDOM` and `Strategy.MCTS` draw from `rng` (a
+        `random.Random`).
+
+        `search` runs the `Strategy.MCTS` or `Strategy.PERFECT` search in
+        place of the defaults (a fresh `mcts.MonteCarloTree`, and
+        `engine.best_move` after the opening book): any object with a
+        `best_move(mine, theirs, rng)` method, such as a tree reused across
+        a game's moves or a `parallel.ParallelSearch`.
+
+        `cache` (an `evalcache.EvaluationCache`, such as the one every
+        `game.Game` shares) keeps the choices of the deterministic
+        strategies, `Strategy.PERFECT` and `Strategy.HEURISTIC`.
+        """
+        if ai_logger.isEnabledFor(DEBUG):
+            ai_logger.debug('Make best move: %s', self)
+        if self._state != PLAYING:
+            # raises MultipleWinError on an invalid board
+            self.get_state()
             ai_logger.warning('Attempt to make best move in non playing state')
             return
 
-        player = self.get_current_player()
-        opponent = Player.get_foe(player)
-
-        # win (row)
-        for row_num in range(3):
-            row = self.board[row_num]
-            counter = Counter(row)
-            ai_logger.debug('Row counter %s: %s', row_num, counter)
-            if counter[player] == 2 and counter[opponent] == 0:
-                ai_logger.debug('Found a row to win.')
-                for col_num in range(3):
-                    cell_val = self.board[row_num][col_num]
-                    if cell_val is None:
-                        self.board[row_num][col_num] = player
-                        return
-
-        # win (column)
-        for col_num in range(3):
-            col = self.board[0][col_num], self.board[1][col_num], self.board[2][col_num]
-            counter = Counter(col)
-            ai_logger.debug('Column counter %s: %s', col_num, counter)
-            if counter[player] == 2 and counter[opponent] == 0:
-                ai_logger.debug('Found a column to win.')
-                for row_num in range(3):
-                    cell_val = self.board[row_num][col_num]
-                    if cell_val is None:
-                        self.board[row_num][col_num] = player
-                        return
-
-        # block (row)
-        for row_num in range(3):
-            row = self.board[row_num]
-            counter = Counter(row)
-            ai_logger.debug('Row counter %s: %s', row_num, counter)
-            if counter[opponent] == 2 and counter[player] == 0:
-                ai_logger.debug('Found a row to block.')
-                for col_num in range(3):
-                    cell_val = self.board[row_num][col_num]
-                    if cell_val is None:
-                        self.board[row_num][col_num] = player
-                        return
-
-        # block (column)
-        for col_num in range(3):
-            col = self.board[0][col_num], self.board[1][col_num], self.board[2][col_num]
-            counter = Counter(col)
-            ai_logger.debug('Column counter %s: %s', col_num, counter)
-            if counter[opponent] == 2 and counter[player] == 0:
-                ai_logger.debug('Found a column to block a win.')
-                for row_num in range(3):
-                    cell_val = self.board[row_num][col_num]
-                    if cell_val is None:
-                        self.board[row_num][col_num] = player
-                        return
-
-        # win or block (diagonal)
-        diag_f = self.board[0][0], self.board[1][1], self.board[2][2]
-        diag_b = self.board[0][2], self.board[1][1], self.board[2][0]
-        counter = Counter(diag_f)
-        if ((counter[player] == 2 and counter[opponent] == 0) or
-           (counter[opponent] == 2 and counter[player] == 0)):
-            ai_logger.debug('Found a potential diagonal win or block.')
-            for cell in ((0,0), (1,1), (2,2)):
-                if self.board[cell[0]][cell[1]] is None:
-                    ai_logger.debug('blocking on diagonal f')
-                    self.board[cell[0]][cell[1]] = player
-                    return
-        counter = Counter(diag_b)
-        if ((counter[player] == 2 and counter[opponent] == 0) or
-           (counter[opponent] == 2 and counter[player] == 0)):
-            ai_logger.debug('Found a potential diagonal win or block.')
-            for cell in ((0,2), (1,1), (2,0)):
-                if self.board[cell[0]][cell[1]] is None:
-                    ai_logger.debug('blocking on diagonal b')
-                    self.board[cell[0]][cell[1]] = player
-                    return
-
-        # if an edge is available, take it
-        edge_cells = ((1, 0), (0, 1), (2, 1), (1, 2))
-        for cell in edge_cells:
-            if self.board[cell[0]][cell[1]] is None:
-                ai_logger.debug('Taking an edge cell.')
-                self.board[cell[0]][cell[1]] = player
-                return
-        # if the center is available, take it
-        if self.board[1][1] is None:
-            ai_logger.debug('Taking the center cell.')
-            self.board[1][1] = player
-            return
+        index = self._cached_cell(strategy, rng, search, cache)
+        self._set_cell(index, O if 2 * self._x_count > self.counter else X)
+        self._moves = self._moves << self.geometry.move_bits | index + 1
+
+    def _cached_cell(self, strategy, rng, search, cache):
+        """ Returns `_choose_cell`, from `cache` when it holds the choice. """
+        geometry = self.geometry
+        if (cache is None or strategy not in CACHED_STRATEGIES
+                or strategy is Strategy.PERFECT and geometry is DEFAULT_GEOMETRY
+                and get_book() is not None):
+            # the opening book answers faster than the cache
+            return self._choose_cell(strategy, rng, search)
+        key = geometry, strategy, position_key(geometry, self.x_bits, self.o_bits)
+        return cache.get_or_compute(key, lambda: self._choose_cell(strategy, rng, search))
+
+    def _choose_cell(self, strategy, rng, search):
+        """ Returns the cell index `strategy` picks for the current player. """
+        if 2 * self._x_count > self.counter:
+            mine, theirs = self.o_bits, self.x_bits
+        else:
+            mine, theirs = self.x_bits, self.o_bits
+
+        geometry = self.geometry
+        if strategy is Strategy.HEURISTIC:
+            if geometry is DEFAULT_GEOMETRY:
+                index = _heuristic_move(mine, theirs)
+            else:
+                index = _threat_move(geometry, mine, theirs)
+        elif strategy is Strategy.RANDOM:
+            index = rng.choice(geometry.mask_cells(geometry.full_mask & ~(mine | theirs)))
+        elif strategy is Strategy.MCTS:
+            if search is None:
+                search = MonteCarloTree(geometry)
+            index = search.best_move(mine, theirs, rng)
+        else:
+            index = None
+            book = get_book() if geometry is DEFAULT_GEOMETRY else None
+            if book is not None:
+                index = book.get_move(self.x_bits, self.o_bits)
+            if index is None and search is not None:
+                index = search.best_move(mine, theirs, rng)
+            elif index is None:
+                index = best_move(mine, theirs, geometry)
+        if index is None:
+            raise InvalidMoveError('No moves available')
+        return index
 
-        # if a corner is available, take it
-        corner_cells = ((0, 0), (0, 2), (2, 0), (2, 2))
-        for cell in corner_cells:
-            if self.board[cell[0]][cell[1]] is None:
-                ai_logger.debug('Taking a corner cell.')
-                self.board[cell[0]][cell[1]] = player
-                return
+    def __repr__(self):
+        geometry = self.geometry
+        x_bits, o_bits = self.x_bits, self.o_bits
+        columns = geometry.columns
+        rows = [
+            ''.join(CELL_CHARS[x_bits >> index & 1 | (o_bits >> index & 1) << 1]
+                    for index in range(start, start + columns))
+            for start in range(0, geometry.cell_count, columns)
+        ]
+        return 'Board State:\n' + '\n'.join(rows) + '\n\n\n'
 
 
+EDGE_CELLS = tuple(cell_index(*cell) for cell in ((1, 0), (0, 1), (2, 1), (1, 2)))
+CENTER_CELLS = (cell_index(1, 1),)
+CORNER_CELLS = tuple(cell_index(*cell) for cell in ((0, 0), (0, 2), (2, 0), (2, 2)))
 
-        raise InvalidMoveError('No moves available')
 
-    def __repr__(self):
-        ret = 'Board State:\n'
-        for row in self.board:
-            for cell in row:
-                if not cell:
-                    ret += '-'
-                else:
-                    ret += cell.value
-            ret += '\n'
-        ret += '\n\n'
-        return ret
+def _heuristic_move(mine, theirs):
+    """ The original rule-based AI (`Strategy.HEURISTIC`): win or block a
+    row, column or diagonal, otherwise prefer an edge, the center, then a
+    corner. Returns the chosen cell index, or None if the board is full.
+    """
+    empty = ~(mine | theirs)
+
+    def find_gap(masks, attacker, defender):
+        """ Returns the first empty cell of the first line in `masks`
+        which `attacker` is one move away from completing. """
+        for mask in masks:
+            if POPCOUNT[attacker & mask] == 2 and not defender & mask:
+                return lowest_cell(mask & empty)
+        return None
+
+    rules = (
+        ('Found a row to win.', ROW_MASKS, mine, theirs),
+        ('Found a column to win.', COL_MASKS, mine, theirs),
+        ('Found a row to block.', ROW_MASKS, theirs, mine),
+        ('Found a column to block a win.', COL_MASKS, theirs, mine),
+    )
+    for message, masks, attacker, defender in rules:
+        index = find_gap(masks, attacker, defender)
+        if index is not None:
+            ai_logger.debug(message)
+            return index
+
+    # win or block (diagonal)
+    for mask in DIAG_MASKS:
+        index = find_gap((mask,), mine, theirs)
+        if index is None:
+            index = find_gap((mask,), theirs, mine)
+        if index is not None:
+            ai_logger.debug('Found a potential diagonal win or block.')
+            return index
+
+    # if an edge is available, take it, then the center, then a corner
+    preferences = (
+        ('Taking an edge cell.', EDGE_CELLS),
+        ('Taking the center cell.', CENTER_CELLS),
+        ('Taking a corner cell.', CORNER_CELLS),
+    )
+    for message, cells in preferences:
+        for index in cells:
+            if empty >> index & 1:
+                ai_logger.debug(message)
+                return index
+
+    return None
+
+
+def _threat_move(geometry, mine, theirs):
+    """ `Strategy.HEURISTIC` on boards other than 3x3: win if possible,
+    otherwise block, otherwise take the candidate cell with the most
+    promise on the lines through it. Returns the chosen cell index, or
+    None if the board is full.
+    """
+    candidates = geometry.mask_cells(geometry.candidate_cells(mine | theirs))
+    for bits in (mine, theirs):
+        for index in candidates:
+            if geometry.completes_line(bits | 1 << index, index):
+                ai_logger.debug('Found a line to win or block.')
+                return index
+
+    best_index = None
+    best_score = -1
+    for index in candidates:
+        score = 0
+        for mask in geometry.cell_win_masks[index]:
+            if not theirs & mask:
+                # a line we can still complete
+                score += 1 + popcount(mine & mask) ** 2
+            if not mine & mask:
+                # a line they can still complete
+                score += popcount(theirs & mask) ** 2
+        if score > best_score:
+            best_index = index
+            best_score = score
+    return best_index
 
 
 class MultipleWinError(Exception):
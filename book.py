@@ -0,0 +1,184 @@
+"""Module containing the precomputed opening book used by the AI.
+
+Every position reachable from an empty board is solved ahead of time with
+the search engine, and the optimal move and value for each are stored in
+`book.bin`, indexed directly by the base-3 encoding of the position. The
+file is memory-mapped on first use, so a lookup is two byte reads.
+
+Rebuild the book after changing the engine with::
+
+    python book.py
+"""
+import mmap
+import sys
+from pathlib import Path
+
+from bitboard import CELL_COUNT, FULL_MASK, POPCOUNT
+from engine import negamax, best_move, completes_line, transposition_table
+from loggers import ai_logger
+
+BOOK_PATH = Path(__file__).with_name('book.bin')
+
+MAGIC = b'TTTBOOK\x01'
+HEADER_SIZE = len(MAGIC)
+POSITION_COUNT = 3 ** CELL_COUNT
+
+# move byte markers
+TERMINAL = 0xFE
+MISSING = 0xFF
+
+
+def _build_ternary():
+    """ Returns the base-3 weight (the sum of ``3 ** cell``) of every
+    single-player bitboard. """
+    table = [0] * (FULL_MASK + 1)
+    for bits in range(1, FULL_MASK + 1):
+        low = bits & -bits
+        table[bits] = table[bits ^ low] + 3 ** (low.bit_length() - 1)
+    return tuple(table)
+
+
+TERNARY = _build_ternary()
+
+
+def position_index(x_bits, o_bits):
+    """ Returns the base-3 index of a position (0 empty, 1 X, 2 O). """
+    return TERNARY[x_bits] + 2 * TERNARY[o_bits]
+
+
+def position_from_index(index):
+    """ Returns the `(x_bits, o_bits)` of the position at base-3 `index`. """
+    x_bits = o_bits = 0
+    for cell in range(CELL_COUNT):
+        index, digit = divmod(index, 3)
+        if digit == 1:
+            x_bits |= 1 << cell
+        elif digit == 2:
+            o_bits |= 1 << cell
+    return x_bits, o_bits
+
+
+class OpeningBook:
+    """ Read-only view over a book file. The file holds `MAGIC`, then one
+    move byte per position, then one signed value byte per position (the
+    `engine.negamax` value for the side to move).
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        self._values = HEADER_SIZE + POSITION_COUNT
+
+    def get_move(self, x_bits, o_bits):
+        """ Returns the optimal cell index for the side to move, or None if
+        the position is terminal or not in the book.
+        """
+        move = self._buffer[HEADER_SIZE + TERNARY[x_bits] + 2 * TERNARY[o_bits]]
+        if move >= TERMINAL:
+            return None
+        return move
+
+    def get_value(self, x_bits, o_bits):
+        """ Returns the value of the position for the side to move, or None
+        if it is not in the book.
+        """
+        index = position_index(x_bits, o_bits)
+        if self._buffer[HEADER_SIZE + index] == MISSING:
+            return None
+        value = self._buffer[self._values + index]
+        return value - 256 if value > 127 else value
+
+    def arrays(self):
+        """ Returns the move and value bytes of every position as NumPy
+        arrays (uint8 and int8), indexed by `position_index`.
+        """
+        # imported here, as only batch callers need NumPy
+        import numpy as np
+
+        buffer = np.frombuffer(self._buffer, dtype=np.uint8)
+        return buffer[HEADER_SIZE:self._values], buffer[self._values:].view(np.int8)
+
+    def __contains__(self, position):
+        x_bits, o_bits = position
+        return self._buffer[HEADER_SIZE + position_index(x_bits, o_bits)] != MISSING
+
+
+def build():
+    """ Solves every position reachable from the empty board and returns
+    the book file contents.
+    """
+    # start from an empty table so ties are broken the same way every build
+    transposition_table.clear()
+    moves = bytearray([MISSING]) * POSITION_COUNT
+    values = bytearray(POSITION_COUNT)
+
+    def visit(x_bits, o_bits, x_to_move):
+        index = position_index(x_bits, o_bits)
+        if moves[index] != MISSING:
+            return
+        mine, theirs = (x_bits, o_bits) if x_to_move else (o_bits, x_bits)
+        occupied = x_bits | o_bits
+        if _has_won(theirs):
+            moves[index] = TERMINAL
+            values[index] = -(CELL_COUNT - POPCOUNT[occupied] + 1) & 0xFF
+            return
+        if occupied == FULL_MASK:
+            moves[index] = TERMINAL
+            values[index] = 0
+            return
+        values[index] = negamax(mine, theirs) & 0xFF
+        moves[index] = best_move(mine, theirs)
+        for cell in range(CELL_COUNT):
+            if not occupied >> cell & 1:
+                if x_to_move:
+                    visit(x_bits | 1 << cell, o_bits, False)
+                else:
+                    visit(x_bits, o_bits | 1 << cell, True)
+
+    visit(0, 0, True)
+    return MAGIC + bytes(moves) + bytes(values)
+
+
+def _has_won(bits):
+    """ Returns True if `bits` covers any win line. """
+    for cell in range(CELL_COUNT):
+        if bits >> cell & 1 and completes_line(bits, cell):
+            return True
+    return False
+
+
+def load(path=BOOK_PATH):
+    """ Memory-maps the book at `path`. Returns None if the file is missing
+    or not a valid book.
+    """
+    try:
+        with open(path, 'rb') as book_file:
+            buffer = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        ai_logger.warning('Opening book not available: %s', path)
+        return None
+    if len(buffer) != HEADER_SIZE + 2 * POSITION_COUNT or buffer[:HEADER_SIZE] != MAGIC:
+        ai_logger.warning('Ignoring invalid opening book: %s', path)
+        buffer.close()
+        return None
+    return OpeningBook(buffer)
+
+
+_book = None
+_book_loaded = False
+
+
+def get_book():
+    """ Returns the shared `OpeningBook`, loading it on first use, or None
+    if no book file is available.
+    """
+    global _book, _book_loaded
+    if not _book_loaded:
+        _book = load()
+        _book_loaded = True
+    return _book
+
+
+if __name__ == '__main__':
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else BOOK_PATH
+    path.write_bytes(build())
+    print(f'Wrote {path}')
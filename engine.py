@@ -0,0 +1,137 @@
+"""Module containing the perfect-play search engine used by the AI.
+
+Negamax with alpha-beta pruning over the bitboard encoding, for any board
+`Geometry` (the standard 3x3 board by default). A position is described
+from the point of view of the side to move (`mine`/`theirs`), so the same
+table entry serves both X and O. On the 3x3 board entries are stored under
+the canonical (symmetry-reduced) key, so all eight rotations and
+reflections of a position share one entry. Values count the empty squares
+left after the winning move plus one, so quicker wins (and slower losses)
+score higher; a draw is 0.
+
+The search is exhaustive, which is instant on 3x3 but grows quickly with
+the board size; on large boards only `Geometry.candidate_cells` are tried.
+"""
+from bitboard import DEFAULT_GEOMETRY, CELL_COUNT, POPCOUNT, popcount
+from symmetry import PERMUTATIONS, canonical_key
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+INFINITY = 1 << 30
+
+# transposition table for the 3x3 board: canonical key -> (value, bound
+# flag, best move), with the best move given on the canonical board
+transposition_table = {}
+
+# transposition tables for other geometries, keyed on the raw position
+_geometry_tables = {}
+
+
+def completes_line(bits, cell, geometry=DEFAULT_GEOMETRY):
+    """ Returns True if `bits` covers a win line through `cell`. """
+    for mask in geometry.cell_win_masks[cell]:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def _lookup(mine, theirs, geometry, table=None):
+    """ Returns the transposition table for `geometry` (unless `table` is
+    given), the key of the position in it and the permutation taking moves
+    into the key's frame.
+    """
+    if geometry is DEFAULT_GEOMETRY:
+        key, transform = canonical_key(mine, theirs)
+        if table is None:
+            table = transposition_table
+        return table, key, PERMUTATIONS[transform]
+    if table is None:
+        table = _geometry_tables.setdefault(geometry, {})
+    return table, mine | theirs << geometry.cell_count, range(geometry.cell_count)
+
+
+def ordered_moves(mine, theirs, candidates, geometry):
+    """ Returns the `candidates` cells, with cells blocking an immediate win
+    for `theirs` first and the rest in `geometry.move_order`.
+    """
+    blocks = []
+    quiet = []
+    for cell in geometry.move_order:
+        if not candidates >> cell & 1:
+            continue
+        if completes_line(theirs | 1 << cell, cell, geometry):
+            blocks.append(cell)
+        else:
+            quiet.append(cell)
+    return blocks + quiet
+
+
+def negamax(mine, theirs, alpha=-INFINITY, beta=INFINITY, geometry=DEFAULT_GEOMETRY,
+            table=None):
+    """ Returns the game-theoretic value of the position for the side to
+    move, whose marks are `mine`.
+
+    `table` replaces the module's transposition tables; it only needs
+    `get(key)` and item assignment (see `parallel.SharedTable`).
+    """
+    table, key, permutation = _lookup(mine, theirs, geometry, table)
+    entry = table.get(key)
+    if entry is not None:
+        value, flag, _ = entry
+        if flag == EXACT:
+            return value
+        if flag == LOWER and value >= beta:
+            return value
+        if flag == UPPER and value <= alpha:
+            return value
+
+    occupied = mine | theirs
+    if occupied == geometry.full_mask:
+        return 0
+    if geometry is DEFAULT_GEOMETRY:
+        empties = CELL_COUNT - POPCOUNT[occupied]
+    else:
+        empties = geometry.cell_count - popcount(occupied)
+    candidates = geometry.candidate_cells(occupied)
+
+    # an immediate win can't be beaten, so look for one before searching
+    for cell in geometry.move_order:
+        if candidates >> cell & 1 and completes_line(mine | 1 << cell, cell, geometry):
+            table[key] = (empties, EXACT, permutation[cell])
+            return empties
+
+    alpha_orig = alpha
+    best = -INFINITY
+    best_move = None
+    for cell in ordered_moves(mine, theirs, candidates, geometry):
+        value = -negamax(theirs, mine | 1 << cell, -beta, -alpha, geometry, table)
+        if value > best:
+            best = value
+            best_move = cell
+            if best > alpha:
+                alpha = best
+                if alpha >= beta:
+                    break
+
+    if best <= alpha_orig:
+        flag = UPPER
+    elif best >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    table[key] = (best, flag, permutation[best_move])
+    return best
+
+
+def best_move(mine, theirs, geometry=DEFAULT_GEOMETRY, table=None):
+    """ Returns the cell index of an optimal move for the side to move, or
+    None if the board is full.
+    """
+    table, key, permutation = _lookup(mine, theirs, geometry, table)
+    entry = table.get(key)
+    if entry is None or entry[1] != EXACT:
+        negamax(mine, theirs, geometry=geometry, table=table)
+        entry = table.get(key)
+    if entry is None:
+        return None
+    return permutation.index(entry[2])
@@ -0,0 +1,141 @@
+"""Module containing the process-wide cache of AI move choices.
+
+The deterministic strategies (`Strategy.PERFECT` and `Strategy.HEURISTIC`)
+always pick the same move in the same position, so their choices are
+cached by `(geometry, strategy, position key)`, the position key packing
+both sides' bits into one integer (`position_key`). Every `game.Game`
+shares the cache returned by `get_cache`, so a position searched once is
+answered from memory by any later game in the process.
+
+The cache holds at most `maxsize` entries, evicting the least recently
+used, and counts its hits, misses and evictions. It may be used from
+several threads (as the server's executor does): lookups and updates take
+a lock, but the search on a miss runs outside it.
+
+On the 3x3 board the opening book answers `Strategy.PERFECT` faster than
+a lookup, so `Board` doesn't cache it there. `get_state` and `get_winner`
+aren't cached either: they read state kept up to date as moves are
+played.
+
+The size of the shared cache is set with ``$TIC_TAC_CACHE_SIZE`` (when an
+entry point calls `configure_cache`) or `configure_cache(maxsize)`; 0
+turns caching off.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+CACHE_SIZE_VARIABLE = 'TIC_TAC_CACHE_SIZE'
+
+DEFAULT_MAXSIZE = 1 << 16
+
+_MISSING = object()
+
+
+def position_key(geometry, x_bits, o_bits):
+    """ Returns the integer key of the position with `x_bits` and `o_bits`
+    on boards of `geometry`. """
+    return x_bits | o_bits << geometry.cell_count
+
+
+class EvaluationCache:
+    """ Thread-safe mapping bounded to `maxsize` entries, least recently
+    used first out. """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        if maxsize < 0:
+            raise ValueError(f'maxsize must be at least 0, got {maxsize}')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """ Returns the value cached for `key` (marking it recently used),
+        or `default`. """
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """ Caches `value` for `key`, evicting the least recently used
+        entry if the cache is full. """
+        with self._lock:
+            entries = self._entries
+            entries[key] = value
+            entries.move_to_end(key)
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """ Returns the value cached for `key`, or caches and returns
+        `compute()`. Threads missing the same key at once may both compute
+        it. """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            if self.maxsize:
+                self.put(key, value)
+        return value
+
+    def resize(self, maxsize):
+        """ Sets the size bound, evicting entries over it. """
+        if maxsize < 0:
+            raise ValueError(f'maxsize must be at least 0, got {maxsize}')
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """ Drops every entry and resets the statistics. """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """ Returns the hits, misses, evictions, size and size bound as a
+        JSON-able dict. """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+_cache = EvaluationCache()
+
+
+def get_cache():
+    """ Returns the cache shared by the process. """
+    return _cache
+
+
+def configure_cache(maxsize=None):
+    """ Sets the size bound of the shared cache to `maxsize`, or if None,
+    to ``$TIC_TAC_CACHE_SIZE`` when that is set. Returns the cache. """
+    if maxsize is None:
+        value = os.environ.get(CACHE_SIZE_VARIABLE, '').strip()
+        if not value:
+            return _cache
+        maxsize = int(value)
+    _cache.resize(maxsize)
+    return _cache
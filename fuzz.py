@@ -0,0 +1,402 @@
+"""Module containing a differential test harness for alternate board backends.
+
+Positions are checked against the reference `board.Board`, observed only
+through its public API: the state (with `MultipleWinError` reported as
+`INVALID`), the winner, the player to move, and the cells `select_cell`
+accepts (the others raising `InvalidMoveError`). A backend is any function
+taking a `Geometry` and a list of `(x_bits, o_bits)` positions and
+returning an `Observation` of each, with the same codes as `board`
+(`PLAYING` ... `INVALID`, `EMPTY` / `X` / `O`) and the legal moves as a
+cell mask. The built-in `BACKENDS` are:
+
+- ``incremental``: `Board` built cell by cell in a shuffled order, through
+  cleared decoy marks, and read through the integer code getters and
+  `get_legal_moves`,
+- ``naive``: the original board's full scan of every line, on a grid of
+  marks, sharing no code with `Board`,
+- ``batch``: the vectorized `batch.evaluate` (3x3 only).
+
+Other backends are named by import path, as ``module:function``.
+
+The positions are every one reachable in play from the empty board (up to
+`limit`, breadth-first, on large boards), then random layouts of marks,
+most of which no game reaches: wrong mark counts, several winners, spans
+completed on full and part-full boards. They are split into chunks
+checked in worker processes, so a full 3x3 sweep takes seconds.
+
+Usage::
+
+    python fuzz.py --backend batch --backend mymodule:observe --workers 4
+    python fuzz.py --rows 4 --columns 4 --win-length 3 --limit 200000
+
+The exit status is 1 if any backend disagrees with the reference.
+"""
+import argparse
+import importlib
+import random
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import SIZE, DEFAULT_GEOMETRY, get_geometry, iter_cells
+from board import (Board, InvalidMoveError, MultipleWinError, PLAYERS, PLAYER_CODES, STATES,
+                   EMPTY, X, O, PLAYING, FINISHED, CATS_GAME, INVALID)
+from loggers import board_logger
+
+DEFAULT_RANDOM_COUNT = 20000
+DEFAULT_LIMIT = 100000
+DEFAULT_CHUNK_SIZE = 2000
+
+STATE_NAMES = ('Playing', 'Finished', 'Cat\'s Game', 'Invalid')
+
+# state codes of the `BoardState`s
+_STATE_CODES = {state: code for code, state in enumerate(STATES) if state is not None}
+
+Observation = namedtuple('Observation', 'state winner player legal')
+Observation.__doc__ = """ What a backend reports of a position: the state,
+winner and player to move codes, and the mask of the cells that can be
+played. """
+
+Mismatch = namedtuple('Mismatch', 'backend position field expected actual')
+Mismatch.__doc__ = """ A field of the `Observation` of `position` (as
+`(x_bits, o_bits)`) on which `backend` disagrees with the reference. """
+
+
+def reference(geometry, positions):
+    """ Observes each position on a `Board` written through its rows, with
+    the public (enum) API. """
+    observations = []
+    for x_bits, o_bits in positions:
+        board = Board(geometry.rows, geometry.columns, geometry.win_length)
+        rows = board.board
+        for bits, player in ((x_bits, PLAYERS[X]), (o_bits, PLAYERS[O])):
+            for cell in iter_cells(bits):
+                row, column = geometry.cell_coords(cell)
+                rows[row][column] = player
+        try:
+            state = _STATE_CODES[board.get_state()]
+        except MultipleWinError:
+            state = INVALID
+        legal = 0
+        for cell in range(geometry.cell_count):
+            try:
+                board.copy().select_cell(*geometry.cell_coords(cell))
+            except InvalidMoveError:
+                continue
+            legal |= 1 << cell
+        observations.append(Observation(
+            state,
+            PLAYER_CODES[board.get_winner()],
+            PLAYER_CODES[board.get_current_player()],
+            legal,
+        ))
+    return observations
+
+
+def observe_incremental(geometry, positions):
+    """ Observes each position on a `Board` whose cells are set in a
+    shuffled order, after marking and clearing the empty ones, through the
+    integer code getters. """
+    observations = []
+    cell_index = geometry.cell_index
+    for x_bits, o_bits in positions:
+        rng = random.Random(x_bits << geometry.cell_count | o_bits)
+        cells = [(cell, X) for cell in iter_cells(x_bits)]
+        cells += [(cell, O) for cell in iter_cells(o_bits)]
+        empty = geometry.full_mask & ~(x_bits | o_bits)
+        decoys = [cell for cell in iter_cells(empty) if rng.random() < 0.5]
+        cells += [(cell, rng.choice((X, O))) for cell in decoys]
+        rng.shuffle(cells)
+        cells += [(cell, EMPTY) for cell in decoys]
+
+        board = Board(geometry.rows, geometry.columns, geometry.win_length)
+        rows = board.board
+        for cell, code in cells:
+            row, column = geometry.cell_coords(cell)
+            rows[row][column] = PLAYERS[code]
+        legal = 0
+        for row, column in board.get_legal_moves():
+            legal |= 1 << cell_index(row, column)
+        observations.append(Observation(
+            board.get_state_code(),
+            board.get_winner_code(),
+            board.get_current_player_code(),
+            legal,
+        ))
+    return observations
+
+
+def _naive_spans(rows, columns, length):
+    """ Returns the win lines of a board as tuples of `(row, column)`, in
+    the order the original board scanned them: rows and columns
+    interleaved, then the diagonals. """
+    spans = []
+    for i in range(max(rows, columns)):
+        if i < rows:
+            for start in range(columns - length + 1):
+                spans.append(tuple((i, start + j) for j in range(length)))
+        if i < columns:
+            for start in range(rows - length + 1):
+                spans.append(tuple((start + j, i) for j in range(length)))
+    for row in range(rows - length + 1):
+        for column in range(columns - length + 1):
+            spans.append(tuple((row + j, column + j) for j in range(length)))
+    for row in range(rows - length + 1):
+        for column in range(length - 1, columns):
+            spans.append(tuple((row + j, column - j) for j in range(length)))
+    return spans
+
+
+def observe_naive(geometry, positions):
+    """ Observes each position as the original board did, on a grid of
+    marks and with no `bitboard` or `Board` code: a Cat's Game when every
+    line holds both marks, otherwise a win if exactly one line is complete
+    and invalid (`MultipleWinError`) if several are, however they were
+    made. The winner is the owner of the first complete line. """
+    rows, columns = geometry.rows, geometry.columns
+    spans = _naive_spans(rows, columns, geometry.win_length)
+    observations = []
+    for x_bits, o_bits in positions:
+        grid = [[EMPTY] * columns for _ in range(rows)]
+        legal = 0
+        for row in range(rows):
+            for column in range(columns):
+                bit = 1 << row * columns + column
+                if x_bits & bit:
+                    grid[row][column] = X
+                elif o_bits & bit:
+                    grid[row][column] = O
+                else:
+                    legal |= bit
+
+        clear_span_found = False
+        win_count = 0
+        winner = EMPTY
+        for span in spans:
+            marks = [grid[row][column] for row, column in span]
+            if X not in marks or O not in marks:
+                clear_span_found = True
+            if marks.count(X) == len(marks) or marks.count(O) == len(marks):
+                win_count += 1
+                if winner == EMPTY:
+                    winner = marks[0]
+
+        if not clear_span_found:
+            state = CATS_GAME
+        elif win_count == 1:
+            state = FINISHED
+        elif win_count > 1:
+            state = INVALID
+        else:
+            state = PLAYING
+        x_count = sum(row.count(X) for row in grid)
+        o_count = sum(row.count(O) for row in grid)
+        observations.append(Observation(state, winner, O if x_count > o_count else X, legal))
+    return observations
+
+
+def observe_batch(geometry, positions):
+    """ Observes the positions with one `batch.evaluate` call. """
+    # imported here, so that importing this module doesn't need NumPy
+    import batch
+
+    if geometry is not DEFAULT_GEOMETRY:
+        raise ValueError('The batch backend only evaluates 3x3 boards')
+    codes = batch.np.zeros((len(positions), geometry.cell_count), dtype=batch.np.int8)
+    for row, (x_bits, o_bits) in zip(codes, positions):
+        row[list(iter_cells(x_bits))] = X
+        row[list(iter_cells(o_bits))] = O
+    evaluation = batch.evaluate(codes)
+    weights = [1 << cell for cell in range(geometry.cell_count)]
+    return [
+        Observation(state, winner, player, sum(w for w, empty in zip(weights, legal) if empty))
+        for state, winner, player, legal in zip(
+            evaluation.state.tolist(), evaluation.winner.tolist(),
+            evaluation.current_player.tolist(), evaluation.legal_moves.tolist())
+    ]
+
+
+BACKENDS = {
+    'incremental': observe_incremental,
+    'naive': observe_naive,
+    'batch': observe_batch,
+}
+
+
+def get_backend(name):
+    """ Returns the backend named `name`: a key of `BACKENDS`, or a
+    ``module:function`` import path. """
+    backend = BACKENDS.get(name)
+    if backend is not None:
+        return backend
+    module_name, _, function_name = name.partition(':')
+    if not function_name:
+        raise ValueError(f'Unknown backend {name!r} (expected one of {", ".join(BACKENDS)}, '
+                         'or module:function)')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def reachable_positions(geometry, limit=None):
+    """ Returns up to `limit` positions reachable in play from the empty
+    board, breadth-first, play stopping when a game is over. """
+    start = Board(geometry.rows, geometry.columns, geometry.win_length)
+    seen = {(0, 0)}
+    positions = [(0, 0)]
+    boards = deque([start])
+    while boards and (limit is None or len(positions) < limit):
+        board = boards.popleft()
+        if board.get_state_code() != PLAYING:
+            continue
+        for row, column in board.get_legal_moves():
+            child = board.copy()
+            child.select_cell(row, column)
+            position = child.x_bits, child.o_bits
+            if position not in seen:
+                seen.add(position)
+                positions.append(position)
+                boards.append(child)
+                if limit is not None and len(positions) >= limit:
+                    break
+    return positions
+
+
+def random_positions(geometry, count, rng):
+    """ Returns `count` random layouts of marks, each with its own density
+    and share of Xs, so that sparse, full and lopsided boards all occur. """
+    positions = []
+    for _ in range(count):
+        density = rng.random()
+        x_share = rng.random()
+        x_bits = o_bits = 0
+        for cell in range(geometry.cell_count):
+            if rng.random() < density:
+                if rng.random() < x_share:
+                    x_bits |= 1 << cell
+                else:
+                    o_bits |= 1 << cell
+        positions.append((x_bits, o_bits))
+    return positions
+
+
+def check_chunk(shape, backend_names, positions):
+    """ Returns the `Mismatch`es of the named backends against the
+    reference on `positions`, boards of `shape` (rows, columns, win
+    length). """
+    geometry = get_geometry(*shape)
+    # the reference logs every occupied cell it tries
+    disabled = board_logger.disabled
+    board_logger.disabled = True
+    try:
+        expected = reference(geometry, positions)
+    finally:
+        board_logger.disabled = disabled
+
+    mismatches = []
+    for name in backend_names:
+        observations = get_backend(name)(geometry, positions)
+        if len(observations) != len(positions):
+            raise ValueError(f'Backend {name} returned {len(observations)} observations '
+                             f'for {len(positions)} positions')
+        for position, reference_observation, observation in zip(
+                positions, expected, observations):
+            if observation == reference_observation:
+                continue
+            for field, wanted, actual in zip(
+                    Observation._fields, reference_observation, observation):
+                if wanted != actual:
+                    mismatches.append(Mismatch(name, position, field, wanted, actual))
+    return mismatches
+
+
+def run(backend_names, rows=SIZE, columns=SIZE, win_length=SIZE,
+        random_count=DEFAULT_RANDOM_COUNT, limit=DEFAULT_LIMIT, seed=0, workers=None,
+        chunk_size=DEFAULT_CHUNK_SIZE):
+    """ Checks the named backends against the reference on the reachable
+    positions (up to `limit`) and `random_count` random ones drawn with
+    `seed`. Returns `(number of positions, mismatches)`.
+
+    `workers` is the number of worker processes (defaulting to the number
+    of CPUs); with `workers=1` every chunk is checked in this process.
+    """
+    for name in backend_names:
+        # fail fast on unknown names, rather than in every worker
+        get_backend(name)
+    geometry = get_geometry(rows, columns, win_length)
+    positions = reachable_positions(geometry, limit)
+    positions += random_positions(geometry, random_count, random.Random(seed))
+
+    shape = rows, columns, win_length
+    chunks = [positions[start:start + chunk_size]
+              for start in range(0, len(positions), chunk_size)]
+    shapes = [shape] * len(chunks)
+    names = [list(backend_names)] * len(chunks)
+    if workers == 1:
+        results = map(check_chunk, shapes, names, chunks)
+        return len(positions), [mismatch for result in results for mismatch in result]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(check_chunk, shapes, names, chunks)
+        return len(positions), [mismatch for result in results for mismatch in result]
+
+
+def format_position(geometry, x_bits, o_bits):
+    """ Returns the position as rows of ``X``/``O``/``-``, joined by ``/``. """
+    cells = ''.join('X' if x_bits >> cell & 1 else 'O' if o_bits >> cell & 1 else '-'
+                    for cell in range(geometry.cell_count))
+    columns = geometry.columns
+    return '/'.join(cells[start:start + columns] for start in range(0, len(cells), columns))
+
+
+def format_value(field, value, geometry):
+    """ Returns an `Observation` field's value as text. """
+    if field == 'state':
+        return STATE_NAMES[value] if 0 <= value < len(STATE_NAMES) else repr(value)
+    if field == 'legal':
+        return ' '.join('%d,%d' % geometry.cell_coords(cell) for cell in iter_cells(value))
+    return '-XO'[value] if value in (EMPTY, X, O) else repr(value)
+
+
+def main(argv=None):
+    """ Command line entry point. """
+    parser = argparse.ArgumentParser(
+        description='Check board backends against the reference Board.')
+    parser.add_argument('-b', '--backend', action='append',
+                        help=f'backend to check: {", ".join(BACKENDS)} or module:function '
+                             '(may be repeated; default: all built-in backends that apply)')
+    parser.add_argument('--rows', type=int, default=SIZE)
+    parser.add_argument('--columns', type=int, default=SIZE)
+    parser.add_argument('--win-length', type=int, default=SIZE)
+    parser.add_argument('-n', '--random', type=int, default=DEFAULT_RANDOM_COUNT,
+                        help='random positions to add (default: %(default)s)')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help='most reachable positions to walk (default: %(default)s)')
+    parser.add_argument('-w', '--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--show', type=int, default=20,
+                        help='mismatches to print (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    geometry = get_geometry(args.rows, args.columns, args.win_length)
+    backends = args.backend
+    if not backends:
+        backends = [name for name in BACKENDS
+                    if name != 'batch' or geometry is DEFAULT_GEOMETRY]
+
+    start = time.perf_counter()
+    count, mismatches = run(backends, args.rows, args.columns, args.win_length, args.random,
+                            args.limit, args.seed, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    print(f'{count} positions x {len(backends)} backends ({", ".join(backends)}) '
+          f'in {elapsed:.2f}s: {len(mismatches)} mismatches')
+    for mismatch in mismatches[:args.show]:
+        expected = format_value(mismatch.field, mismatch.expected, geometry)
+        actual = format_value(mismatch.field, mismatch.actual, geometry)
+        print(f'  {mismatch.backend}: {format_position(geometry, *mismatch.position)} '
+              f'{mismatch.field}: expected {expected}, got {actual}')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,12 @@
 """Module orchestrating game flow, including AI and stats."""
+import random
 from enum import Enum
 
 from loggers import game_logger
-from board import Board
+from bitboard import SIZE, DEFAULT_GEOMETRY
+from board import Board, Strategy, X, O, FINISHED, CATS_GAME, INVALID
+from evalcache import get_cache, configure_cache
+from mcts import MonteCarloTree
 
 class GameOutcome(Enum):
     WIN = 'Win'
@@ -11,18 +15,156 @@ class GameOutcome(Enum):
 
 
 class Game:
-    def __init__(self, ai=True):
+    __slots__ = ('board', 'ai', 'searches', 'outcomes', 'records', 'strategies', 'cache')
+
+    def __init__(self, ai=True, rows=SIZE, columns=SIZE, win_length=SIZE, records=None,
+                 cache=None):
         game_logger.debug('Initializing new game')
-        self.board = Board()
+        self.board = Board(rows, columns, win_length)
         self.ai = ai
+        # per-strategy searches passed to `Board.make_best_move`; the MCTS
+        # tree is kept across the moves of a game
+        self.searches = {Strategy.MCTS: MonteCarloTree(self.board.geometry)}
         self.outcomes = {
             GameOutcome.WIN: 0,
             GameOutcome.LOSE: 0,
             GameOutcome.CATS_GAME: 0,
         }
+        # finished games are passed to `records.append_board` (see
+        # `records.RecordWriter`), with the strategy X and O last used
+        # (None for a human)
+        self.records = records
+        self.strategies = [None, None]
+        # the `evalcache.EvaluationCache` of AI choices, by default the one
+        # shared by every game in the process
+        self.cache = get_cache() if cache is None else cache
 
     def new_game(self, ai=True):
-        self.board = Board()
+        geometry = self.board.geometry
+        self.board = Board(geometry.rows, geometry.columns, geometry.win_length)
+        for search in self.searches.values():
+            search.reset()
+        self.strategies = [None, None]
+
+    def make_best_move(self, strategy=Strategy.PERFECT, rng=random):
+        """ Plays a move for the current player, chosen by `strategy`, with
+        the game's search for that strategy (see `self.searches`) and its
+        `self.cache`.
+        """
+        self.strategies[self.board.get_current_player_code() == O] = strategy
+        self.board.make_best_move(strategy, rng, self.searches.get(strategy), self.cache)
 
     def get_state(self):
         return self.board.get_state()
+
+    def record_outcome(self):
+        """ Tallies the finished game in `self.outcomes`, from the point of
+        view of X (the human player in the UI), and records it in
+        `self.records` (3x3 games only). Returns the `GameOutcome`, or None
+        if the game is still being played.
+        """
+        state = self.board.get_state_code()
+        if state == CATS_GAME:
+            outcome = GameOutcome.CATS_GAME
+        elif state == FINISHED:
+            if self.board.get_winner_code() == X:
+                outcome = GameOutcome.WIN
+            else:
+                outcome = GameOutcome.LOSE
+        else:
+            if state == INVALID:
+                # raises MultipleWinError
+                self.board.get_state()
+            return None
+        game_logger.info('Game over: %s', outcome.value)
+        self.outcomes[outcome] += 1
+        if self.records is not None and self.board.geometry is DEFAULT_GEOMETRY:
+            self.records.append_board(self.board, *self.strategies)
+        return outcome
+
+
+# the searches of a `BackgroundAI` worker process, by board shape and
+# strategy, so an MCTS tree is reused across the moves of a game
+_worker_searches = {}
+
+
+def _background_move(shape, cells, strategy):
+    """ Returns the `(row, column)` `strategy` picks on a board of `shape`
+    holding the `(row, column, player)` marks in `cells`.
+    """
+    board = Board(*shape)
+    for row, column, player in cells:
+        board.board[row][column] = player
+    search = None
+    if strategy is Strategy.MCTS:
+        search = _worker_searches.get((shape, strategy))
+        if search is None:
+            search = _worker_searches[shape, strategy] = MonteCarloTree(board.geometry)
+    return board.get_best_move(strategy, search=search, cache=get_cache())
+
+
+class BackgroundAI:
+    """ Picks AI moves with `strategy` in a separate worker process, so that
+    a slow search never blocks an asyncio event loop (such as the UI's)
+    and can be abandoned at any time.
+    """
+
+    def __init__(self, strategy=Strategy.PERFECT):
+        self.strategy = strategy
+        self._pool = None
+
+    def start(self):
+        """ Starts the worker process ahead of the first move. """
+        if self._pool is None:
+            # imported here, so that importing this module stays cheap
+            import multiprocessing
+            # the worker keeps its own cache (sized from the environment)
+            # across the moves of every game
+            self._pool = multiprocessing.get_context('spawn').Pool(1, configure_cache)
+
+    async def get_move(self, board):
+        """ Returns the `(row, column)` of the AI's move on `board`, or None
+        if the game is over. Cancelling the call kills the search.
+        """
+        import asyncio
+
+        geometry = board.geometry
+        shape = geometry.rows, geometry.columns, geometry.win_length
+        cells = [
+            (row, column, player)
+            for row, board_row in enumerate(board.board)
+            for column, player in enumerate(board_row)
+            if player is not None
+        ]
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(setter, value):
+            if not future.done():
+                setter(value)
+
+        def on_result(move):
+            loop.call_soon_threadsafe(resolve, future.set_result, move)
+
+        def on_error(error):
+            loop.call_soon_threadsafe(resolve, future.set_exception, error)
+
+        self._pool.apply_async(
+            _background_move, (shape, cells, self.strategy),
+            callback=on_result, error_callback=on_error,
+        )
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+    def cancel(self):
+        """ Kills any search in progress (the next move starts a fresh
+        worker process). """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    close = cancel
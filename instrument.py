@@ -0,0 +1,280 @@
+"""Module containing opt-in instrumentation of moves and searches.
+
+Nothing is measured until `enable` is called (or ``$TIC_TAC_INSTRUMENT`` is
+set when an entry point calls `configure_instrumentation`). Enabling wraps
+`Board.select_cell`, `Board.make_best_move` and `Board.get_best_move`
+(which the server uses), the state evaluation behind them,
+`engine.negamax` (and the table it probes) and the MCTS iterations;
+`disable` puts the originals back, so a disabled build runs exactly the
+uninstrumented code.
+
+While enabled, `stats` returns:
+
+- ``counters``: totals of ``nodes`` (negamax calls and MCTS playouts),
+  ``tt_hits`` / ``tt_misses`` (transposition table probes) and
+  ``evaluations`` (state updates),
+- ``last_move``: the same counters, and the time taken, for the latest
+  `make_best_move` or `get_best_move`,
+- ``latency``: a `Histogram` summary per timed operation (``best_move``
+  for both AI move calls).
+
+`start_dump` also writes them as a JSON line every few seconds. Searches
+run in other processes (`parallel`, `game.BackgroundAI`) aren't counted,
+and counts from threads updating at once may be slightly low.
+"""
+import json
+import os
+import threading
+import time
+
+INSTRUMENT_VARIABLE = 'TIC_TAC_INSTRUMENT'
+
+COUNTERS = ('nodes', 'tt_hits', 'tt_misses', 'evaluations')
+
+# bucket i of a histogram counts durations below 2 ** i microseconds
+HISTOGRAM_BUCKETS = 32
+
+enabled = False
+
+counters = dict.fromkeys(COUNTERS, 0)
+last_move = {}
+latencies = {}
+
+_originals = []
+_dumper = None
+
+
+class Histogram:
+    """ Counts durations in power-of-two buckets of microseconds. """
+    __slots__ = ('buckets', 'count', 'total', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = 0.0
+
+    def record(self, seconds):
+        """ Adds a duration, in seconds. """
+        bucket = min(int(seconds * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if self.minimum is None or seconds < self.minimum:
+            self.minimum = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def percentile(self, fraction):
+        """ Returns the upper bound, in seconds, of the bucket holding the
+        `fraction` (0 to 1) quantile, or None if nothing was recorded. """
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min((1 << bucket) / 1e6, self.maximum)
+        return self.maximum
+
+    def summary(self):
+        """ Returns the count, mean, extremes and main percentiles (in
+        seconds), and the non-empty buckets by upper bound in µs. """
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.minimum,
+            'max': self.maximum if self.count else None,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            'buckets': {1 << bucket: count
+                        for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+def record_latency(name, seconds):
+    """ Adds a duration to the `name` histogram (if enabled), for timings
+    taken outside the wrapped calls, such as a background search. """
+    if enabled:
+        histogram = latencies.get(name)
+        if histogram is None:
+            histogram = latencies[name] = Histogram()
+        histogram.record(seconds)
+        if name == 'search':
+            last_move['seconds'] = seconds
+
+
+class _CountingTable:
+    """ A transposition table wrapper counting hits and misses. """
+    __slots__ = ('table',)
+
+    def __init__(self, table):
+        self.table = table
+
+    def get(self, key):
+        entry = self.table.get(key)
+        counters['tt_misses' if entry is None else 'tt_hits'] += 1
+        return entry
+
+    def __setitem__(self, key, entry):
+        self.table[key] = entry
+
+
+def _patch(owner, name, make_wrapper):
+    original = getattr(owner, name)
+    _originals.append((owner, name, original))
+    setattr(owner, name, make_wrapper(original))
+
+
+def _timed(name):
+    histogram = latencies.setdefault(name, Histogram())
+
+    def wrap(function):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.record(time.perf_counter() - start)
+        return timed
+    return wrap
+
+
+def _per_move(function):
+    histogram = latencies.setdefault('best_move', Histogram())
+
+    def best_move(*args, **kwargs):
+        before = dict(counters)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            histogram.record(seconds)
+            last_move.clear()
+            last_move.update(
+                (name, counters[name] - before[name]) for name in COUNTERS
+            )
+            last_move['seconds'] = seconds
+    return best_move
+
+
+def _counted(counter):
+    def wrap(function):
+        def counted(*args, **kwargs):
+            counters[counter] += 1
+            return function(*args, **kwargs)
+        return counted
+    return wrap
+
+
+def _counting_lookup(function):
+    def lookup(*args, **kwargs):
+        table, key, permutation = function(*args, **kwargs)
+        if not isinstance(table, _CountingTable):
+            table = _CountingTable(table)
+        return table, key, permutation
+    return lookup
+
+
+def enable():
+    """ Starts counting and timing (does nothing if already enabled). """
+    global enabled
+    if enabled:
+        return
+    # imported here, so that importing this module stays cheap
+    import engine
+    from board import Board
+    from mcts import MonteCarloTree
+
+    _patch(Board, 'select_cell', _timed('select_cell'))
+    _patch(Board, 'make_best_move', _per_move)
+    _patch(Board, 'get_best_move', _per_move)
+    _patch(Board, '_update_state', _counted('evaluations'))
+    # the search recurses through these module globals, so every node and
+    # table probe goes through the wrappers
+    _patch(engine, 'negamax', _counted('nodes'))
+    _patch(engine, '_lookup', _counting_lookup)
+    _patch(MonteCarloTree, '_iterate', _counted('nodes'))
+    enabled = True
+
+
+def disable():
+    """ Restores the uninstrumented code; the stats gathered are kept. """
+    global enabled
+    while _originals:
+        owner, name, original = _originals.pop()
+        setattr(owner, name, original)
+    enabled = False
+
+
+def reset():
+    """ Zeroes the counters and empties the histograms. """
+    for name in COUNTERS:
+        counters[name] = 0
+    last_move.clear()
+    for histogram in latencies.values():
+        histogram.__init__()
+
+
+def stats():
+    """ Returns a JSON-able snapshot of the counters and latencies. """
+    return {
+        'enabled': enabled,
+        'counters': dict(counters),
+        'last_move': dict(last_move),
+        'latency': {name: histogram.summary() for name, histogram in latencies.items()},
+    }
+
+
+def start_dump(interval, path=None):
+    """ Appends `stats()` as a JSON line to the file at `path` (or logs it
+    to the ``game`` logger at INFO) every `interval` seconds, from a daemon
+    thread, until `stop_dump`. """
+    global _dumper
+    stop_dump()
+    stop = threading.Event()
+
+    def dump():
+        while not stop.wait(interval):
+            line = json.dumps(stats())
+            if path is None:
+                from loggers import game_logger
+                game_logger.info('Stats: %s', line)
+            else:
+                with open(path, 'a', encoding='utf8') as f:
+                    f.write(line + '\n')
+
+    thread = threading.Thread(target=dump, name='instrument-dump', daemon=True)
+    thread.start()
+    _dumper = thread, stop
+
+
+def stop_dump():
+    """ Stops the periodic dump, if running. """
+    global _dumper
+    if _dumper is not None:
+        thread, stop = _dumper
+        stop.set()
+        thread.join()
+        _dumper = None
+
+
+def configure_instrumentation():
+    """ Enables instrumentation if ``$TIC_TAC_INSTRUMENT`` is set: to 1 (or
+    any value that isn't a number), or to a number of seconds between
+    stats dumps to the ``game`` logger. Returns whether it is enabled. """
+    value = os.environ.get(INSTRUMENT_VARIABLE, '').strip()
+    if value in ('', '0'):
+        return enabled
+    enable()
+    try:
+        interval = float(value)
+    except ValueError:
+        interval = None
+    if interval and value != '1':
+        start_dump(interval)
+    return enabled
@@ -0,0 +1,97 @@
+"""Module containing a load test for the game server (`server.py`).
+
+Opens `--clients` connections, each playing `--games` games in a row with
+random legal moves, and reports the move throughput and the latency
+percentiles of the move requests (each includes the AI's reply).
+
+Usage::
+
+    python loadtest.py --clients 200 --games 20            # against a local server
+    python loadtest.py --clients 200 --games 20 --spawn    # start one in-process
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from server import DEFAULT_HOST, DEFAULT_PORT, GameServer, Client
+
+
+def percentile(sorted_values, fraction):
+    """ Returns the value at `fraction` (0-1) of a sorted list. """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def play_games(host, port, games, strategy, rng, latencies):
+    """ Plays `games` games over one connection, appending the latency of
+    every move request to `latencies`. """
+    client = await Client.connect(host, port)
+    try:
+        for _ in range(games):
+            response = await client.request(op='new', strategy=strategy)
+            session = response['session']
+            while response['state'] == 'Playing':
+                empty = [(row, column) for row, cells in enumerate(response['board'])
+                         for column, cell in enumerate(cells) if cell == '-']
+                row, column = rng.choice(empty)
+                start = time.perf_counter()
+                response = await client.request(op='move', session=session,
+                                                row=row, column=column)
+                latencies.append(time.perf_counter() - start)
+                if not response['ok']:
+                    raise RuntimeError(response['error'])
+            await client.request(op='close', session=session)
+    finally:
+        await client.close()
+
+
+async def run(clients, games, strategy, host, port, spawn, workers, seed):
+    """ Runs the load test and returns `(moves, elapsed, latencies)`. """
+    server = None
+    if spawn:
+        server = GameServer(workers)
+        host, port = await server.start(host, 0)
+    latencies = []
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            play_games(host, port, games, strategy, random.Random(f'{seed}:{client}'), latencies)
+            for client in range(clients)
+        ))
+    finally:
+        if server is not None:
+            await server.close()
+    return len(latencies), time.perf_counter() - start, sorted(latencies)
+
+
+def main(argv=None):
+    """ Command line entry point. """
+    parser = argparse.ArgumentParser(description='Load test the game server.')
+    parser.add_argument('-c', '--clients', type=int, default=100)
+    parser.add_argument('-n', '--games', type=int, default=10, help='games per client')
+    parser.add_argument('-s', '--strategy', default='perfect', help='AI strategy')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--spawn', action='store_true',
+                        help='run a server in this process, on a free port')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='AI threads of a spawned server')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    moves, elapsed, latencies = asyncio.run(run(
+        args.clients, args.games, args.strategy, args.host, args.port,
+        args.spawn, args.workers, args.seed,
+    ))
+    print(f'{args.clients} clients x {args.games} games: {moves} moves in {elapsed:.2f}s '
+          f'({moves / elapsed:.0f} moves/s)')
+    print(f'latency p50 {percentile(latencies, 0.5) * 1000:.2f}ms  '
+          f'p99 {percentile(latencies, 0.99) * 1000:.2f}ms  '
+          f'max {percentile(latencies, 1.0) * 1000:.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,89 @@
-"""Module containing logging config for multiple loggers"""
-import logging.config
+"""Module containing logging config for multiple loggers
 
-import yaml
+Logging runs in production mode unless asked otherwise: the `board`,
+`game` and `ai` loggers only pass warnings and errors, so the debug calls
+on the board's hot paths cost a single (cached) `isEnabledFor` check. Set
+the ``TIC_TAC_LOG_LEVEL`` environment variable (e.g. to ``DEBUG``) or call
+`configure_logging` with a level to trace play.
 
+Importing this module has no side effects beyond setting those levels:
+the YAML config (`logging.yaml`, next to this module) is only read, and log
+files only opened, when an entry point calls `configure_logging`. Each
+logger's file handlers then sit behind a `QueueHandler`, and a
+`QueueListener` thread does the formatting and disk writes.
+"""
+import logging
+import os
+from pathlib import Path
 
-with open('logging.yaml', 'rt', encoding="utf8") as f:
-    config = yaml.safe_load(f.read())
+LOG_LEVEL_VARIABLE = 'TIC_TAC_LOG_LEVEL'
+DEFAULT_LOG_LEVEL = 'WARNING'
+
+LOGGER_NAMES = ('board', 'game', 'ai')
+
+CONFIG_PATH = Path(__file__).with_name('logging.yaml')
+
+_listeners = []
+
+
+def shutdown_logging():
+    """ Flushes and stops the queue listeners started by `configure_logging`. """
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def _get_level(level=None):
+    """ Returns `level` (or ``$TIC_TAC_LOG_LEVEL``, or WARNING) as a level
+    name. """
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_VARIABLE, DEFAULT_LOG_LEVEL)
+    return logging.getLevelName(level) if isinstance(level, int) else level.upper()
+
+
+def configure_logging(level=None, path=CONFIG_PATH):
+    """ Applies the logging config at `path`, with every logger set to
+    `level` (defaulting to ``$TIC_TAC_LOG_LEVEL``, or WARNING), and moves
+    the loggers' handlers onto background queue listeners.
+    """
+    # imported here, so that importing this module stays cheap
+    import atexit
+    import logging.config
+    import logging.handlers
+    import queue
+
+    import yaml
+
+    level = _get_level(level)
+
+    with open(path, 'rt', encoding="utf8") as f:
+        config = yaml.safe_load(f.read())
+    for logger_config in config.get('loggers', {}).values():
+        logger_config['level'] = level
+    config.setdefault('root', {})['level'] = level
+
+    shutdown_logging()
     logging.config.dictConfig(config)
+    atexit.unregister(shutdown_logging)
+    atexit.register(shutdown_logging)
+
+    for name in LOGGER_NAMES:
+        logger = logging.getLogger(name)
+        handlers = logger.handlers[:]
+        if not handlers:
+            continue
+        records = queue.SimpleQueue()
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        listener = logging.handlers.QueueListener(
+            records, *handlers, respect_handler_level=True
+        )
+        listener.start()
+        _listeners.append(listener)
+
+
+for _name in LOGGER_NAMES:
+    logging.getLogger(_name).setLevel(_get_level())
 
 board_logger = logging.getLogger('board')
 game_logger = logging.getLogger('game')
@@ -0,0 +1,208 @@
+"""Module containing a Monte Carlo Tree Search (UCT) player for large boards.
+
+Exhaustive search (`engine`) is instant on 3x3 but hopeless on boards like
+15x15. `MonteCarloTree` instead grows a search tree one node per playout,
+choosing which branch to explore by the UCT formula and scoring new nodes
+with a random playout on the bitboards, until its budget (a number of
+playouts and/or a wall-clock limit) runs out. The most visited move wins.
+
+Nodes use `__slots__` and store only the move leading to them, so the
+position is rebuilt on the way down. A tree is kept between calls: when
+asked about a later position of the same game, the matching subtree
+becomes the new root and its statistics are kept.
+"""
+import math
+import random
+import time
+from logging import DEBUG
+
+from bitboard import DEFAULT_GEOMETRY
+from loggers import ai_logger
+
+DEFAULT_ITERATIONS = 2000
+
+# UCT exploration constant
+EXPLORATION = math.sqrt(2)
+
+WIN, DRAW, LOSS = 1.0, 0.5, 0.0
+
+
+class _Node:
+    """ A search tree node: the position after `move`, as seen by the
+    player who made it. `wins` sums that player's playout results.
+    """
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins', 'result')
+
+    def __init__(self, move, parent, untried, result=None):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        # the game's result for the mover if `move` ended it, else None
+        self.result = result
+
+
+class MonteCarloTree:
+    """ A UCT search over one board `geometry`, reused across the moves of a
+    game. Each `best_move` call runs until `iterations` playouts are done
+    or `time_limit` seconds have passed, whichever comes first (either may
+    be None, but not both).
+    """
+    __slots__ = ('geometry', 'iterations', 'time_limit', 'root', 'root_position')
+
+    def __init__(self, geometry=DEFAULT_GEOMETRY, iterations=DEFAULT_ITERATIONS,
+                 time_limit=None):
+        if iterations is None and time_limit is None:
+            raise ValueError('MonteCarloTree needs an iteration or time budget')
+        self.geometry = geometry
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.root = None
+        # the root position, from the point of view of the side to move
+        self.root_position = None
+
+    def reset(self):
+        """ Forgets the search tree. """
+        self.root = None
+        self.root_position = None
+
+    def _new_node(self, move, parent, mover, waiting, rng):
+        """ Returns a node for the position reached by `move`, where `mover`
+        (including `move`) and `waiting` are the two sides' marks.
+        """
+        geometry = self.geometry
+        occupied = mover | waiting
+        if move is not None and geometry.completes_line(mover, move):
+            return _Node(move, parent, [], WIN)
+        if occupied == geometry.full_mask:
+            return _Node(move, parent, [], DRAW)
+        untried = list(geometry.mask_cells(geometry.candidate_cells(occupied)))
+        rng.shuffle(untried)
+        return _Node(move, parent, untried)
+
+    def _find_root(self, mine, theirs):
+        """ Returns the node of the tree for the position (`mine` to move),
+        if the tree was grown from an earlier position of the same game.
+        """
+        if self.root_position is None:
+            return None
+        root_mine, root_theirs = self.root_position
+        if root_mine & ~(mine | theirs) or root_theirs & ~(mine | theirs):
+            return None
+        added = (mine | theirs) & ~(root_mine | root_theirs)
+        # after an even number of moves the same side is to move again
+        if bin(added).count('1') % 2:
+            to_move, waiting = theirs & ~root_mine, mine & ~root_theirs
+        else:
+            to_move, waiting = mine & ~root_mine, theirs & ~root_theirs
+        if to_move & ~added or waiting & ~added:
+            return None
+
+        node = self.root
+        while to_move:
+            for child in node.children:
+                if to_move >> child.move & 1:
+                    break
+            else:
+                return None
+            node = child
+            to_move, waiting = waiting, to_move & ~(1 << child.move)
+        return None if waiting else node
+
+    def _playout(self, mine, theirs, rng):
+        """ Plays random moves from the position (`mine` to move) to the
+        end, and returns the result for the side to move.
+        """
+        completes_line = self.geometry.completes_line
+        empty = list(self.geometry.mask_cells(self.geometry.full_mask & ~(mine | theirs)))
+        own_turn = True
+        while empty:
+            i = rng.randrange(len(empty))
+            cell = empty[i]
+            empty[i] = empty[-1]
+            empty.pop()
+            mine |= 1 << cell
+            if completes_line(mine, cell):
+                return WIN if own_turn else LOSS
+            mine, theirs = theirs, mine
+            own_turn = not own_turn
+        return DRAW
+
+    def _iterate(self, mine, theirs, rng):
+        """ Runs one selection / expansion / playout / backup pass from the
+        root position (`mine` to move).
+        """
+        node = self.root
+        log = math.log
+        sqrt = math.sqrt
+
+        # selection: follow the UCT-best child while the node is expanded
+        while not node.untried and node.children:
+            scale = EXPLORATION * sqrt(log(node.visits))
+            best_score = -1.0
+            best = None
+            for child in node.children:
+                score = child.wins / child.visits + scale / sqrt(child.visits)
+                if score > best_score:
+                    best_score = score
+                    best = child
+            node = best
+            mine, theirs = theirs, mine | 1 << node.move
+
+        # expansion
+        if node.untried:
+            move = node.untried.pop()
+            child = self._new_node(move, node, mine | 1 << move, theirs, rng)
+            node.children.append(child)
+            node = child
+            mine, theirs = theirs, mine | 1 << move
+
+        # playout, scored for the player who moved into `node`
+        if node.result is not None:
+            result = node.result
+        elif node.move is None:
+            result = DRAW
+        else:
+            result = 1.0 - self._playout(mine, theirs, rng)
+
+        # backup
+        while node is not None:
+            node.visits += 1
+            node.wins += result
+            result = 1.0 - result
+            node = node.parent
+
+    def best_move(self, mine, theirs, rng=random):
+        """ Searches the position with `mine` to move, and returns the cell
+        index of the most visited move, or None if there are no moves.
+        """
+        root = self._find_root(mine, theirs)
+        if root is None:
+            root = self._new_node(None, None, theirs, mine, rng)
+        root.parent = None
+        self.root = root
+        self.root_position = (mine, theirs)
+        reused = root.visits
+
+        deadline = None
+        if self.time_limit is not None:
+            deadline = time.perf_counter() + self.time_limit
+        iterations = 0
+        while root.untried or root.children:
+            if self.iterations is not None and iterations >= self.iterations:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self._iterate(mine, theirs, rng)
+            iterations += 1
+
+        if not root.children:
+            return None
+        best = max(root.children, key=lambda child: child.visits)
+        if ai_logger.isEnabledFor(DEBUG):
+            ai_logger.debug('MCTS: %d playouts (%d reused), move %d won %.0f%% of %d',
+                            iterations, reused, best.move,
+                            100 * best.wins / best.visits, best.visits)
+        return best.move
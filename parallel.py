@@ -0,0 +1,285 @@
+"""Module containing AI searches spread over a pool of worker processes.
+
+`ParallelSearch` splits the perfect-play search at the root: the first
+(best ordered) move is searched here to get a bound, then the remaining
+root moves are searched in the workers against that bound. All processes
+share one `SharedTable`, a fixed-size transposition table in a
+`multiprocessing.shared_memory` block, so positions reached through
+different root moves are only searched once.
+
+`ParallelMonteCarlo` runs an independent `mcts.MonteCarloTree` in every
+worker, with the same budget, and sums their root visit counts.
+
+Both follow the `best_move(mine, theirs, rng)` interface of
+`mcts.MonteCarloTree`, so they can be passed to `Board.make_best_move` (or
+set in `Game.searches`). Run this module to measure the speedup against
+the number of worker processes::
+
+    python parallel.py --shape 4 4 4 --workers 1 2 4 8
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+from bitboard import DEFAULT_GEOMETRY, get_geometry, iter_cells
+from engine import INFINITY, negamax, completes_line, ordered_moves
+from mcts import DEFAULT_ITERATIONS, MonteCarloTree
+
+DEFAULT_TABLE_SIZE = 1 << 20
+
+# an entry is two int64 words: the key's hash xor the data, and the data
+_WORD_SIZE = 8
+_ENTRY_WORDS = 2
+_VALID = 1 << 40
+
+
+class SharedTable:
+    """ A lossy transposition table of `size` (a power of two) entries in
+    shared memory, with the `get` / item assignment interface `engine`
+    expects of a table. A new block is created unless the `name` of an
+    existing one is given.
+
+    Each key goes to one slot, picked by its hash, and a store overwrites
+    whatever was there. Only the hash of a key is kept, which is exact for
+    keys below 2 ** 61 (boards of up to 30 cells). Entries are written
+    without locks; the hash is stored xor-ed with the data, so an entry
+    torn by two concurrent writes no longer matches its key and reads as
+    missing.
+    """
+
+    def __init__(self, size=DEFAULT_TABLE_SIZE, name=None):
+        if size < 1 or size & (size - 1):
+            raise ValueError(f'Table size must be a power of two, got {size}')
+        self.size = size
+        self._owner = name is None
+        if self._owner:
+            self._memory = SharedMemory(create=True, size=size * _ENTRY_WORDS * _WORD_SIZE)
+        else:
+            # worker processes share their parent's resource tracker, so
+            # attaching doesn't register the block a second time
+            self._memory = SharedMemory(name)
+        self.name = self._memory.name
+        self._words = self._memory.buf.cast('q')
+        self._mask = size - 1
+
+    def get(self, key):
+        """ Returns the `(value, flag, move)` entry stored for `key`, or None. """
+        check = hash(key)
+        slot = (check & self._mask) * _ENTRY_WORDS
+        words = self._words
+        data = words[slot + 1]
+        if not data & _VALID or words[slot] ^ data != check:
+            return None
+        value = data & 0xFFFF
+        if value & 0x8000:
+            value -= 0x10000
+        return value, data >> 16 & 0xFF, data >> 24 & 0xFFFF
+
+    def __setitem__(self, key, entry):
+        value, flag, move = entry
+        check = hash(key)
+        slot = (check & self._mask) * _ENTRY_WORDS
+        data = _VALID | move << 24 | flag << 16 | value & 0xFFFF
+        words = self._words
+        words[slot] = check ^ data
+        words[slot + 1] = data
+
+    def clear(self):
+        """ Drops every entry. """
+        self._memory.buf[:] = bytes(len(self._memory.buf))
+
+    def close(self):
+        """ Detaches from the block, and frees it if this table created it. """
+        self._words.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+# the worker processes' view of the shared table
+_worker_table = None
+
+
+def _init_worker(name, size):
+    global _worker_table
+    _worker_table = SharedTable(size, name)
+
+
+def _search_root_move(shape, mine, theirs, cell, alpha):
+    """ Returns the value of playing `cell`, if it beats `alpha`. """
+    geometry = get_geometry(*shape)
+    return -negamax(theirs, mine | 1 << cell, -INFINITY, -alpha, geometry, _worker_table)
+
+
+def _search_tree(shape, mine, theirs, iterations, time_limit, seed):
+    """ Runs a fresh MCTS and returns its root visit counts by move. """
+    tree = MonteCarloTree(get_geometry(*shape), iterations, time_limit)
+    tree.best_move(mine, theirs, random.Random(seed))
+    return {child.move: child.visits for child in tree.root.children}
+
+
+def _shape(geometry):
+    return geometry.rows, geometry.columns, geometry.win_length
+
+
+class ParallelSearch:
+    """ Perfect-play search over `geometry`, with the root moves split
+    across `workers` processes (defaulting to the number of CPUs).
+    """
+
+    def __init__(self, geometry=DEFAULT_GEOMETRY, workers=None, table_size=DEFAULT_TABLE_SIZE):
+        self.geometry = geometry
+        self.workers = workers or os.cpu_count()
+        self.table = SharedTable(table_size)
+        self._executor = ProcessPoolExecutor(
+            self.workers, initializer=_init_worker, initargs=(self.table.name, table_size)
+        )
+
+    def reset(self):
+        """ Nothing to forget between games: table entries stay valid. """
+
+    def best_move(self, mine, theirs, rng=random):
+        """ Returns the cell index of an optimal move for the side to move
+        (`mine`), or None if there are no moves.
+        """
+        geometry = self.geometry
+        candidates = geometry.candidate_cells(mine | theirs)
+        if not candidates:
+            return None
+        for cell in iter_cells(candidates):
+            if completes_line(mine | 1 << cell, cell, geometry):
+                return cell
+
+        moves = ordered_moves(mine, theirs, candidates, geometry)
+        best = moves[0]
+        best_value = -negamax(theirs, mine | 1 << best, geometry=geometry, table=self.table)
+        futures = [
+            self._executor.submit(
+                _search_root_move, _shape(geometry), mine, theirs, cell, best_value
+            )
+            for cell in moves[1:]
+        ]
+        for cell, future in zip(moves[1:], futures):
+            value = future.result()
+            if value > best_value:
+                best, best_value = cell, value
+        return best
+
+    def close(self):
+        """ Stops the workers and frees the shared table. """
+        self._executor.shutdown()
+        self.table.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParallelMonteCarlo:
+    """ Root-parallel MCTS over `geometry`: every one of `workers` processes
+    searches its own tree with the given budget, and the move with the most
+    visits over all trees is played.
+    """
+
+    def __init__(self, geometry=DEFAULT_GEOMETRY, workers=None,
+                 iterations=DEFAULT_ITERATIONS, time_limit=None):
+        if iterations is None and time_limit is None:
+            raise ValueError('ParallelMonteCarlo needs an iteration or time budget')
+        self.geometry = geometry
+        self.workers = workers or os.cpu_count()
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self._executor = ProcessPoolExecutor(self.workers)
+
+    def reset(self):
+        """ Nothing to forget between games: trees aren't kept. """
+
+    def root_visits(self, mine, theirs, rng=random):
+        """ Searches the position (`mine` to move) and returns the root
+        visit counts by move, summed over all the workers' trees.
+        """
+        futures = [
+            self._executor.submit(
+                _search_tree, _shape(self.geometry), mine, theirs,
+                self.iterations, self.time_limit, rng.getrandbits(64)
+            )
+            for _ in range(self.workers)
+        ]
+        visits = {}
+        for future in futures:
+            for move, count in future.result().items():
+                visits[move] = visits.get(move, 0) + count
+        return visits
+
+    def best_move(self, mine, theirs, rng=random):
+        """ Returns the cell index of the move visited most over all the
+        workers' trees, or None if there are no moves.
+        """
+        visits = self.root_visits(mine, theirs, rng)
+        if not visits:
+            return None
+        return max(visits, key=visits.get)
+
+    def close(self):
+        """ Stops the workers. """
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    """ Command line entry point: reports search speedup by worker count. """
+    parser = argparse.ArgumentParser(description='Measure parallel search speedup.')
+    parser.add_argument('--shape', type=int, nargs=3, default=(4, 4, 4),
+                        metavar=('ROWS', 'COLUMNS', 'K'),
+                        help='board for the perfect-play search (default: 4 4 4)')
+    parser.add_argument('--mcts-shape', type=int, nargs=3, default=(15, 15, 5),
+                        metavar=('ROWS', 'COLUMNS', 'K'),
+                        help='board for the MCTS playout rate (default: 15 15 5)')
+    parser.add_argument('--mcts-time', type=float, default=1.0,
+                        help='seconds of MCTS per measurement (default: 1)')
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=None)
+    args = parser.parse_args(argv)
+
+    cpus = os.cpu_count()
+    workers = args.workers
+    if workers is None:
+        workers = sorted({1 << i for i in range(cpus.bit_length())} | {cpus})
+    print(f'{cpus} CPUs')
+
+    geometry = get_geometry(*args.shape)
+    print(f'Perfect play, empty {geometry.rows}x{geometry.columns} board, '
+          f'{geometry.win_length} in a row:')
+    baseline = None
+    for count in workers:
+        with ParallelSearch(geometry, count) as search:
+            start = time.perf_counter()
+            search.best_move(0, 0)
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f'  {count:3d} workers: {elapsed:8.2f}s  speedup {baseline / elapsed:5.2f}x')
+
+    geometry = get_geometry(*args.mcts_shape)
+    print(f'MCTS, {geometry.rows}x{geometry.columns} board, '
+          f'{args.mcts_time:g}s per move:')
+    baseline = None
+    center = 1 << geometry.center
+    for count in workers:
+        with ParallelMonteCarlo(geometry, count, None, args.mcts_time) as search:
+            playouts = sum(search.root_visits(0, center, random.Random(0)).values())
+        rate = playouts / args.mcts_time
+        baseline = baseline or rate
+        print(f'  {count:3d} workers: {rate:8.0f} playouts/s  speedup {rate / baseline:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
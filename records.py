@@ -0,0 +1,338 @@
+"""Module containing a persistent, append-only store of finished games.
+
+Every game on the 3x3 board is one 8-byte record (a 64-bit word):
+
+- bits 0-35: up to nine moves, four bits each, oldest first, holding the
+  cell index plus one (0 past the last move),
+- bits 36-37: the outcome, from X's point of view (`OUTCOMES`),
+- bits 38-40 and 41-43: the strategies of X and O (`STRATEGIES`; 0 for a
+  human player).
+
+A log file is `MAGIC` followed by records, in native byte order.
+`RecordWriter` only ever appends to it, in batches, with an `fsync` per
+batch, so a crash loses at most the last unsynced batch (and a torn
+trailing record is ignored). `RecordBuffer` collects records in memory,
+such as in a worker process, for a writer to `extend` the log with.
+`RecordLog` memory-maps the file to read it: records are decoded as they
+are iterated or replayed, never loaded all at once. Its `index` groups
+record numbers by outcome and opening move; it is kept next to the log
+(``<log>.idx``), and extended from the records appended since it was
+saved when the log is opened again.
+
+Usage::
+
+    with RecordWriter('games.log') as writer:
+        writer.append_board(board, x_strategy=None, o_strategy=Strategy.PERFECT)
+
+    with RecordLog('games.log') as log:
+        for number in log.query(outcome=GameOutcome.LOSE, opening=4):
+            ...
+"""
+import mmap
+import os
+from array import array
+from collections import namedtuple
+
+from bitboard import CELL_COUNT
+from board import Board, Strategy, X, FINISHED, CATS_GAME, INVALID
+from game import GameOutcome
+
+MAGIC = b'TTTLOG\x00\x01'
+HEADER_SIZE = len(MAGIC)
+RECORD_SIZE = 8
+
+INDEX_MAGIC = b'TTTIDX\x00\x01'
+
+MOVE_BITS = 4
+OUTCOME_SHIFT = CELL_COUNT * MOVE_BITS
+X_STRATEGY_SHIFT = OUTCOME_SHIFT + 2
+O_STRATEGY_SHIFT = X_STRATEGY_SHIFT + 3
+
+# ids of the outcomes and strategies, by position
+OUTCOMES = (GameOutcome.WIN, GameOutcome.LOSE, GameOutcome.CATS_GAME)
+STRATEGIES = (None,) + tuple(Strategy)
+
+_OUTCOME_IDS = {outcome: i for i, outcome in enumerate(OUTCOMES)}
+_STRATEGY_IDS = {strategy: i for i, strategy in enumerate(STRATEGIES)}
+
+# opening move key of a game with no moves
+NO_OPENING = CELL_COUNT
+
+DEFAULT_SYNC_EVERY = 4096
+
+GameRecord = namedtuple('GameRecord', 'moves outcome x_strategy o_strategy')
+GameRecord.__doc__ = """ A decoded record: the cell indexes of the moves in
+order, the `GameOutcome` and each side's `Strategy` (or None). """
+
+
+def encode_record(moves, outcome, x_strategy=None, o_strategy=None):
+    """ Returns the record word for a game. """
+    if len(moves) > CELL_COUNT:
+        raise ValueError(f'A game has at most {CELL_COUNT} moves, got {len(moves)}')
+    word = 0
+    for cell in reversed(moves):
+        word = word << MOVE_BITS | cell + 1
+    return (word
+            | _OUTCOME_IDS[outcome] << OUTCOME_SHIFT
+            | _STRATEGY_IDS[x_strategy] << X_STRATEGY_SHIFT
+            | _STRATEGY_IDS[o_strategy] << O_STRATEGY_SHIFT)
+
+
+def decode_record(word):
+    """ Returns the `GameRecord` of a record word. """
+    moves = []
+    for shift in range(0, OUTCOME_SHIFT, MOVE_BITS):
+        cell = word >> shift & 0xF
+        if not cell:
+            break
+        moves.append(cell - 1)
+    return GameRecord(
+        moves,
+        OUTCOMES[word >> OUTCOME_SHIFT & 0x3],
+        STRATEGIES[word >> X_STRATEGY_SHIFT & 0x7],
+        STRATEGIES[word >> O_STRATEGY_SHIFT & 0x7],
+    )
+
+
+def encode_board(board, x_strategy=None, o_strategy=None):
+    """ Returns the record word for the finished game on a 3x3 `board`,
+    from its move stack. """
+    outcome = board_outcome(board)
+    if outcome is None:
+        raise ValueError('Only finished games are recorded')
+    cell_index = board.geometry.cell_index
+    moves = [cell_index(row, column) for row, column in board.get_moves()]
+    return encode_record(moves, outcome, x_strategy, o_strategy)
+
+
+def board_outcome(board):
+    """ Returns the `GameOutcome` of a finished `board` (from X's point of
+    view), or None if it is still being played. """
+    state = board.get_state_code()
+    if state == INVALID:
+        # raises MultipleWinError
+        board.get_state()
+    if state == CATS_GAME:
+        return GameOutcome.CATS_GAME
+    if state == FINISHED:
+        return GameOutcome.WIN if board.get_winner_code() == X else GameOutcome.LOSE
+    return None
+
+
+class RecordBuffer:
+    """ Records held in memory, as an array of record `words`. Also the
+    recorder `game.Game` expects. """
+
+    def __init__(self):
+        self.words = array('Q')
+
+    def append(self, moves, outcome, x_strategy=None, o_strategy=None):
+        """ Adds the game of `moves` (cell indexes) with its outcome and
+        strategies. """
+        self.words.append(encode_record(moves, outcome, x_strategy, o_strategy))
+
+    def append_board(self, board, x_strategy=None, o_strategy=None):
+        """ Adds the finished game on a 3x3 `board`, from its move stack. """
+        self.words.append(encode_board(board, x_strategy, o_strategy))
+
+
+class RecordWriter:
+    """ Appends records to the log at `path` (created if missing), writing
+    and syncing them every `sync_every` records, and on `flush` / `close`.
+    """
+
+    def __init__(self, path, sync_every=DEFAULT_SYNC_EVERY):
+        self.path = path
+        self.sync_every = sync_every
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            os.write(self._fd, MAGIC)
+        elif (size - HEADER_SIZE) % RECORD_SIZE:
+            # drop a record torn by a crash, so that new ones stay aligned
+            os.ftruncate(self._fd, size - (size - HEADER_SIZE) % RECORD_SIZE)
+        self._pending = array('Q')
+
+    def append(self, moves, outcome, x_strategy=None, o_strategy=None):
+        """ Adds the game of `moves` (cell indexes) with its outcome and
+        strategies. """
+        self._pending.append(encode_record(moves, outcome, x_strategy, o_strategy))
+        if len(self._pending) >= self.sync_every:
+            self.flush()
+
+    def append_board(self, board, x_strategy=None, o_strategy=None):
+        """ Adds the finished game on a 3x3 `board`, from its move stack. """
+        self._pending.append(encode_board(board, x_strategy, o_strategy))
+        if len(self._pending) >= self.sync_every:
+            self.flush()
+
+    def extend(self, words):
+        """ Adds encoded records (such as a `RecordBuffer`'s `words`). """
+        self._pending.extend(words)
+        if len(self._pending) >= self.sync_every:
+            self.flush()
+
+    def flush(self):
+        """ Writes and syncs the pending records. """
+        if self._pending:
+            os.write(self._fd, self._pending.tobytes())
+            del self._pending[:]
+        os.fsync(self._fd)
+
+    def close(self):
+        """ Flushes and closes the log. """
+        if self._fd is not None:
+            self.flush()
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RecordIndex:
+    """ Record numbers grouped by `(outcome id, opening cell)`, covering
+    the first `count` records of a log. """
+    __slots__ = ('count', 'groups')
+
+    def __init__(self):
+        self.count = 0
+        self.groups = [array('I') for _ in range(len(OUTCOMES) * (NO_OPENING + 1))]
+
+    def extend(self, words, start):
+        """ Adds the record `words`, numbered from `start`. """
+        groups = self.groups
+        number = start
+        for word in words:
+            opening = (word & 0xF) - 1
+            if opening < 0:
+                opening = NO_OPENING
+            groups[(word >> OUTCOME_SHIFT & 0x3) * (NO_OPENING + 1) + opening].append(number)
+            number += 1
+        self.count = number
+
+    def get(self, outcome_id, opening):
+        return self.groups[outcome_id * (NO_OPENING + 1) + opening]
+
+    def save(self, path):
+        """ Writes the index to `path` (atomically replacing it). """
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(INDEX_MAGIC)
+            f.write(array('Q', [self.count] + [len(group) for group in self.groups]).tobytes())
+            for group in self.groups:
+                f.write(group.tobytes())
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """ Returns the index saved at `path`, or None if it is missing or
+        unreadable. """
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if not data.startswith(INDEX_MAGIC):
+            return None
+        index = cls()
+        header = array('Q')
+        header_size = (1 + len(index.groups)) * 8
+        header.frombytes(data[HEADER_SIZE:HEADER_SIZE + header_size])
+        offset = HEADER_SIZE + header_size
+        index.count = header[0]
+        for group, length in zip(index.groups, header[1:]):
+            group.frombytes(data[offset:offset + length * group.itemsize])
+            if len(group) != length:
+                return None
+            offset += length * group.itemsize
+        return index
+
+
+class RecordLog:
+    """ Read-only, memory-mapped view of the log at `path`, as it was when
+    opened. Records are numbered from 0 in the order they were appended.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:HEADER_SIZE] != MAGIC:
+            self._map.close()
+            raise ValueError(f'{path} is not a game record log')
+        self._count = (len(self._map) - HEADER_SIZE) // RECORD_SIZE
+        self._words = memoryview(self._map)[
+            HEADER_SIZE:HEADER_SIZE + self._count * RECORD_SIZE].cast('Q')
+        self._index = None
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, number):
+        """ Returns the `GameRecord` numbered `number`. """
+        return decode_record(self._words[number])
+
+    def __iter__(self):
+        """ Yields every `GameRecord`, decoding them as it goes. """
+        for word in self._words:
+            yield decode_record(word)
+
+    def replay(self, numbers=None):
+        """ Yields `(record, board)` for the records numbered `numbers`
+        (by default all), each `board` a `Board` rebuilt by pushing the
+        record's moves, so its `pop` walks the game back. """
+        words = self._words
+        for number in range(self._count) if numbers is None else numbers:
+            record = decode_record(words[number])
+            board = Board()
+            for cell in record.moves:
+                board.push(board.geometry.cell_coords(cell))
+            yield record, board
+
+    @property
+    def index(self):
+        """ The `RecordIndex` of the log, loaded from ``<log>.idx`` and
+        brought up to date (and saved) on first use. """
+        if self._index is None:
+            index_path = f'{self.path}.idx'
+            index = RecordIndex.load(index_path)
+            if index is None or index.count > self._count:
+                index = RecordIndex()
+            if index.count < self._count:
+                index.extend(self._words[index.count:], index.count)
+                index.save(index_path)
+            self._index = index
+        return self._index
+
+    def query(self, outcome=None, opening=None):
+        """ Returns the sorted numbers of the records with `outcome` (a
+        `GameOutcome`) and opening cell `opening`; None matches any. """
+        index = self.index
+        outcome_ids = range(len(OUTCOMES)) if outcome is None else [_OUTCOME_IDS[outcome]]
+        openings = range(NO_OPENING + 1) if opening is None else [opening]
+        groups = [index.get(outcome_id, cell) for outcome_id in outcome_ids for cell in openings]
+        if len(groups) == 1:
+            return groups[0]
+        return sorted(number for group in groups for number in group)
+
+    def count(self, outcome=None, opening=None):
+        """ Returns the number of records matching (as for `query`). """
+        index = self.index
+        outcome_ids = range(len(OUTCOMES)) if outcome is None else [_OUTCOME_IDS[outcome]]
+        openings = range(NO_OPENING + 1) if opening is None else [opening]
+        return sum(len(index.get(outcome_id, cell))
+                   for outcome_id in outcome_ids for cell in openings)
+
+    def close(self):
+        self._words.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
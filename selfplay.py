@@ -0,0 +1,156 @@
+"""Module containing a headless self-play runner for regression-testing the AI.
+
+Games are split into fixed-size chunks, each played in a worker process of
+a `ProcessPoolExecutor` with its own `random.Random`, seeded from the run
+seed and the chunk number. Results are therefore the same whatever the
+number of workers, and chunks are independent, so throughput scales with
+cores.
+
+Usage::
+
+    python selfplay.py --games 100000 -x perfect -o random --workers 8
+
+With ``--record PATH``, every game is also appended to a `records` log.
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from board import Strategy, X, PLAYING, INVALID
+from game import Game, GameOutcome
+from records import RecordBuffer, RecordWriter
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def play_game(game, x_strategy, o_strategy, rng):
+    """ Plays `game` out with each side using its strategy, and returns the
+    `GameOutcome` (from X's point of view) after tallying it.
+    """
+    board = game.board
+    while board.get_state_code() == PLAYING:
+        if board.get_current_player_code() == X:
+            game.make_best_move(x_strategy, rng)
+        else:
+            game.make_best_move(o_strategy, rng)
+    if board.get_state_code() != INVALID:
+        return game.record_outcome()
+
+    # a move completing two lines at once, which `Board.get_state` rejects
+    # (`MultipleWinError`): tallied as a win for the player who made it, as
+    # the engine scores it
+    outcome = GameOutcome.WIN if board.get_winner_code() == X else GameOutcome.LOSE
+    game.outcomes[outcome] += 1
+    if game.records is not None:
+        cell_index = board.geometry.cell_index
+        game.records.append([cell_index(row, column) for row, column in board.get_moves()],
+                            outcome, *game.strategies)
+    return outcome
+
+
+def play_chunk(x_strategy, o_strategy, games, seed, record=False):
+    """ Plays `games` games and returns the outcome tallies, and if
+    `record` is set, the games' encoded records too. """
+    rng = random.Random(seed)
+    buffer = RecordBuffer() if record else None
+    game = Game(records=buffer)
+    for _ in range(games):
+        game.new_game()
+        play_game(game, x_strategy, o_strategy, rng)
+    if record:
+        return game.outcomes, buffer.words
+    return game.outcomes
+
+
+def merge_outcomes(results):
+    """ Sums an iterable of `GameOutcome` tallies. """
+    outcomes = {outcome: 0 for outcome in GameOutcome}
+    for result in results:
+        for outcome, count in result.items():
+            outcomes[outcome] += count
+    return outcomes
+
+
+def chunk_seed(seed, chunk):
+    """ Returns the deterministic seed of chunk number `chunk` of a run. """
+    return f'{seed}:{chunk}'
+
+
+def run(games, x_strategy, o_strategy, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=0,
+        record=None):
+    """ Plays `games` games of `x_strategy` against `o_strategy` and returns
+    the merged `GameOutcome` tallies (from X's point of view).
+
+    `workers` is the number of worker processes (defaulting to the number
+    of CPUs); with `workers=1` every chunk is played in this process.
+    Given a `record` path, the games are appended to the record log there,
+    in chunk order.
+    """
+    if record is not None:
+        with RecordWriter(record) as writer:
+            results = []
+            for outcomes, words in _run_chunks(games, x_strategy, o_strategy, workers,
+                                               chunk_size, seed, True):
+                writer.extend(words)
+                results.append(outcomes)
+        return merge_outcomes(results)
+    return merge_outcomes(
+        _run_chunks(games, x_strategy, o_strategy, workers, chunk_size, seed, False)
+    )
+
+
+def _run_chunks(games, x_strategy, o_strategy, workers, chunk_size, seed, record):
+    """ Yields the `play_chunk` results of a run, in chunk order. """
+    sizes = [chunk_size] * (games // chunk_size)
+    if games % chunk_size:
+        sizes.append(games % chunk_size)
+    seeds = [chunk_seed(seed, chunk) for chunk in range(len(sizes))]
+    x_strategies = [x_strategy] * len(sizes)
+    o_strategies = [o_strategy] * len(sizes)
+    records = [record] * len(sizes)
+
+    if workers == 1:
+        yield from map(play_chunk, x_strategies, o_strategies, sizes, seeds, records)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(play_chunk, x_strategies, o_strategies, sizes, seeds, records)
+
+
+def _strategy(name):
+    """ Parses a `Strategy` from its (case-insensitive) name. """
+    try:
+        return Strategy[name.upper()]
+    except KeyError:
+        raise argparse.ArgumentTypeError(f'unknown strategy: {name}') from None
+
+
+def main(argv=None):
+    """ Command line entry point. """
+    strategy_names = ', '.join(strategy.name.lower() for strategy in Strategy)
+    parser = argparse.ArgumentParser(description='Play AI strategies against each other.')
+    parser.add_argument('-n', '--games', type=int, default=10000)
+    parser.add_argument('-x', type=_strategy, default=Strategy.PERFECT,
+                        help=f'strategy for X ({strategy_names})')
+    parser.add_argument('-o', type=_strategy, default=Strategy.PERFECT,
+                        help=f'strategy for O ({strategy_names})')
+    parser.add_argument('-w', '--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--record', metavar='PATH',
+                        help='append the games to the record log at PATH')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    outcomes = run(args.games, args.x, args.o, args.workers, args.chunk_size, args.seed,
+                   args.record)
+    elapsed = time.perf_counter() - start
+
+    print(f'X ({args.x.value}) vs O ({args.o.value}): {args.games} games in {elapsed:.2f}s '
+          f'({args.games / elapsed:.0f} games/s)')
+    for outcome, count in outcomes.items():
+        print(f'  {outcome.value}: {count}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+"""Module containing a multi-session game server over asyncio TCP.
+
+One process hosts many concurrent games, each a `game.Game` keyed by a
+session id. Clients send one JSON object per line and get one JSON object
+per line back, in order::
+
+    {"op": "new"}                                   -> a new session
+    {"op": "new", "strategy": "mcts", "rows": 7, "columns": 7, "win_length": 4}
+    {"op": "move", "session": ID, "row": 1, "column": 1}
+    {"op": "state", "session": ID}
+    {"op": "close", "session": ID}
+
+Successful replies hold ``"ok": true`` with the session's `state` (see
+`GameServer.describe`); failures ``"ok": false`` and an `error` message.
+The client plays X. Moves are validated by `Board.select_cell`, and the
+AI's reply (as O) is searched in a bounded thread pool, so searches never
+block the event loop and only `max_pending` of them queue at once (moves
+of `INSTANT_STRATEGIES` on the 3x3 board are answered directly).
+Sessions idle for `idle_timeout` seconds are evicted. The exhaustive
+``perfect`` strategy (the default) is only offered on boards of at most
+`MAX_PERFECT_CELLS` cells; larger boards need another strategy.
+
+Usage::
+
+    python server.py --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bitboard import SIZE, DEFAULT_GEOMETRY, iter_cells
+from evalcache import configure_cache
+from board import Player, Strategy, InvalidMoveError, MultipleWinError, PLAYING
+from game import Game
+from loggers import game_logger
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 4
+DEFAULT_IDLE_TIMEOUT = 300.0
+DEFAULT_MAX_SESSIONS = 100000
+
+MAX_BOARD_SIZE = 19
+
+# the largest board (in cells) the perfect strategy is offered on: its
+# exhaustive search answers every move of a 16 cell board within about a
+# second, but one move on 5x5 can take minutes (and fill the transposition
+# table), which would tie up a worker per client asking for it
+MAX_PERFECT_CELLS = 16
+
+# strategies answered on the event loop on the 3x3 board (an opening book
+# lookup or a few bit tests), where a thread handoff would cost far more
+INSTANT_STRATEGIES = (Strategy.PERFECT, Strategy.HEURISTIC, Strategy.RANDOM)
+
+
+class ProtocolError(Exception):
+    """ A request the server can't act on; its message is sent back. """
+
+
+class Session:
+    """ A hosted game, with the time it was last used. """
+    __slots__ = ('id', 'game', 'strategy', 'lock', 'last_active')
+
+    def __init__(self, session_id, game, strategy):
+        self.id = session_id
+        self.game = game
+        self.strategy = strategy
+        # serializes requests for the session from several connections
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+
+
+class GameServer:
+    """ Hosts games for any number of connections. AI moves run on
+    `workers` threads, with at most `max_pending` waiting or running.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=None,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, max_sessions=DEFAULT_MAX_SESSIONS):
+        self.sessions = {}
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='ai')
+        self.max_pending = max_pending or 4 * workers
+        # created in `start`, on the loop that serves (before Python 3.10 a
+        # semaphore binds to the current loop when it is made)
+        self._pending = None
+        self._server = None
+        self._evictor = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """ Starts listening, and returns the bound `(host, port)`. """
+        self._pending = asyncio.Semaphore(self.max_pending)
+        self._server = await asyncio.start_server(self.handle_connection, host, port)
+        self._evictor = asyncio.create_task(self._evict_idle())
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """ Stops listening and drops every session. """
+        if self._evictor is not None:
+            self._evictor.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+        self.sessions.clear()
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        host, port = await self.start(host, port)
+        game_logger.warning('Serving games on %s:%d', host, port)
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def handle_connection(self, reader, writer):
+        """ Answers the JSON lines of one connection until it closes. """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.handle_line(line)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line):
+        """ Returns the response to one request line. """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'ok': False, 'error': 'invalid JSON'}
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': 'request must be a JSON object'}
+        try:
+            return {'ok': True, **await self.handle(request)}
+        except ProtocolError as error:
+            return {'ok': False, 'error': str(error)}
+
+    async def handle(self, request):
+        """ Carries out a decoded request; raises `ProtocolError` for bad
+        ones. """
+        op = request.get('op')
+        if op == 'new':
+            return self.new_session(request)
+        if op not in ('move', 'state', 'close'):
+            raise ProtocolError(f'unknown op: {op!r}')
+
+        session_id = request.get('session')
+        session = self.sessions.get(session_id) if isinstance(session_id, str) else None
+        if session is None:
+            raise ProtocolError('unknown session')
+        session.last_active = time.monotonic()
+        if op == 'close':
+            del self.sessions[session.id]
+            return {'session': session.id}
+        async with session.lock:
+            if op == 'move':
+                await self.play_move(session, request)
+            return self.describe(session)
+
+    def new_session(self, request):
+        """ Creates a session for the board shape and AI strategy in
+        `request`. """
+        if len(self.sessions) >= self.max_sessions:
+            raise ProtocolError('server full')
+        shape = []
+        for key in ('rows', 'columns', 'win_length'):
+            value = request.get(key, SIZE)
+            minimum = 2 if key == 'win_length' else 1
+            if not isinstance(value, int) or not minimum <= value <= MAX_BOARD_SIZE:
+                raise ProtocolError(f'invalid {key}: {value!r}')
+            shape.append(value)
+        try:
+            strategy = Strategy[str(request.get('strategy', 'perfect')).upper()]
+            game = Game(True, *shape)
+        except KeyError:
+            raise ProtocolError(f'unknown strategy: {request["strategy"]!r}') from None
+        except ValueError as error:
+            raise ProtocolError(str(error)) from None
+        if strategy is Strategy.PERFECT and shape[0] * shape[1] > MAX_PERFECT_CELLS:
+            raise ProtocolError(f'perfect strategy is limited to boards of at most '
+                                f'{MAX_PERFECT_CELLS} cells')
+
+        session_id = secrets.token_hex(8)
+        session = Session(session_id, game, strategy)
+        self.sessions[session_id] = session
+        return self.describe(session)
+
+    async def play_move(self, session, request):
+        """ Plays the client's move (as X) and the AI's reply. """
+        board = session.game.board
+        if board.get_state_code() != PLAYING:
+            raise ProtocolError('game over')
+        if board.get_current_player() is not Player.PLAYER_X:
+            raise ProtocolError('not your turn')
+        row, column = request.get('row'), request.get('column')
+        if not isinstance(row, int) or not isinstance(column, int):
+            raise ProtocolError('row and column must be integers')
+        geometry = board.geometry
+        if not (0 <= row < geometry.rows and 0 <= column < geometry.columns):
+            raise ProtocolError('cell out of range')
+        try:
+            board.select_cell(row, column)
+        except InvalidMoveError as error:
+            raise ProtocolError(str(error) or 'invalid move') from None
+
+        if not self._game_over(session.game):
+            strategy = session.strategy
+            search = session.game.searches.get(strategy)
+            cache = session.game.cache
+            if strategy in INSTANT_STRATEGIES and board.geometry is DEFAULT_GEOMETRY:
+                move = board.get_best_move(strategy, random, search, cache)
+            else:
+                loop = asyncio.get_running_loop()
+                async with self._pending:
+                    move = await loop.run_in_executor(
+                        self._executor, board.get_best_move, strategy, random, search, cache
+                    )
+            board.select_cell(*move)
+            self._game_over(session.game)
+
+    @staticmethod
+    def _game_over(game):
+        """ Tallies the game if it is over, and returns whether it is. A
+        move completing two lines at once leaves a board `get_state` rejects
+        (`MultipleWinError`): that game is over, but isn't tallied. """
+        try:
+            return game.record_outcome() is not None
+        except MultipleWinError:
+            return True
+
+    @staticmethod
+    def describe(session):
+        """ Returns the JSON-able state of a session: its id, the board as
+        rows of ``X``/``O``/``-``, the state, the winner (or None) and the
+        outcome tallies of the games played in it.
+        """
+        board = session.game.board
+        columns = board.geometry.columns
+        cells = ['-'] * board.geometry.cell_count
+        for index in iter_cells(board.x_bits):
+            cells[index] = 'X'
+        for index in iter_cells(board.o_bits):
+            cells[index] = 'O'
+        cells = ''.join(cells)
+        try:
+            state = board.get_state().value
+        except MultipleWinError:
+            state = 'Invalid'
+        winner = board.get_winner()
+        return {
+            'session': session.id,
+            'board': [cells[start:start + columns]
+                      for start in range(0, len(cells), columns)],
+            'state': state,
+            'winner': winner.value if winner else None,
+            'outcomes': {outcome.value: count
+                         for outcome, count in session.game.outcomes.items()},
+        }
+
+    async def _evict_idle(self):
+        """ Drops sessions unused for `idle_timeout` seconds. """
+        interval = max(self.idle_timeout / 2, 0.01)
+        while True:
+            await asyncio.sleep(interval)
+            cutoff = time.monotonic() - self.idle_timeout
+            idle = [session_id for session_id, session in self.sessions.items()
+                    if session.last_active < cutoff and not session.lock.locked()]
+            for session_id in idle:
+                del self.sessions[session_id]
+            if idle:
+                game_logger.info('Evicted %d idle sessions', len(idle))
+
+
+class Client:
+    """ A minimal client for `GameServer`, one request at a time. """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, **request):
+        """ Sends a request and returns the decoded response. """
+        self._writer.write(json.dumps(request).encode() + b'\n')
+        await self._writer.drain()
+        return json.loads(await self._reader.readline())
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+def main(argv=None):
+    """ Command line entry point. """
+    parser = argparse.ArgumentParser(description='Serve tic-tac-toe games over TCP.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS,
+                        help='threads searching AI moves')
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help='seconds before an unused session is dropped')
+    args = parser.parse_args(argv)
+
+    # imported here, so that importing this module stays cheap
+    from instrument import configure_instrumentation
+    configure_instrumentation()
+    configure_cache()
+    server = GameServer(args.workers, idle_timeout=args.idle_timeout)
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""Module containing a retrograde-analysis solution of the 3x3 game.
+
+Every position reachable from `Board()` is labelled with its exact result
+for the side to move (`Result`) and the distance to the end of the game:
+the number of moves until the winner completes a line, with the winner
+hurrying and the loser holding out. Draws have distance 0.
+
+The position graph is enumerated breadth-first from the empty board, with
+each position classified by the `Board` state, so play stops at a Cat's
+Game as soon as no line is clear, as it does in a real game. Results
+then flow backwards from the finished positions: a position with a
+losing move for the opponent is won, and one whose moves all lead to
+won positions (for the opponent) is lost, each position being settled
+once, in order of distance. Whatever is left is a draw.
+
+The labels are stored in `solution.bin` next to this module, one byte per
+base-3 position index (see `book.position_index`), and memory-mapped on
+first use. Rebuild it after changing the rules with::
+
+    python solver.py
+"""
+import mmap
+import sys
+from collections import deque
+from enum import Enum
+from pathlib import Path
+
+from bitboard import CELL_COUNT, FULL_MASK, cell_coords, iter_cells
+from board import Board, PLAYING, CATS_GAME
+from book import POSITION_COUNT, position_index
+from loggers import ai_logger
+
+SOLUTION_PATH = Path(__file__).with_name('solution.bin')
+
+MAGIC = b'TTTSOLV\x01'
+HEADER_SIZE = len(MAGIC)
+
+# label codes, in the low two bits of a position's byte (0 is unreachable)
+WIN, LOSS, DRAW = 1, 2, 3
+LABEL_BITS = 2
+
+
+class Result(Enum):
+    '''
+    Game-theoretic result of a position, for the side to move.
+
+    '''
+    WIN = 'Win'
+    LOSS = 'Loss'
+    DRAW = 'Draw'
+
+
+RESULTS = (None, Result.WIN, Result.LOSS, Result.DRAW)
+
+
+def solve():
+    """ Returns the label byte of every position by base-3 index, 0 for
+    unreachable positions.
+    """
+    labels = bytearray(POSITION_COUNT)
+
+    # breadth-first enumeration of the position graph
+    children = {}
+    terminals = []
+    board = Board()
+    start = position_index(0, 0)
+    boards = deque([board])
+    children[start] = None
+    while boards:
+        board = boards.popleft()
+        index = position_index(board.x_bits, board.o_bits)
+        state = board.get_state_code()
+        if state != PLAYING:
+            # the side to move has lost, or nobody can win. A move
+            # completing two lines at once leaves a board `get_state`
+            # rejects (`MultipleWinError`); it is scored as a win, as the
+            # engine and the opening book score it
+            labels[index] = DRAW if state == CATS_GAME else LOSS
+            children[index] = ()
+            terminals.append(index)
+            continue
+        moves = []
+        for cell in iter_cells(FULL_MASK & ~(board.x_bits | board.o_bits)):
+            child = board.copy()
+            child.select_cell(*cell_coords(cell))
+            child_index = position_index(child.x_bits, child.o_bits)
+            moves.append(child_index)
+            if child_index not in children:
+                children[child_index] = None
+                boards.append(child)
+        children[index] = moves
+
+    parents = {index: [] for index in children}
+    for index, moves in children.items():
+        for child_index in moves:
+            parents[child_index].append(index)
+
+    # settle positions backwards from the decided ends, nearest first
+    distances = dict.fromkeys(children, 0)
+    undecided = {index: len(moves) for index, moves in children.items()}
+    queue = deque(index for index in terminals if labels[index] == LOSS)
+    while queue:
+        index = queue.popleft()
+        for parent in parents[index]:
+            if labels[parent]:
+                continue
+            if labels[index] == LOSS:
+                labels[parent] = WIN
+            else:
+                undecided[parent] -= 1
+                if undecided[parent]:
+                    continue
+                # reached last, through the slowest of its won replies
+                labels[parent] = LOSS
+            distances[parent] = distances[index] + 1
+            queue.append(parent)
+
+    for index in children:
+        if not labels[index]:
+            labels[index] = DRAW
+        labels[index] |= distances[index] << LABEL_BITS
+    return labels
+
+
+def build():
+    """ Solves the game and returns the solution file contents. """
+    return MAGIC + bytes(solve())
+
+
+class Solution:
+    """ Read-only view over a solution file: `MAGIC`, then one byte per
+    position, holding the label code and the distance above it.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+
+    def get(self, x_bits, o_bits):
+        """ Returns the `(Result, distance)` of the position for the side
+        to move, or None if it can't be reached.
+        """
+        label = self._buffer[HEADER_SIZE + position_index(x_bits, o_bits)]
+        if not label:
+            return None
+        return RESULTS[label & (1 << LABEL_BITS) - 1], label >> LABEL_BITS
+
+    def lookup(self, board):
+        """ Returns the `(Result, distance)` of a 3x3 `Board`, as `get`. """
+        return self.get(board.x_bits, board.o_bits)
+
+    def best_moves(self, x_bits, o_bits, x_to_move):
+        """ Returns the cell indexes of the moves keeping the position's
+        result in the fewest moves (when winning) or the most (when losing),
+        for the side to move (X if `x_to_move`).
+        """
+        best = []
+        best_score = None
+        for cell in iter_cells(FULL_MASK & ~(x_bits | o_bits)):
+            if x_to_move:
+                entry = self.get(x_bits | 1 << cell, o_bits)
+            else:
+                entry = self.get(x_bits, o_bits | 1 << cell)
+            if entry is None:
+                continue
+            result, distance = entry
+            # the opponent losing soonest is best, then drawing, then the
+            # opponent winning latest
+            if result is Result.LOSS:
+                score = 2 * CELL_COUNT - distance
+            elif result is Result.DRAW:
+                score = CELL_COUNT
+            else:
+                score = distance
+            if best_score is None or score > best_score:
+                best, best_score = [cell], score
+            elif score == best_score:
+                best.append(cell)
+        return best
+
+    def __contains__(self, position):
+        x_bits, o_bits = position
+        return self._buffer[HEADER_SIZE + position_index(x_bits, o_bits)] != 0
+
+
+def load(path=SOLUTION_PATH):
+    """ Memory-maps the solution at `path`. Returns None if the file is
+    missing or not a valid solution.
+    """
+    try:
+        with open(path, 'rb') as solution_file:
+            buffer = mmap.mmap(solution_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        ai_logger.warning('Solution table not available: %s', path)
+        return None
+    if len(buffer) != HEADER_SIZE + POSITION_COUNT or buffer[:HEADER_SIZE] != MAGIC:
+        ai_logger.warning('Ignoring invalid solution table: %s', path)
+        buffer.close()
+        return None
+    return Solution(buffer)
+
+
+_solution = None
+_solution_loaded = False
+
+
+def get_solution():
+    """ Returns the shared `Solution`, loading it on first use, or None if
+    no solution file is available.
+    """
+    global _solution, _solution_loaded
+    if not _solution_loaded:
+        _solution = load()
+        _solution_loaded = True
+    return _solution
+
+
+if __name__ == '__main__':
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else SOLUTION_PATH
+    path.write_bytes(build())
+    print(f'Wrote {path}')
@@ -0,0 +1,97 @@
+"""Module containing symmetry canonicalization for board positions.
+
+The board has eight symmetries (the D4 group: four rotations, each with or
+without a reflection). Every transform is precomputed as a cell permutation
+and as a lookup table over single-player bitboards, so transforming a
+position is two table reads.
+
+A position's canonical form is its smallest key over all eight transforms;
+the transform that produced it is returned alongside, so moves found in the
+canonical frame can be mapped back with `unmap_cell`.
+"""
+from bitboard import SIZE, CELL_COUNT, FULL_MASK, cell_index, cell_coords
+
+_LAST = SIZE - 1
+
+# (row, col) -> (row, col) for each transform; index 0 is the identity
+_COORD_TRANSFORMS = (
+    lambda row, col: (row, col),
+    lambda row, col: (col, _LAST - row),
+    lambda row, col: (_LAST - row, _LAST - col),
+    lambda row, col: (_LAST - col, row),
+    lambda row, col: (row, _LAST - col),
+    lambda row, col: (_LAST - row, col),
+    lambda row, col: (col, row),
+    lambda row, col: (_LAST - col, _LAST - row),
+)
+
+TRANSFORM_COUNT = len(_COORD_TRANSFORMS)
+
+# PERMUTATIONS[t][cell] is where `cell` lands under transform `t`
+PERMUTATIONS = tuple(
+    tuple(cell_index(*transform(*cell_coords(cell))) for cell in range(CELL_COUNT))
+    for transform in _COORD_TRANSFORMS
+)
+
+# INVERSE[t] is the transform undoing `t`
+INVERSE = tuple(
+    next(u for u in range(TRANSFORM_COUNT)
+         if all(PERMUTATIONS[u][PERMUTATIONS[t][cell]] == cell for cell in range(CELL_COUNT)))
+    for t in range(TRANSFORM_COUNT)
+)
+
+
+def _build_table(permutation):
+    """ Returns the image of every single-player bitboard under
+    `permutation`, each built from the one without its lowest cell.
+    """
+    table = [0] * (FULL_MASK + 1)
+    for bits in range(1, FULL_MASK + 1):
+        low = bits & -bits
+        table[bits] = table[bits ^ low] | 1 << permutation[low.bit_length() - 1]
+    return tuple(table)
+
+
+# TABLES[t][bits] is the bitboard `bits` under transform `t`
+TABLES = tuple(_build_table(permutation) for permutation in PERMUTATIONS)
+
+
+def transform(bits, t):
+    """ Returns the bitboard `bits` under transform `t`. """
+    return TABLES[t][bits]
+
+
+def canonical_key(first, second):
+    """ Returns the canonical key of the position made of the bitboards
+    `first` and `second` (packed as ``first | second << CELL_COUNT``), and
+    the transform that maps the position onto it.
+    """
+    best_key = first | second << CELL_COUNT
+    best_transform = 0
+    for t in range(1, TRANSFORM_COUNT):
+        table = TABLES[t]
+        key = table[first] | table[second] << CELL_COUNT
+        if key < best_key:
+            best_key = key
+            best_transform = t
+    return best_key, best_transform
+
+
+def canonical(first, second):
+    """ Returns the canonical form of a position as `(first, second,
+    transform)`.
+    """
+    key, t = canonical_key(first, second)
+    return key & FULL_MASK, key >> CELL_COUNT, t
+
+
+def map_cell(cell, t):
+    """ Returns where `cell` lands under transform `t`. """
+    return PERMUTATIONS[t][cell]
+
+
+def unmap_cell(cell, t):
+    """ Maps `cell` back through the inverse of transform `t`, e.g. to turn
+    a move found on the canonical board into a move on the original one.
+    """
+    return PERMUTATIONS[INVERSE[t]][cell]
@@ -0,0 +1,66 @@
+"""Module tests for the streaming position analyzer"""
+
+import io
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import analyze as analyze_module  # noqa: E402
+from analyze import analyze, analyze_block, read_blocks  # noqa: E402
+
+POSITIONS = b"""XO-X-O---
+XXXOO----
+xo-\r
+XOXXOOOXX
+XOXXOOOX-
+XXOOX-O--
+XXXOOO---
+
+XX-------
+"""
+
+
+def test_analyze_block():
+    """ Ensures each line gets its state, winner, best move and value,
+    and malformed or unreachable lines are reported as invalid.
+    """
+    lines = analyze_block(POSITIONS).decode().splitlines()
+    assert [line.split('\t') for line in lines] == [
+        ['XO-X-O---', 'Playing', '-', '2,0', '5'],
+        ['XXXOO----', 'Finished', 'X', '-', '-5'],
+        ['xo-', 'Invalid', '-', '-', '-'],
+        ['XOXXOOOXX', "Cat's Game", '-', '-', '0'],
+        ['XOXXOOOX-', "Cat's Game", '-', '-', '0'],
+        ['XXOOX-O--', 'Playing', '-', '2,2', '3'],
+        ['XXXOOO---', 'Invalid', '-', '-', '-'],
+        ['', 'Invalid', '-', '-', '-'],
+        ['XX-------', 'Invalid', '-', '-', '-'],
+    ]
+
+
+def test_blocks_split_on_lines():
+    """ Ensures streamed and mapped input give the same output whatever
+    the block size, one line per position.
+    """
+    expected = analyze_block(POSITIONS)
+    for block_size in (1, 7, 10, 33, 1000):
+        blocks = list(read_blocks(POSITIONS, block_size))
+        assert b''.join(blocks) == POSITIONS
+        assert all(block.endswith(b'\n') for block in blocks)
+        output = io.BytesIO()
+        analyze(io.BytesIO(POSITIONS), output, block_size=block_size)
+        assert output.getvalue() == expected
+
+
+def test_missing_book_is_an_error(monkeypatch, capsys):
+    """ Ensures positions aren't all reported as invalid when the opening
+    book is missing: the analyzer stops with an error instead.
+    """
+    monkeypatch.setattr(analyze_module, 'get_book', lambda: None)
+    monkeypatch.setattr(analyze_module, '_answers', None)
+    with pytest.raises(RuntimeError, match='opening book'):
+        analyze_block(POSITIONS)
+    with pytest.raises(SystemExit):
+        analyze_module.main(['-'])
+    assert 'opening book' in capsys.readouterr().err
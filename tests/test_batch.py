@@ -0,0 +1,63 @@
+"""Module tests for vectorized batch evaluation"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import batch  # noqa: E402
+from board import Board, BoardState, Player, MultipleWinError  # noqa: E402
+from book import position_from_index, POSITION_COUNT  # noqa: E402
+
+
+def test_matches_board_for_every_layout():
+    """ Ensures state, winner and current player agree with `Board` for all
+    3 ** 9 cell layouts, including invalid ones.
+    """
+    boards = []
+    for index in range(POSITION_COUNT):
+        x_bits, o_bits = position_from_index(index)
+        board = Board()
+        for cell in range(9):
+            if x_bits >> cell & 1:
+                board.board[cell // 3][cell % 3] = Player.PLAYER_X
+            elif o_bits >> cell & 1:
+                board.board[cell // 3][cell % 3] = Player.PLAYER_O
+        boards.append(board)
+
+    result = batch.evaluate(batch.from_boards(boards))
+    for i, board in enumerate(boards):
+        try:
+            state = board.get_state()
+        except MultipleWinError:
+            state = None
+        assert batch.STATES[result.state[i]] == state
+        assert batch.PLAYERS[result.winner[i]] == board.get_winner()
+        assert batch.PLAYERS[result.current_player[i]] == board.get_current_player()
+
+
+def test_legal_moves_and_states():
+    """ Ensures legal moves are the empty cells, and each state is reported
+    for the expected rows.
+    """
+    boards = np.array([
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],  # empty
+        [1, 1, 1, 2, 2, 0, 0, 0, 0],  # X wins
+        [2, 1, 2, 1, 2, 0, 1, 2, 1],  # Cat's game (no clear span)
+        [1, 1, 1, 2, 2, 2, 0, 0, 0],  # multiple wins
+        [1, 0, 0, 0, 7, 0, 0, 0, 0],  # bad cell code
+    ], dtype=np.int8)
+    result = batch.evaluate(boards)
+    assert result.state.tolist() == [
+        batch.PLAYING, batch.FINISHED, batch.CATS_GAME, batch.INVALID, batch.INVALID
+    ]
+    assert batch.STATES[result.state[2]] == BoardState.CATS_GAME
+    assert result.winner.tolist()[:2] == [batch.EMPTY, batch.X]
+    assert result.legal_moves[0].all()
+    assert result.legal_moves[1].tolist() == [False] * 5 + [True] * 4
+
+
+def test_rejects_bad_shape():
+    """ Ensures a batch that isn't (N, 9) is rejected.
+    """
+    with pytest.raises(ValueError):
+        batch.evaluate(np.zeros((2, 3), dtype=np.int8))
@@ -0,0 +1,42 @@
+"""Module tests for the benchmark suite"""
+
+import logging
+
+from benchmarks import suite
+
+
+def test_run_restores_log_levels():
+    """ Ensures a quick run times a case at every log level, and leaves
+    the loggers as they were.
+    """
+    logger = logging.getLogger('board')
+    level, handlers = logger.level, list(logger.handlers)
+    results = suite.run(['get_state'], repeat_count=1, min_time=0.001)
+    assert set(results['results']) == {'get_state[production]', 'get_state[debug]'}
+    assert all(result['ns_per_op'] > 0 for result in results['results'].values())
+    assert (logger.level, logger.handlers) == (level, handlers)
+
+
+def test_compare_flags_regressions():
+    """ Ensures only cases slower than the threshold are regressions, and
+    cases missing from the baseline are skipped.
+    """
+    def results(**timings):
+        return {'results': {key: {'ns_per_op': ns} for key, ns in timings.items()}}
+
+    baseline = results(a=100, b=100)
+    rows, regressions = suite.compare(results(a=120, b=130, c=500), baseline, 0.25)
+    assert [row[0] for row in rows] == ['a', 'b']
+    assert regressions == ['b']
+
+
+def test_baseline_covers_every_case():
+    """ Ensures the shipped baseline has every case at every log level, so
+    a default run is compared against it in full.
+    """
+    baseline = suite.load_results()
+    keys = {f'{name}[{level}]' for name in suite.CASES for level in suite.LEVELS}
+    assert set(baseline['results']) == keys
+    results = suite.run(['get_state'], repeat_count=1, min_time=0.001)
+    rows, _ = suite.compare(results, baseline)
+    assert [row[0] for row in rows] == ['get_state[production]', 'get_state[debug]']
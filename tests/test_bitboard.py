@@ -0,0 +1,89 @@
+"""Module tests for the bitboard encoding"""
+
+import pytest
+
+from bitboard import SPAN_NAMES, WIN_MASKS, POPCOUNT, DEFAULT_GEOMETRY, get_geometry
+from bitboard import cell_index, iter_cells, is_win, has_clear_span, popcount
+
+
+def test_win_masks():
+    """ Ensures there are eight win lines of three cells each, in the
+    order `Board` reports them.
+    """
+    assert len(WIN_MASKS) == 8
+    assert all(POPCOUNT[mask] == 3 for mask in WIN_MASKS)
+    assert SPAN_NAMES[:2] == ('row 0', 'col 0')
+    assert SPAN_NAMES[-2:] == ('diag f', 'diag b')
+
+
+def test_is_win():
+    """ Ensures a completed diagonal is a win and a broken one is not.
+    """
+    diagonal = sum(1 << cell_index(i, i) for i in range(3))
+    assert is_win(diagonal)
+    assert not is_win(diagonal & ~(1 << cell_index(1, 1)))
+
+
+def test_iter_cells():
+    """ Ensures set cells are yielded lowest first.
+    """
+    assert list(iter_cells(0b100010001)) == [0, 4, 8]
+
+
+def test_has_clear_span():
+    """ Ensures a board blocked on every line has no clear span.
+    """
+    # O X O
+    # X O X
+    # X O X
+    o_bits = 0b010010101
+    x_bits = 0b101101010
+    assert not has_clear_span(x_bits, o_bits)
+    assert has_clear_span(x_bits & ~1, o_bits & ~1)
+
+
+def test_geometry_lines():
+    """ Ensures a larger board has every k-in-a-row window as a line, named
+    by its first cell when it doesn't span the whole row or column.
+    """
+    geometry = get_geometry(4, 4, 3)
+    assert len(geometry.win_masks) == 24
+    assert all(popcount(mask) == 3 for mask in geometry.win_masks)
+    assert 'row 0:1' in geometry.span_names
+    assert get_geometry(15, 15, 5) is get_geometry(15, 15, 5)
+    assert get_geometry() is DEFAULT_GEOMETRY
+
+
+def test_geometry_rejects_bad_win_lengths():
+    """ Ensures a win length of one, which would make every mark a win on
+    both its row and its column, or one longer than the board is refused.
+    """
+    for win_length in (0, 1, 4):
+        with pytest.raises(ValueError):
+            get_geometry(3, 3, win_length)
+    assert get_geometry(1, 3, 2).win_masks == (0b011, 0b110)
+
+
+def test_geometry_candidate_cells():
+    """ Ensures large boards only offer cells next to existing marks, or
+    the center on an empty board.
+    """
+    geometry = get_geometry(15, 15, 5)
+    assert list(iter_cells(geometry.candidate_cells(0))) == [geometry.cell_index(7, 7)]
+    corner = 1 << geometry.cell_index(0, 0)
+    assert sorted(iter_cells(geometry.candidate_cells(corner))) == [
+        geometry.cell_index(0, 1), geometry.cell_index(1, 0), geometry.cell_index(1, 1)
+    ]
+
+
+def test_mask_cells_are_shared():
+    """ Ensures the cells of a mask are listed lowest first, from a shared
+    table on small boards and computed on large ones.
+    """
+    mask = 0b101010001
+    assert DEFAULT_GEOMETRY.mask_cells(mask) == (0, 4, 6, 8)
+    assert DEFAULT_GEOMETRY.mask_cells(mask) is DEFAULT_GEOMETRY.mask_cells(mask)
+    assert DEFAULT_GEOMETRY.mask_squares(mask) == ((0, 0), (1, 1), (2, 0), (2, 2))
+    geometry = get_geometry(15, 15, 5)
+    assert geometry.mask_cells(1 << 200 | 1) == (0, 200)
+    assert geometry.mask_squares(1 << 200) == (geometry.cell_coords(200),)
@@ -3,8 +3,8 @@
 import pytest
 
 from loggers import board_logger
-from board import Board, BoardState, Player
-from board import MultipleWinError, InvalidMoveError
+from board import Board, BoardState, Player, Strategy
+from board import MultipleWinError, InvalidMoveError, INVALID
 
 
 def test_single_cell_no_win():
@@ -169,3 +169,164 @@ def test_invalid_move_error():
         board = Board()
         board.select_cell(0, 1)
         board.select_cell(0, 1)
+
+
+def test_board_view_writes_through():
+    """ Ensures cells written through `board.board` land in the bitboards
+    and are read back unchanged.
+    """
+    board = Board()
+    board.board[1] = Player.PLAYER_X, None, Player.PLAYER_O
+    board.board[2][2] = Player.PLAYER_X
+    assert board.board[1] == [Player.PLAYER_X, None, Player.PLAYER_O]
+    assert board.board == [[None] * 3, [Player.PLAYER_X, None, Player.PLAYER_O],
+                           [None, None, Player.PLAYER_X]]
+    assert board.board != [[None] * 3] * 3
+    assert board.board != None  # noqa: E711
+    assert board.board[2][2] is Player.PLAYER_X
+    assert board.x_bits == 0b100001000
+    assert board.o_bits == 0b000100000
+    assert board.counter == 3
+    assert board.get_current_player() == Player.PLAYER_O
+    assert repr(board) == 'Board State:\n---\nX-O\n--X\n\n\n'
+
+
+def test_state_follows_cell_changes():
+    """ Ensures the tracked state is updated when cells are overwritten or
+    cleared, not only when they are first played.
+    """
+    board = Board()
+    board.board[0] = [Player.PLAYER_X] * 3
+    assert board.get_state() == BoardState.FINISHED
+    assert board.get_winner() == Player.PLAYER_X
+    assert board.winning_span == 'row 0'
+
+    board.board[0][1] = Player.PLAYER_O
+    assert board.get_state() == BoardState.PLAYING
+    assert board.get_winner() is None
+
+    board.board[0][1] = None
+    assert board.counter == 2
+    assert board.get_current_player() == Player.PLAYER_O
+
+
+def test_larger_board():
+    """ Ensures a 5x5 board with four in a row is won by four marks in a
+    row, and not by three.
+    """
+    board = Board(5, 5, 4)
+    for column in range(3):
+        board.select_cell(2, column + 1)
+        board.select_cell(4, column)
+    assert board.get_state() == BoardState.PLAYING
+    board.select_cell(2, 4)
+    assert board.get_state() == BoardState.FINISHED
+    assert board.get_winner() == Player.PLAYER_X
+    assert board.winning_span == 'row 2:1'
+
+
+def test_larger_board_heuristic():
+    """ Ensures the heuristic on a larger board blocks an open line.
+    """
+    board = Board(6, 6, 4)
+    for row, column in ((0, 0), (3, 1), (5, 5), (3, 2), (5, 0), (3, 3)):
+        board.select_cell(row, column)
+    board.make_best_move(Strategy.HEURISTIC)
+    assert Player.PLAYER_X in (board.board[3][0], board.board[3][4])
+
+
+def test_double_line_move_is_multiple_win():
+    """ Ensures one move completing two spans at once makes the board
+    invalid, as any other board with several complete spans.
+    """
+    board = Board()
+    board.board[0] = Player.PLAYER_X, Player.PLAYER_X, None
+    board.board[1] = Player.PLAYER_O, Player.PLAYER_O, Player.PLAYER_X
+    board.board[2] = Player.PLAYER_O, None, Player.PLAYER_X
+    board.board[0][2] = Player.PLAYER_X
+    with pytest.raises(MultipleWinError):
+        board.get_state()
+    assert board.get_state_code() == INVALID
+    assert board.get_winning_cells() == [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2)]
+
+
+def test_get_best_move_does_not_play():
+    """ Ensures `get_best_move` returns the move `make_best_move` plays,
+    without changing the board, and None once the game is over.
+    """
+    board = Board()
+    board.select_cell(0, 0)
+    move = board.get_best_move()
+    assert board.board[move[0]][move[1]] is None
+    board.make_best_move()
+    assert board.board[move[0]][move[1]] is Player.PLAYER_O
+
+    board = Board()
+    board.board[0] = [Player.PLAYER_X] * 3
+    assert board.get_best_move() is None
+
+
+def test_push_pop():
+    """ Ensures moves can be taken back, restoring the state, winner and
+    current player, in order.
+    """
+    board = Board()
+    moves = [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]
+    for move in moves:
+        board.push(move)
+    assert board.get_winner() is Player.PLAYER_X
+    assert board.pop() == (0, 2)
+    assert board.get_state() == BoardState.PLAYING
+    assert board.get_winner() is None
+    assert board.get_current_player() is Player.PLAYER_X
+    for move in reversed(moves[:-1]):
+        assert board.pop() == move
+    assert board.x_bits == board.o_bits == board.counter == 0
+    with pytest.raises(IndexError):
+        board.pop()
+
+
+def test_copy():
+    """ Ensures a copy has the same position and state, and is independent
+    of the original.
+    """
+    board = Board(4, 4, 3)
+    board.select_cell(1, 1)
+    board.make_best_move(Strategy.HEURISTIC)
+    copy = board.copy()
+    assert (copy.x_bits, copy.o_bits, copy.get_current_player()) == (
+        board.x_bits, board.o_bits, board.get_current_player())
+    copy.select_cell(3, 3)
+    assert board.board[3][3] is None
+    assert not hasattr(board, '__dict__')
+
+
+def test_legal_moves():
+    """ Ensures the legal moves come in row-major order in each form, and
+    the tuple form is shared rather than built per call.
+    """
+    board = Board()
+    board.select_cell(1, 1)
+    board.select_cell(0, 0)
+    moves = board.get_legal_moves()
+    assert moves == ((0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2))
+    assert board.get_legal_moves() is moves
+    assert board.get_available_squares() == list(moves)
+    assert list(board.iter_available_squares()) == list(moves)
+
+
+def test_player_and_state_codes():
+    """ Ensures the integer codes agree with the enums at the API edge.
+    """
+    from board import X, O, PLAYING, FINISHED
+
+    assert Player.get_foe(Player.PLAYER_X) is Player.PLAYER_O
+    assert Player.get_foe(Player.PLAYER_O) is Player.PLAYER_X
+    board = Board()
+    assert (board.get_current_player_code(), board.get_state_code()) == (X, PLAYING)
+    for move in ((0, 0), (1, 0), (0, 1), (1, 1)):
+        board.select_cell(*move)
+    assert board.get_current_player_code() == X == 3 - O
+    board.select_cell(0, 2)
+    assert (board.get_state_code(), board.get_winner_code()) == (FINISHED, X)
+    assert board.get_winner() is Player.PLAYER_X
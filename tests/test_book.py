@@ -0,0 +1,56 @@
+"""Module tests for the opening book"""
+
+import book
+from board import Board, BoardState
+from engine import negamax
+
+
+def test_shipped_book_is_current():
+    """ Ensures `book.bin` matches a fresh build, so engine changes can't
+    leave a stale book behind.
+    """
+    assert book.BOOK_PATH.read_bytes() == book.build()
+
+
+def test_book_covers_reachable_positions():
+    """ Ensures the book has an entry for each of the 5,478 positions
+    reachable from the empty board, and nothing else.
+    """
+    opening_book = book.get_book()
+    positions = 0
+    for index in range(book.POSITION_COUNT):
+        positions += book.position_from_index(index) in opening_book
+    assert positions == 5478
+
+
+def test_book_values_match_search():
+    """ Ensures the stored value of a position equals the searched one,
+    and the stored move keeps that value.
+    """
+    opening_book = book.get_book()
+    # X - -
+    # - O -
+    # - - X
+    x_bits, o_bits = 0b100000001, 0b000010000
+    value = opening_book.get_value(x_bits, o_bits)
+    assert value == negamax(o_bits, x_bits)
+    move = opening_book.get_move(x_bits, o_bits)
+    assert -negamax(x_bits, o_bits | 1 << move) == value
+
+
+def test_missing_book(tmp_path):
+    """ Ensures a missing or corrupt book file is reported as unavailable.
+    """
+    assert book.load(tmp_path / 'missing.bin') is None
+    corrupt = tmp_path / 'corrupt.bin'
+    corrupt.write_bytes(b'not a book')
+    assert book.load(corrupt) is None
+
+
+def test_book_game_is_cats_game():
+    """ Ensures self-play from the book ends in a draw.
+    """
+    board = Board()
+    while board.get_state() is BoardState.PLAYING:
+        board.make_best_move()
+    assert board.get_state() == BoardState.CATS_GAME
@@ -0,0 +1,62 @@
+"""Module tests for the search engine"""
+
+from board import Board, BoardState, Player, Strategy
+from engine import negamax, best_move
+
+
+def _copy(board):
+    """ Returns a new `Board` with the same cells as `board`. """
+    copy = Board()
+    for row in range(3):
+        copy.board[row] = board.board[row]
+    return copy
+
+
+def _never_loses(board, ai_player):
+    """ Plays every possible opponent reply against the perfect AI and
+    returns False if any line of play ends in a loss for the AI.
+    """
+    state = board.get_state()
+    if state is not BoardState.PLAYING:
+        return board.get_winner() in (None, ai_player)
+    if board.get_current_player() is ai_player:
+        board.make_best_move()
+        return _never_loses(board, ai_player)
+    for row, col in board.get_available_squares():
+        reply = _copy(board)
+        reply.select_cell(row, col)
+        if not _never_loses(reply, ai_player):
+            return False
+    return True
+
+
+def test_empty_board_is_draw():
+    """ Ensures the game-theoretic value of the empty board is a draw.
+    """
+    assert negamax(0, 0) == 0
+
+
+def test_takes_immediate_win():
+    """ Ensures the engine completes a line instead of blocking.
+    """
+    # X X -
+    # O O -
+    # - - -
+    assert best_move(0b000000011, 0b000011000) == 2
+
+
+def test_perfect_never_loses():
+    """ Ensures the perfect strategy never loses, as X or as O, against
+    every possible sequence of opponent moves.
+    """
+    for ai_player in (Player.PLAYER_X, Player.PLAYER_O):
+        assert _never_loses(Board(), ai_player)
+
+
+def test_heuristic_strategy():
+    """ Ensures the original heuristic is still selectable, and still
+    prefers an edge on an empty board.
+    """
+    board = Board()
+    board.make_best_move(Strategy.HEURISTIC)
+    assert board.board[1][0] is Player.PLAYER_X
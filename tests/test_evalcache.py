@@ -0,0 +1,100 @@
+"""Module tests for the shared evaluation cache"""
+
+import threading
+
+import pytest
+
+import evalcache
+from board import Board, Strategy
+from evalcache import EvaluationCache, get_cache
+from game import Game
+
+
+def test_evicts_least_recently_used():
+    """ Ensures the cache stays within its bound, evicting the entry used
+    longest ago, and counts hits, misses and evictions.
+    """
+    cache = EvaluationCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'evictions': 1, 'size': 2, 'maxsize': 2}
+
+    cache.resize(1)
+    assert len(cache) == 1 and 'c' in cache
+    with pytest.raises(ValueError):
+        cache.resize(-1)
+
+
+def test_zero_size_disables_caching():
+    """ Ensures a cache of size 0 computes every time. """
+    cache = EvaluationCache(0)
+    calls = []
+    assert cache.get_or_compute('a', lambda: calls.append(1) or 5) == 5
+    assert cache.get_or_compute('a', lambda: calls.append(1) or 5) == 5
+    assert len(calls) == 2 and len(cache) == 0
+
+
+def test_games_share_cached_moves():
+    """ Ensures games use the process-wide cache, and that a cached choice
+    is the move the strategy picks.
+    """
+    cache = get_cache()
+    cache.clear()
+    first, second = Game(rows=4, columns=4, win_length=3), Game(rows=4, columns=4, win_length=3)
+    assert first.cache is second.cache is cache
+    for game in first, second:
+        game.board.select_cell(1, 1)
+        game.make_best_move(Strategy.HEURISTIC)
+    assert cache.stats()['hits'] == 1
+    assert first.board.x_bits == second.board.x_bits
+    assert first.board.o_bits == second.board.o_bits
+
+    board = Board(4, 4, 3)
+    board.select_cell(1, 1)
+    board.select_cell(2, 2)
+    assert (board.get_best_move(Strategy.PERFECT, cache=cache)
+            == board.get_best_move(Strategy.PERFECT, cache=cache)
+            == board.get_best_move(Strategy.PERFECT))
+    cache.clear()
+
+
+def test_concurrent_access_stays_bounded():
+    """ Ensures threads updating the cache at once keep it within its bound
+    and account for every lookup.
+    """
+    cache = EvaluationCache(50)
+
+    def work(offset):
+        for key in range(200):
+            cache.get_or_compute((offset + key) % 120, lambda: key)
+
+    threads = [threading.Thread(target=work, args=(offset,)) for offset in range(0, 80, 10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats['size'] <= 50
+    assert stats['hits'] + stats['misses'] == 8 * 200
+
+
+def test_configure_cache_reads_environment(monkeypatch):
+    """ Ensures `configure_cache` sizes the shared cache from the
+    environment, and leaves it alone when the variable isn't set.
+    """
+    cache = get_cache()
+    maxsize = cache.maxsize
+    try:
+        monkeypatch.setenv(evalcache.CACHE_SIZE_VARIABLE, '10')
+        assert evalcache.configure_cache() is cache
+        assert cache.maxsize == 10
+        monkeypatch.delenv(evalcache.CACHE_SIZE_VARIABLE)
+        evalcache.configure_cache()
+        assert cache.maxsize == 10
+    finally:
+        cache.resize(maxsize)
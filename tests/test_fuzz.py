@@ -0,0 +1,86 @@
+"""Module tests for the differential backend harness"""
+
+import random
+
+import fuzz
+from bitboard import DEFAULT_GEOMETRY
+from board import CATS_GAME, FINISHED, INVALID, PLAYING, X
+
+
+def observe_late_cats(geometry, positions):
+    """ The naive backend, but only calling a Cat's Game on a full board. """
+    observations = fuzz.observe_naive(geometry, positions)
+    return [
+        observation._replace(state=PLAYING)
+        if observation.state == CATS_GAME and observation.legal else observation
+        for observation in observations
+    ]
+
+
+def observe_shared_cell_wins(geometry, positions):
+    """ The naive backend, but calling complete lines a win rather than
+    invalid when they are the winner's and share a cell. """
+    observations = []
+    for (x_bits, o_bits), observation in zip(positions,
+                                             fuzz.observe_naive(geometry, positions)):
+        if observation.state == INVALID:
+            bits = x_bits if observation.winner == X else o_bits
+            shared = geometry.full_mask
+            for mask in geometry.win_masks:
+                if x_bits & mask == mask or o_bits & mask == mask:
+                    shared &= mask if bits & mask == mask else 0
+            if shared:
+                observation = observation._replace(state=FINISHED)
+        observations.append(observation)
+    return observations
+
+
+def test_builtin_backends_match_reference():
+    """ Ensures every built-in backend agrees with the reference `Board` on
+    all reachable 3x3 positions and random illegal ones.
+    """
+    count, mismatches = fuzz.run(list(fuzz.BACKENDS), random_count=3000, workers=1)
+    assert count == 5478 + 3000
+    assert mismatches == []
+
+
+def test_catches_divergent_backend(monkeypatch):
+    """ Ensures a backend missing the early Cat's Game is reported, with
+    the field it got wrong.
+    """
+    monkeypatch.setitem(fuzz.BACKENDS, 'late-cats', observe_late_cats)
+    _, mismatches = fuzz.run(['late-cats'], random_count=0, workers=1)
+    assert mismatches
+    assert {mismatch.field for mismatch in mismatches} == {'state'}
+    assert all(mismatch.expected == CATS_GAME for mismatch in mismatches)
+
+
+def test_random_positions_include_illegal_ones():
+    """ Ensures the random positions cover layouts no game reaches. """
+    reachable = set(fuzz.reachable_positions(DEFAULT_GEOMETRY))
+    positions = fuzz.random_positions(DEFAULT_GEOMETRY, 500, random.Random(0))
+    assert sum(position not in reachable for position in positions) > 250
+    assert (fuzz.observe_naive(DEFAULT_GEOMETRY, [(0b111111000, 0b000000111)])[0].state
+            == fuzz.INVALID)
+
+
+def test_parallel_run_matches_inline():
+    """ Ensures a sweep split across worker processes checks the same
+    positions, on a larger board.
+    """
+    arguments = dict(rows=4, columns=4, win_length=3, random_count=200, limit=300,
+                     chunk_size=100)
+    inline = fuzz.run(['incremental', 'naive'], workers=1, **arguments)
+    pooled = fuzz.run(['incremental', 'naive'], workers=2, **arguments)
+    assert inline == pooled == (500, [])
+
+
+def test_catches_double_line_wins(monkeypatch):
+    """ Ensures a backend treating a move that completes two lines as a
+    win, instead of a `MultipleWinError`, is caught on reachable positions.
+    """
+    monkeypatch.setitem(fuzz.BACKENDS, 'shared-cell', observe_shared_cell_wins)
+    _, mismatches = fuzz.run(['shared-cell'], random_count=0, workers=1)
+    assert mismatches
+    assert {(mismatch.field, mismatch.expected, mismatch.actual)
+            for mismatch in mismatches} == {('state', INVALID, FINISHED)}
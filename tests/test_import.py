@@ -0,0 +1,47 @@
+"""Module tests (and benchmarks) importing the game modules"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_PATH = Path(__file__).parent.parent
+
+# generous, so slow CI machines pass; a clean import takes ~30ms
+IMPORT_TIME_BUDGET = 0.25
+
+IMPORT_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import board, game
+print(time.perf_counter() - start)
+print('yaml' in sys.modules, 'logging.config' in sys.modules)
+'''
+
+
+def _import_in_subprocess(cwd):
+    env = dict(os.environ, PYTHONPATH=str(REPO_PATH))
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_SCRIPT],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+    elapsed, modules = result.stdout.splitlines()
+    return float(elapsed), modules
+
+
+def test_import_has_no_side_effects(tmp_path):
+    """ Ensures importing `board` and `game` from another directory works,
+    creates no files and doesn't load the logging config.
+    """
+    _, modules = _import_in_subprocess(tmp_path)
+    assert modules == 'False False'
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_import_time(tmp_path):
+    """ Ensures importing `board` and `game` in a fresh interpreter stays
+    within `IMPORT_TIME_BUDGET` (best of three runs).
+    """
+    best = min(_import_in_subprocess(tmp_path)[0] for _ in range(3))
+    print(f'import board, game: {best * 1000:.1f}ms')
+    assert best < IMPORT_TIME_BUDGET
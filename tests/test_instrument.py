@@ -0,0 +1,73 @@
+"""Module tests for the instrumentation hooks"""
+
+import pytest
+
+import engine
+import instrument
+from board import Board, Strategy
+
+
+@pytest.fixture
+def instrumented():
+    instrument.reset()
+    instrument.enable()
+    yield instrument
+    instrument.disable()
+    instrument.reset()
+
+
+def test_disabled_runs_original_code():
+    """ Ensures enabling wraps the hot paths and disabling restores the
+    very same functions.
+    """
+    originals = Board.select_cell, Board.make_best_move, Board.get_best_move, engine.negamax
+    instrument.enable()
+    try:
+        assert Board.select_cell is not originals[0]
+        assert Board.get_best_move is not originals[2]
+        assert engine.negamax is not originals[3]
+    finally:
+        instrument.disable()
+    assert (Board.select_cell, Board.make_best_move, Board.get_best_move,
+            engine.negamax) == originals
+
+
+def test_counts_search_per_move(instrumented):
+    """ Ensures a searched move records its nodes, table probes, state
+    evaluations and latency, and `select_cell` its latency.
+    """
+    board = Board(4, 4, 3)
+    board.select_cell(1, 1)
+    board.make_best_move(Strategy.PERFECT)
+
+    stats = instrumented.stats()
+    last_move = stats['last_move']
+    assert last_move['nodes'] > 0
+    # one probe per node, and one or two by `engine.best_move` itself
+    probes = last_move['tt_hits'] + last_move['tt_misses']
+    assert last_move['nodes'] < probes <= last_move['nodes'] + 2
+    assert last_move['evaluations'] == 1
+    assert last_move['seconds'] > 0
+    assert stats['counters']['evaluations'] == 2
+    assert stats['latency']['select_cell']['count'] == 1
+    assert stats['latency']['best_move']['count'] == 1
+
+    # the server's path: a move picked by `get_best_move`, then played
+    board.select_cell(*board.get_best_move(Strategy.PERFECT))
+    stats = instrumented.stats()
+    last_move = stats['last_move']
+    assert last_move['tt_hits'] + last_move['tt_misses'] > 0
+    assert last_move['seconds'] > 0
+    assert stats['latency']['best_move']['count'] == 2
+    assert stats['latency']['select_cell']['count'] == 2
+
+
+def test_histogram_percentiles():
+    """ Ensures durations land in power-of-two microsecond buckets. """
+    histogram = instrument.Histogram()
+    for microseconds in (1, 3, 3, 100):
+        histogram.record(microseconds / 1e6)
+    summary = histogram.summary()
+    assert summary['buckets'] == {2: 1, 4: 2, 128: 1}
+    assert summary['p50'] == 4e-6
+    assert summary['max'] == summary['p99'] == 100e-6
@@ -0,0 +1,43 @@
+"""Module tests for logging configuration"""
+
+import logging
+import logging.handlers
+from pathlib import Path
+
+from board import Board
+from loggers import configure_logging, shutdown_logging, board_logger
+from loggers import LOG_LEVEL_VARIABLE
+
+CONFIG_PATH = Path(__file__).parent.parent / 'logging.yaml'
+
+
+def test_production_mode_by_default(tmp_path, monkeypatch):
+    """ Ensures debug logging is off unless asked for, and nothing is
+    written for a game played in production mode.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(LOG_LEVEL_VARIABLE, raising=False)
+    configure_logging(path=CONFIG_PATH)
+    assert not board_logger.isEnabledFor(logging.DEBUG)
+
+    board = Board()
+    board.make_best_move()
+    board.get_available_squares()
+    shutdown_logging()
+    assert not (tmp_path / 'board.log').exists()
+
+
+def test_debug_goes_through_queue(tmp_path, monkeypatch):
+    """ Ensures debug output is handed to a queue and still reaches the
+    log file, with the board formatted as it was when logged.
+    """
+    monkeypatch.chdir(tmp_path)
+    configure_logging('DEBUG', path=CONFIG_PATH)
+    assert isinstance(board_logger.handlers[0], logging.handlers.QueueHandler)
+    board = Board()
+    board.make_best_move()
+    board.select_cell(0, 0)
+    shutdown_logging()
+    log = (tmp_path / 'ai.log').read_text()
+    configure_logging('WARNING', path=CONFIG_PATH)
+    assert 'Make best move: Board State:\n---\n---\n---' in log
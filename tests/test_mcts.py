@@ -0,0 +1,58 @@
+"""Module tests for the Monte Carlo Tree Search player"""
+
+import random
+
+import pytest
+
+from bitboard import get_geometry
+from board import Board, Player, Strategy
+from game import Game
+from mcts import MonteCarloTree
+
+
+def test_takes_win_and_blocks():
+    """ Ensures the search finds an immediate win, and blocks one.
+    """
+    tree = MonteCarloTree(iterations=500)
+    # X: X X -   O: - - -
+    #    O O -      ...
+    assert tree.best_move(0b000000011, 0b000011000, random.Random(0)) == 2
+    tree.reset()
+    # O to move must block X's top row
+    assert tree.best_move(0b000010000, 0b000000011, random.Random(0)) == 2
+
+
+def test_reuses_tree_between_moves():
+    """ Ensures the tree grown for one move is kept for the next one, and
+    dropped for a new game.
+    """
+    game = Game(rows=7, columns=7, win_length=4)
+    tree = game.searches[Strategy.MCTS]
+    tree.iterations = 200
+    rng = random.Random(0)
+    game.make_best_move(Strategy.MCTS, rng)
+    game.make_best_move(Strategy.MCTS, rng)
+    assert tree.root.visits > 200
+    game.new_game()
+    assert tree.root is None
+
+
+def test_large_board_move():
+    """ Ensures a fresh tree on a large board plays next to existing marks.
+    """
+    board = Board(15, 15, 5)
+    board.select_cell(7, 7)
+    board.make_best_move(Strategy.MCTS, random.Random(0),
+                         MonteCarloTree(board.geometry, iterations=100))
+    (row, column), = [
+        (row, column) for row in range(15) for column in range(15)
+        if board.board[row][column] is Player.PLAYER_O
+    ]
+    assert abs(row - 7) <= 1 and abs(column - 7) <= 1
+
+
+def test_requires_budget():
+    """ Ensures a tree without any budget is rejected.
+    """
+    with pytest.raises(ValueError):
+        MonteCarloTree(get_geometry(), iterations=None, time_limit=None)
@@ -0,0 +1,61 @@
+"""Module tests for the multi-process searches"""
+
+import random
+
+from bitboard import get_geometry
+from board import Board, Player, Strategy
+from engine import negamax
+from parallel import SharedTable, ParallelSearch, ParallelMonteCarlo
+
+
+def test_shared_table():
+    """ Ensures entries round-trip through shared memory, another process's
+    view of the block sees them, and unknown keys (including 0) miss.
+    """
+    table = SharedTable(1 << 8)
+    try:
+        assert table.get(0) is None
+        table[12345] = (-7, 2, 4)
+        view = SharedTable(1 << 8, table.name)
+        assert view.get(12345) == (-7, 2, 4)
+        assert view.get(12345 + (1 << 8)) is None
+        view.close()
+        table.clear()
+        assert table.get(12345) is None
+    finally:
+        table.close()
+
+
+def test_parallel_search_is_optimal():
+    """ Ensures the root-split search plays moves as good as the serial
+    search's, on positions with a win, a forced block and a quiet move.
+    """
+    positions = [
+        (0b000010000, 0b000000011),
+        (0b000000001, 0b000010000),
+        (0, 0),
+    ]
+    with ParallelSearch(workers=2) as search:
+        assert search.best_move(0b000000011, 0b000011000) == 2
+        for mine, theirs in positions:
+            move = search.best_move(mine, theirs)
+            assert -negamax(theirs, mine | 1 << move) == negamax(mine, theirs)
+
+
+def test_parallel_search_on_larger_board():
+    """ Ensures a parallel search passed to `Board.make_best_move` takes an
+    open win on a larger board.
+    """
+    board = Board(4, 4, 3)
+    for row, column in ((1, 1), (0, 0), (1, 2), (3, 3)):
+        board.select_cell(row, column)
+    with ParallelSearch(board.geometry, workers=2) as search:
+        board.make_best_move(Strategy.PERFECT, search=search)
+    assert Player.PLAYER_X in (board.board[1][0], board.board[1][3])
+
+
+def test_parallel_monte_carlo():
+    """ Ensures the merged trees find an immediate win.
+    """
+    with ParallelMonteCarlo(get_geometry(), workers=2, iterations=300) as search:
+        assert search.best_move(0b000000011, 0b000011000, random.Random(0)) == 2
@@ -0,0 +1,77 @@
+"""Module tests for the game record store"""
+
+from board import Board, Player, Strategy
+from game import GameOutcome
+from records import RecordLog, RecordWriter, decode_record, encode_record
+from selfplay import run
+
+
+def test_record_round_trip():
+    """ Ensures a record keeps the moves, outcome and strategies. """
+    word = encode_record([4, 0, 8, 2, 6], GameOutcome.LOSE, None, Strategy.MCTS)
+    assert word < 1 << 64
+    record = decode_record(word)
+    assert record.moves == [4, 0, 8, 2, 6]
+    assert (record.outcome, record.x_strategy, record.o_strategy) == (
+        GameOutcome.LOSE, None, Strategy.MCTS)
+    assert decode_record(encode_record([], GameOutcome.WIN)).moves == []
+
+
+def test_log_replay_and_index(tmp_path):
+    """ Ensures games written in batches replay to the same boards, and the
+    index answers queries, and is brought up to date after more writes.
+    """
+    path = tmp_path / 'games.log'
+    board = Board()
+    for move in ((1, 1), (0, 0), (1, 0), (0, 1), (1, 2)):
+        board.push(move)
+    with RecordWriter(path, sync_every=2) as writer:
+        writer.append_board(board, Strategy.PERFECT, Strategy.RANDOM)
+        writer.append([0, 4, 1, 2, 3, 6], GameOutcome.LOSE)
+        writer.append([4, 0, 8], GameOutcome.CATS_GAME)
+
+    with RecordLog(path) as log:
+        assert len(log) == 3
+        record, replayed = next(log.replay())
+        assert record.x_strategy is Strategy.PERFECT
+        assert (replayed.x_bits, replayed.o_bits) == (board.x_bits, board.o_bits)
+        assert replayed.get_winner() is Player.PLAYER_X
+        assert replayed.pop() == (1, 2)
+        assert list(log.query(opening=4)) == [0, 2]
+        assert list(log.query(outcome=GameOutcome.LOSE)) == [1]
+        assert log.count(GameOutcome.WIN, 0) == 0
+
+    with RecordWriter(path) as writer:
+        writer.append([4], GameOutcome.WIN)
+    with RecordLog(path) as log:
+        assert list(log.query(outcome=GameOutcome.WIN, opening=4)) == [0, 3]
+        assert [record.moves for record in log][3] == [4]
+
+
+def test_torn_record_is_dropped(tmp_path):
+    """ Ensures a partly written record is ignored, and overwritten by the
+    next append.
+    """
+    path = tmp_path / 'games.log'
+    with RecordWriter(path) as writer:
+        writer.append([4], GameOutcome.WIN)
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    with RecordLog(path) as log:
+        assert len(log) == 1
+    with RecordWriter(path) as writer:
+        writer.append([0], GameOutcome.LOSE)
+    with RecordLog(path) as log:
+        assert [record.moves for record in log] == [[4], [0]]
+
+
+def test_selfplay_records_games(tmp_path):
+    """ Ensures a self-play run records every game with its strategies. """
+    path = tmp_path / 'games.log'
+    outcomes = run(30, Strategy.RANDOM, Strategy.PERFECT, workers=1, chunk_size=10,
+                   record=path)
+    with RecordLog(path) as log:
+        assert len(log) == 30
+        for outcome, count in outcomes.items():
+            assert log.count(outcome) == count
+        assert all(record.o_strategy is Strategy.PERFECT for record in log)
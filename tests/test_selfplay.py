@@ -0,0 +1,39 @@
+"""Module tests for the self-play runner"""
+
+from board import Strategy
+from game import GameOutcome
+from selfplay import run
+
+
+def test_perfect_play_always_draws():
+    """ Ensures perfect play against itself only produces Cat's Games.
+    """
+    outcomes = run(20, Strategy.PERFECT, Strategy.PERFECT, workers=1)
+    assert outcomes == {GameOutcome.WIN: 0, GameOutcome.LOSE: 0, GameOutcome.CATS_GAME: 20}
+
+
+def test_perfect_never_loses_to_random():
+    """ Ensures neither side loses with perfect play against random moves.
+    """
+    as_x = run(200, Strategy.PERFECT, Strategy.RANDOM, workers=1, chunk_size=50)
+    as_o = run(200, Strategy.RANDOM, Strategy.PERFECT, workers=1, chunk_size=50)
+    assert as_x[GameOutcome.LOSE] == 0
+    assert as_o[GameOutcome.WIN] == 0
+
+
+def test_results_are_independent_of_workers():
+    """ Ensures a seeded run gives the same tallies inline and across a
+    process pool.
+    """
+    inline = run(300, Strategy.RANDOM, Strategy.HEURISTIC, workers=1, chunk_size=40, seed=7)
+    pooled = run(300, Strategy.RANDOM, Strategy.HEURISTIC, workers=2, chunk_size=40, seed=7)
+    assert inline == pooled
+    assert sum(inline.values()) == 300
+
+
+def test_double_line_moves_are_tallied():
+    """ Ensures games ended by a move completing two lines at once (an
+    invalid board for `Board.get_state`) are counted as the mover's win.
+    """
+    outcomes = run(2000, Strategy.RANDOM, Strategy.RANDOM, workers=1, chunk_size=500, seed=1)
+    assert sum(outcomes.values()) == 2000
@@ -0,0 +1,118 @@
+"""Module tests for the multi-session game server"""
+
+import asyncio
+
+from board import Player
+from server import GameServer, Client
+
+
+def _with_server(test, **options):
+    """ Runs `test(server, client)` against a server on a free local port. """
+    async def run():
+        server = GameServer(workers=2, **options)
+        host, port = await server.start('127.0.0.1', 0)
+        client = await Client.connect(host, port)
+        try:
+            await test(server, client)
+        finally:
+            await client.close()
+            await server.close()
+
+    asyncio.run(run())
+
+
+def test_play_game():
+    """ Ensures a move is validated and answered by the AI, and a game
+    played to the end is tallied in its session.
+    """
+    async def test(server, client):
+        response = await client.request(op='new')
+        session = response['session']
+        assert response['board'] == ['---'] * 3
+
+        response = await client.request(op='move', session=session, row=0, column=0)
+        assert response['ok']
+        assert ''.join(response['board']).count('O') == 1
+
+        response = await client.request(op='move', session=session, row=0, column=0)
+        assert not response['ok']
+
+        response = await client.request(op='state', session=session)
+        while response['state'] == 'Playing':
+            index = ''.join(response['board']).index('-')
+            response = await client.request(op='move', session=session,
+                                            row=index // 3, column=index % 3)
+        assert response['winner'] != 'X'
+        assert sum(response['outcomes'].values()) == 1
+
+    _with_server(test)
+
+
+def test_sessions_are_independent():
+    """ Ensures sessions keep separate boards, on larger boards too, and
+    closed sessions are gone.
+    """
+    async def test(server, client):
+        first = (await client.request(op='new'))['session']
+        second = (await client.request(op='new', strategy='heuristic',
+                                       rows=5, columns=5, win_length=4))['session']
+        await client.request(op='move', session=first, row=1, column=1)
+        response = await client.request(op='state', session=second)
+        assert response['board'] == ['-----'] * 5
+        await client.request(op='close', session=second)
+        assert not (await client.request(op='state', session=second))['ok']
+        assert len(server.sessions) == 1
+
+    _with_server(test)
+
+
+def test_bad_requests():
+    """ Ensures malformed requests get an error instead of closing the
+    connection.
+    """
+    async def test(server, client):
+        assert not (await client.request(op='fly'))['ok']
+        for session in ([], {}, None):
+            response = await client.request(op='state', session=session)
+            assert response == {'ok': False, 'error': 'unknown session'}
+        assert not (await client.request(op='new', strategy='psychic'))['ok']
+        assert not (await client.request(op='new', rows=3, columns=3, win_length=4))['ok']
+        assert not (await client.request(op='new', rows=3, columns=3, win_length=1))['ok']
+        assert not (await client.request(op='new', rows=5, columns=5, win_length=4))['ok']
+        assert (await client.request(op='new', strategy='mcts', rows=5, columns=5,
+                                     win_length=4))['ok']
+        session = (await client.request(op='new'))['session']
+        assert not (await client.request(op='move', session=session, row=3, column=0))['ok']
+        assert not (await client.request(op='move', session=session, row='a', column=0))['ok']
+        assert (await client.request(op='state', session=session))['ok']
+
+    _with_server(test)
+
+
+def test_double_line_move_ends_game():
+    """ Ensures a move completing two lines at once ends the game, on an
+    invalid board, instead of breaking the connection.
+    """
+    async def test(server, client):
+        session = (await client.request(op='new'))['session']
+        board = server.sessions[session].game.board
+        board.board[0] = Player.PLAYER_X, Player.PLAYER_X, None
+        board.board[1] = Player.PLAYER_O, Player.PLAYER_O, Player.PLAYER_X
+        board.board[2] = Player.PLAYER_O, Player.PLAYER_O, Player.PLAYER_X
+        response = await client.request(op='move', session=session, row=0, column=2)
+        assert response['ok'] and response['state'] == 'Invalid'
+        response = await client.request(op='move', session=session, row=2, column=1)
+        assert response == {'ok': False, 'error': 'game over'}
+
+    _with_server(test)
+
+
+def test_idle_sessions_are_evicted():
+    """ Ensures sessions unused for the idle timeout are dropped.
+    """
+    async def test(server, client):
+        session = (await client.request(op='new'))['session']
+        await asyncio.sleep(0.3)
+        assert session not in server.sessions
+
+    _with_server(test, idle_timeout=0.1)
@@ -0,0 +1,63 @@
+"""Module tests for the retrograde-analysis solver"""
+
+import solver
+from board import Board, BoardState
+from book import POSITION_COUNT, get_book, position_from_index
+from solver import Result, get_solution
+
+
+def test_shipped_solution_is_current():
+    """ Ensures `solution.bin` matches a fresh solve. """
+    assert solver.SOLUTION_PATH.read_bytes() == solver.build()
+
+
+def test_solution_agrees_with_search():
+    """ Ensures every reachable position's result and distance agree with
+    the search values in the opening book (which score a win by the empty
+    cells left after it, plus one).
+    """
+    solution = get_solution()
+    book = get_book()
+    solved = 0
+    for index in range(POSITION_COUNT):
+        position = position_from_index(index)
+        entry = solution.get(*position)
+        assert (entry is not None) == (position in book)
+        if entry is None:
+            continue
+        solved += 1
+        result, distance = entry
+        value = book.get_value(*position)
+        empties = 9 - bin(position[0] | position[1]).count('1')
+        if result is Result.DRAW:
+            assert (value, distance) == (0, 0)
+        else:
+            sign = 1 if result is Result.WIN else -1
+            assert value == sign * (empties - distance + 1)
+    assert solved == 5478
+
+
+def test_best_moves_play_perfectly():
+    """ Ensures the empty board is a draw, and following `best_moves`
+    ends in a Cat's Game.
+    """
+    solution = get_solution()
+    board = Board()
+    assert solution.lookup(board) == (Result.DRAW, 0)
+    while board.get_state() is BoardState.PLAYING:
+        x_to_move = board.counter % 2 == 0
+        move = solution.best_moves(board.x_bits, board.o_bits, x_to_move)[0]
+        board.select_cell(*board.geometry.cell_coords(move))
+    assert board.get_state() is BoardState.CATS_GAME
+
+
+def test_forced_win_distance():
+    """ Ensures a position with a win in one is labelled so, and the
+    winning move is the only best move.
+    """
+    # X X -
+    # O O -
+    # - - -
+    solution = get_solution()
+    assert solution.get(0b000000011, 0b000011000) == (Result.WIN, 1)
+    assert solution.best_moves(0b000000011, 0b000011000, True) == [2]
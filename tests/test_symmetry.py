@@ -0,0 +1,47 @@
+"""Module tests for symmetry canonicalization"""
+
+from bitboard import CELL_COUNT
+from book import build, position_from_index, HEADER_SIZE, POSITION_COUNT, MISSING
+from symmetry import TRANSFORM_COUNT, PERMUTATIONS, INVERSE
+from symmetry import transform, canonical, canonical_key, map_cell, unmap_cell
+
+
+def test_transforms_are_distinct_permutations():
+    """ Ensures the eight transforms are distinct and each is undone by its
+    inverse.
+    """
+    assert len(set(PERMUTATIONS)) == TRANSFORM_COUNT == 8
+    for t in range(TRANSFORM_COUNT):
+        assert sorted(PERMUTATIONS[t]) == list(range(CELL_COUNT))
+        for cell in range(CELL_COUNT):
+            assert unmap_cell(map_cell(cell, t), t) == cell
+            assert PERMUTATIONS[INVERSE[t]][PERMUTATIONS[t][cell]] == cell
+
+
+def test_canonical_is_invariant():
+    """ Ensures every symmetric copy of a position has the same canonical
+    form, and the returned transform produces it.
+    """
+    # X O -
+    # - X -
+    # - - O
+    x_bits, o_bits = 0b000010001, 0b100000010
+    expected = canonical_key(x_bits, o_bits)[0]
+    for t in range(TRANSFORM_COUNT):
+        copy = transform(x_bits, t), transform(o_bits, t)
+        first, second, used = canonical(*copy)
+        assert first | second << CELL_COUNT == expected
+        assert (transform(copy[0], used), transform(copy[1], used)) == (first, second)
+
+
+def test_reachable_positions_shrink():
+    """ Ensures the 5,478 reachable positions collapse to the well-known
+    765 essentially different ones.
+    """
+    contents = build()
+    keys = set()
+    for index in range(POSITION_COUNT):
+        if contents[HEADER_SIZE + index] == MISSING:
+            continue
+        keys.add(canonical_key(*position_from_index(index))[0])
+    assert len(keys) == 765
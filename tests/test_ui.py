@@ -0,0 +1,107 @@
+"""Module tests for the terminal UI"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip('textual')
+
+import ui  # noqa: E402
+from board import Board, Player  # noqa: E402
+from game import BackgroundAI, Game  # noqa: E402
+
+AI_MOVE_TIMEOUT = 30
+
+
+@pytest.fixture(autouse=True)
+def fresh_ui(monkeypatch):
+    """ Gives every test its own game and screens (screens can't be
+    mounted again once their app has exited). """
+    monkeypatch.setattr(ui, 'game', Game())
+    monkeypatch.setattr(ui, 'board_screen', ui.BoardScreen())
+    monkeypatch.setattr(ui, 'help_screen', ui.HelpScreen())
+
+
+async def _wait_for_ai(pilot):
+    for _ in range(int(AI_MOVE_TIMEOUT / 0.05)):
+        await pilot.pause(0.05)
+        if not ui.board_screen.thinking:
+            return
+    raise AssertionError('AI move timed out')
+
+
+def test_ai_moves_in_background(monkeypatch):
+    """ Ensures the AI answers a move from its background worker, a restart
+    keeps the idle worker, and a restart while it is thinking abandons its
+    move.
+    """
+    async def play():
+        app = ui.TicTacTerminalApp()
+        async with app.run_test() as pilot:
+            await pilot.press('1')
+            await _wait_for_ai(pilot)
+            cells = [cell for row in ui.game.board.board for cell in row]
+            assert cells.count(Player.PLAYER_X) == 1
+            assert cells.count(Player.PLAYER_O) == 1
+
+            pool = ui.ai._pool
+            await pilot.press('r')
+            assert ui.ai._pool is pool
+
+            get_move = ui.ai.get_move
+
+            async def slow_get_move(board):
+                await asyncio.sleep(AI_MOVE_TIMEOUT)
+                return await get_move(board)
+
+            monkeypatch.setattr(ui.ai, 'get_move', slow_get_move)
+            await pilot.press('5')
+            assert ui.board_screen.thinking
+            await pilot.press('r')
+            assert not ui.board_screen.thinking
+            await pilot.pause(0.5)
+            assert all(cell is None for row in ui.game.board.board for cell in row)
+            await pilot.press('q')
+
+    asyncio.run(play())
+
+
+def test_background_ai_kills_cancelled_search():
+    """ Ensures cancelling a move being searched kills the worker process.
+    """
+    background = BackgroundAI()
+
+    async def search():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(background.get_move(Board(4, 5, 4)), 0.5)
+
+    try:
+        asyncio.run(search())
+        assert background._pool is None
+    finally:
+        background.close()
+
+
+def test_draw_board_highlights_win_and_skips_unchanged():
+    """ Ensures the winning span is highlighted, and a redraw with nothing
+    changed leaves the widgets alone.
+    """
+    async def play():
+        app = ui.TicTacTerminalApp()
+        async with app.run_test() as pilot:
+            board = ui.game.board
+            board.board[0] = [Player.PLAYER_X] * 3
+            board.board[1] = Player.PLAYER_O, Player.PLAYER_O, None
+            ui.board_screen.draw_board()
+            await pilot.pause()
+            cells = ui.board_screen._cells
+            assert all(cells[0, col].has_class('win', 'player-X') for col in range(3))
+            assert not cells[1, 0].has_class('win')
+            assert cells[1, 0].has_class('player-O')
+
+            cells[2, 2].label = 'unchanged'
+            ui.board_screen.draw_board()
+            assert str(cells[2, 2].label) == 'unchanged'
+            await pilot.press('q')
+
+    asyncio.run(play())
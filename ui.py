@@ -1,4 +1,6 @@
 """Module containing terminal UI"""
+import time
+
 from textual.app import App, ComposeResult
 from textual import events, log
 from textual.binding import Binding
@@ -7,10 +9,16 @@ from textual.screen import Screen
 from textual.widgets import Button, Static, Header, Footer
 
 from banners import BANNER
-from game import Game, GameOutcome
+import instrument
+from loggers import configure_logging
+from game import Game, GameOutcome, BackgroundAI
 from board import BoardState, Player
 from board import InvalidMoveError
 
+# frames of the "thinking" indicator, advanced every THINKING_INTERVAL
+THINKING_FRAMES = '|/-\\'
+THINKING_INTERVAL = 0.1
+
 
 class HelpScreen(Screen):
     BINDINGS = [
@@ -31,9 +39,28 @@ class BoardScreen(Screen):
 
     def __init__(self):
         super().__init__()
+        self.thinking = False
+        self._thinking_frame = 0
+        # widgets, cached on mount, and what they last showed
+        self._cells = {}
+        self._labels = {}
+        self._label_texts = {}
+        self._drawn_cells = {}
+        self._drawn_position = None
 
     def on_mount(self) -> None:
         """Occurs after initial layout is performed."""
+        self._cells = {
+            (row_num, col_num): self.query_one(f'#cell-{row_num}-{col_num}', Button)
+            for row_num in range(3)
+            for col_num in range(3)
+        }
+        self._labels = {
+            label_id: self.query_one(f'#{label_id}', Static)
+            for label_id in ('status-label', 'winner-label', 'thinking-label', 'search-label',
+                             'win-count-label', 'lose-count-label', 'tie-count-label')
+        }
+        self.set_interval(THINKING_INTERVAL, self.draw_thinking)
         self.draw_board()
 
     def compose(self) -> ComposeResult:
@@ -47,6 +74,8 @@ class BoardScreen(Screen):
             with Container(id="status-container"):
                 yield Static("Winner: ", id="winner-label")
                 yield Static("Game: ", id="status-label")
+                yield Static("", id="thinking-label")
+                yield Static("", id="search-label")
                 yield Static("Stats:", id="stats-label")
                 yield Static("Wins:", id="win-count-label")
                 yield Static("Losses:", id="lose-count-label")
@@ -65,6 +94,9 @@ class BoardScreen(Screen):
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """Called when a button is pressed."""
+        if self.thinking:
+            log('Attempt to move while the AI is thinking')
+            return
         board_state = game.board.get_state()
         if board_state is not BoardState.PLAYING:
             log('Attempt to move when game is not running')
@@ -78,62 +110,93 @@ class BoardScreen(Screen):
             log('Invalid move, dummy')
             return
 
-        board_state = game.board.get_state()
-        if board_state is BoardState.FINISHED:
-            winner = game.board.get_winner()
-            if winner is Player.PLAYER_X:
-                game.outcomes[GameOutcome.WIN] += 1
-            elif winner is Player.PLAYER_O:
-                game.outcomes[GameOutcome.LOSE] += 1
-        elif board_state is BoardState.CATS_GAME:
-            game.outcomes[GameOutcome.CATS_GAME] += 1
-        else:
-            game.board.make_best_move()
+        if game.record_outcome() is None:
+            self.thinking = True
+            self.run_worker(self.play_ai_move(game.board), group='ai', exclusive=True)
         self.draw_board()
 
-    def draw_board(self):
-        """ Draws the updated board."""
-        game_state = game.board.get_state().value
-        winner = game.board.get_winner()
+    async def play_ai_move(self, board):
+        """ Plays the AI's move on `board`, searched in the background so
+        the UI stays responsive. Cancelled (by `cancel_ai_move`) if the
+        game is restarted or the app quits.
+        """
+        start = time.perf_counter()
+        try:
+            move = await ai.get_move(board)
+        finally:
+            self.thinking = False
+        if board is not game.board or move is None:
+            return
+        instrument.record_latency('search', time.perf_counter() - start)
+        board.select_cell(*move)
+        game.record_outcome()
+        self.draw_board()
 
-        if winner is not None:
-            winner = winner.value
+    def cancel_ai_move(self):
+        """ Abandons any AI move being searched (cancelling the worker
+        makes `BackgroundAI.get_move` kill the search, while an idle worker
+        process is kept). """
+        self.workers.cancel_group(self, 'ai')
+        self.thinking = False
+
+    def draw_thinking(self):
+        """ Animates the "thinking" indicator while the AI searches. """
+        if self.thinking:
+            self._thinking_frame = (self._thinking_frame + 1) % len(THINKING_FRAMES)
+            self._set_label('thinking-label', f'AI thinking {THINKING_FRAMES[self._thinking_frame]}')
         else:
-            winner = '-'
-        self.query_one('#status-label').update('Game Status: ' + game_state)
-        self.query_one('#winner-label').update('Winner: ' + winner)
-
-        win_count = str(game.outcomes[GameOutcome.WIN])
-        lose_count = str(game.outcomes[GameOutcome.LOSE])
-        tie_count = str(game.outcomes[GameOutcome.CATS_GAME])
-
-        self.query_one('#win-count-label').update(f'Wins: {win_count}')
-        self.query_one('#lose-count-label').update(f'Losses: {lose_count}')
-        self.query_one('#tie-count-label').update(f'Ties: {tie_count}')
-
-        for row_num in range(3):
-            for col_num in range(3):
-                cell = game.board.board[row_num][col_num]
-                button = self.query_one(f'#cell-{row_num}-{col_num}')
-                button.remove_class('win')
-                button.label = cell.value if cell is not None else '-'
-                if cell is None:
-                    button.remove_class('player-X')
-                    button.remove_class('player-O')
-                elif cell == Player.PLAYER_X:
-                    button.remove_class('player-O')
-                    button.add_class('player-X')
-                    button.text = 'poop'
-                elif cell == Player.PLAYER_O:
-                    button.remove_class('player-X')
-                    button.add_class('player-O')
-
-        if game.board.get_state() == BoardState.FINISHED:
-            game.board.get_winner().value
-            log('Winner')
+            self._set_label('thinking-label', '')
+
+    def _set_label(self, label_id, text):
+        """ Updates a status label, if its text changed. """
+        if self._label_texts.get(label_id) != text:
+            self._labels[label_id].update(text)
+            self._label_texts[label_id] = text
+
+    def draw_board(self):
+        """ Draws the updated board, touching only the cells and labels
+        which changed since the last draw.
+        """
+        board = game.board
+        game_state = board.get_state()
+        winner = board.get_winner()
+
+        self._set_label('status-label', 'Game Status: ' + game_state.value)
+        self._set_label('winner-label', 'Winner: ' + (winner.value if winner else '-'))
+        self._set_label('win-count-label', f'Wins: {game.outcomes[GameOutcome.WIN]}')
+        self._set_label('lose-count-label', f'Losses: {game.outcomes[GameOutcome.LOSE]}')
+        self._set_label('tie-count-label', f'Ties: {game.outcomes[GameOutcome.CATS_GAME]}')
+        seconds = instrument.last_move.get('seconds')
+        if instrument.enabled and seconds is not None:
+            self._set_label('search-label', f'Last search: {seconds * 1000:.1f} ms')
+
+        # the cells (and their highlighting) follow from the marks alone
+        position = board.x_bits, board.o_bits
+        if position == self._drawn_position:
+            return
+        self._drawn_position = position
+
+        win_cells = set(board.get_winning_cells()) if winner else set()
+        drawn = {}
+        for row_num, row in enumerate(board.board):
+            for col_num, cell in enumerate(row):
+                drawn[row_num, col_num] = cell, (row_num, col_num) in win_cells
+        for coords, (cell, won) in drawn.items():
+            if self._drawn_cells.get(coords) == (cell, won):
+                continue
+            button = self._cells[coords]
+            button.label = cell.value if cell is not None else '-'
+            button.set_class(cell is Player.PLAYER_X, 'player-X')
+            button.set_class(cell is Player.PLAYER_O, 'player-O')
+            button.set_class(won, 'win')
+        self._drawn_cells = drawn
+
+        if game_state is BoardState.FINISHED:
+            log(f'Winner: {winner.value} ({board.winning_span})')
 
 
 game = Game()
+ai = BackgroundAI()
 board_screen = BoardScreen()
 help_screen = HelpScreen()
 
@@ -145,27 +208,38 @@ class TicTacTerminalApp(App):
     SUB_TITLE = 'A terminal-based tic-tac-toe app by Ben Friedland'
 
     SCREENS = {
-        'board': board_screen,
-        'help': help_screen,
+        'board': lambda: board_screen,
+        'help': lambda: help_screen,
     }
 
     BINDINGS = [
         Binding(key='h', action='push_screen(\'help\')', description='Help'),
-        Binding(key='q', action='app.quit', description='Quit'),
+        Binding(key='q', action='quit', description='Quit'),
         Binding(key='r', action='restart', description='Restart Game'),
     ]
 
     def __init__(self):
         super().__init__()
+        configure_logging()
+        instrument.configure_instrumentation()
+        # started before Textual captures stdout/stderr, which the worker
+        # process machinery needs to be able to launch its helpers
+        ai.start()
 
     def on_mount(self) -> None:
         """Occurs after initial layout is performed."""
         self.push_screen('board')
 
     def action_restart(self):
+        board_screen.cancel_ai_move()
         game.new_game()
         board_screen.draw_board()
 
+    async def action_quit(self):
+        board_screen.cancel_ai_move()
+        ai.close()
+        self.exit()
+
 
 if __name__ == "__main__":
     TicTacTerminalApp().run()